@@ -0,0 +1,180 @@
+"""
+Admission control for heavy routes.
+
+Every gunicorn worker has a fixed number of request threads. A statistics
+PDF or a year of bills can hold one for seconds, and the POS requests
+queued behind it wait too. Heavy routes are therefore sorted into pools,
+and each pool has a concurrency limit:
+
+    reports   PDFs, bill reprints and cross-outlet reports
+    history   bill listings that reach far back
+    kitchen   kitchen screen streams and long-polls
+
+A request for a full pool waits up to its queue time for a slot, then gets
+a 503 with Retry-After. A waiting request still holds its thread. Kitchen
+screens hold theirs for the whole stream, so the kitchen pool has threads
+of its own: its limit. The running and waiting requests of the other pools
+share what is left after those and the `reserved` threads, and beyond that
+they are turned away at once. The reserved threads are always left for POS
+routes, which are never limited.
+
+Counts are per worker process; GET /api/admin/admission reports this
+worker's.
+"""
+import threading
+import time
+
+from flask import jsonify, request
+
+from structured_log import get_logger
+
+ENVIRON_KEY = 'khan_sahab.admission_pool'
+
+log = get_logger('admission')
+
+
+class Pool:
+    def __init__(self, name, limit, queue_seconds, dedicated=False):
+        self.name = name
+        self.limit = limit
+        self.queue_seconds = queue_seconds
+        # A dedicated pool's limit is its own thread budget, apart from the shared heavy threads
+        self.dedicated = dedicated
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_ms = 0.0
+        self._slots = threading.Semaphore(limit)
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'dedicated': self.dedicated,
+            'queue_seconds': self.queue_seconds,
+            'active': self.active,
+            'waiting': self.waiting,
+            'peak_waiting': self.peak_waiting,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'avg_wait_ms': round(self.wait_ms / self.admitted, 1) if self.admitted else 0.0,
+        }
+
+
+class AdmissionControl:
+    def __init__(self, app=None, classify=None, limits=None, threads=2, reserved=1,
+                 queue_seconds=5.0, retry_after=10, pool_queue_seconds=None, dedicated=()):
+        self.classify = classify
+        self.pools = {}
+        self.heavy_threads = 0
+        self.heavy_in_use = 0
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(
+                app, classify, limits, threads, reserved, queue_seconds, retry_after, pool_queue_seconds, dedicated
+            )
+
+    def init_app(self, app, classify, limits, threads=2, reserved=1, queue_seconds=5.0, retry_after=10,
+                 pool_queue_seconds=None, dedicated=()):
+        """
+        classify() runs inside each request and returns the name of its pool
+        in `limits` ({pool: concurrent requests}), or None for an unlimited
+        POS route. `pool_queue_seconds` overrides the queue time per pool.
+        Pools named in `dedicated` get `limit` threads of their own instead
+        of sharing the heavy threads.
+        """
+        self.classify = classify
+        pool_queue_seconds = pool_queue_seconds or {}
+        self.pools = {
+            name: Pool(name, limit, pool_queue_seconds.get(name, queue_seconds), name in dedicated)
+            for name, limit in limits.items()
+        }
+        dedicated_threads = sum(pool.limit for pool in self.pools.values() if pool.dedicated)
+        self.heavy_threads = max(threads - reserved - dedicated_threads, 0)
+        self.retry_after = retry_after
+        app.extensions['admission'] = self
+        app.before_request(self._admit)
+        app.after_request(self._hold_for_stream)
+        app.teardown_request(self._release)
+
+    def _admit(self):
+        name = self.classify()
+        if name is None:
+            return None
+        pool = self.pools[name]
+        with self._lock:
+            full = not pool.dedicated and self.heavy_in_use >= self.heavy_threads
+            if full:
+                pool.rejected += 1
+                # Name the pools actually holding the shared threads
+                holders = [
+                    other.name for other in self.pools.values()
+                    if not other.dedicated and (other.active or other.waiting)
+                ]
+            else:
+                if not pool.dedicated:
+                    self.heavy_in_use += 1
+                pool.waiting += 1
+                pool.peak_waiting = max(pool.peak_waiting, pool.waiting)
+        if full:
+            return self._reject(pool, 'no free thread', holders)
+        started = time.perf_counter()
+        admitted = pool._slots.acquire(timeout=pool.queue_seconds)
+        with self._lock:
+            pool.waiting -= 1
+            if admitted:
+                pool.active += 1
+                pool.admitted += 1
+                pool.wait_ms += (time.perf_counter() - started) * 1000
+            else:
+                if not pool.dedicated:
+                    self.heavy_in_use -= 1
+                pool.timed_out += 1
+        if not admitted:
+            return self._reject(pool, 'queue timeout', [pool.name])
+        # Kept on the request itself: batched sub-requests share g with their batch
+        request.environ[ENVIRON_KEY] = pool
+        return None
+
+    def _hold_for_stream(self, response):
+        # A streamed body is produced after the request context is gone, so keep the slot until it closes.
+        # File bodies (send_file) are handed to the server as they are and never run close callbacks.
+        if response.is_streamed and not response.direct_passthrough and ENVIRON_KEY in request.environ:
+            pool = request.environ.pop(ENVIRON_KEY)
+            response.call_on_close(lambda: self._free(pool))
+        return response
+
+    def _release(self, error=None):
+        pool = request.environ.pop(ENVIRON_KEY, None)
+        if pool is not None:
+            self._free(pool)
+
+    def _free(self, pool):
+        with self._lock:
+            pool.active -= 1
+            if not pool.dedicated:
+                self.heavy_in_use -= 1
+        pool._slots.release()
+
+    def _reject(self, pool, reason, holders):
+        log.warning('Request shed by admission control', extra={'pool': pool.name, 'reason': reason, 'holders': holders})
+        busy_with = ' and '.join(holders) if holders else 'other'
+        response = jsonify({
+            'error': f'The server is busy with {busy_with} requests, please try again shortly',
+            'retry_after': self.retry_after,
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'heavy_threads': self.heavy_threads,
+                'heavy_in_use': self.heavy_in_use,
+                'pools': {name: pool.stats() for name, pool in self.pools.items()},
+            }
@@ -1,10 +1,40 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone, timedelta
 import os
+import threading
+import time
+from functools import partial
 from printer import print_bill
-from decimal import Decimal, ROUND_HALF_UP
+from money import to_paise, to_rupees
+from pricing import adjust_order, line_amount, normalize_tax_rate, order_totals, price, stored_totals, totals_payload
+from fieldsets import Field, FieldSet
+from pagination import encode_cursor, decode_cursor
+from invoices import allocate_invoice_number
+from table_states import TableBoard, TableStateError, occupy_table, release_table, set_table_status
+from outlet_routing import (
+    REPLICA_BIND, OutletFanOut, OutletRoutingSession, ReplicaReads, current_outlet_id, outlet_bind_key,
+    parse_outlet_databases
+)
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from migrate_money_to_paise import migrate_money_columns
+from migrate_outlets import DEFAULT_OUTLET, migrate_bill_outlets
+from slow_query_log import SlowQueryLog
+from db_maintenance import DatabaseMaintenance, parse_tasks
+from structured_log import REQUEST_ID_HEADER, StructuredLog, get_logger
+from responses import ResponseCompression, json_response
+from static_assets import StaticAssets
+from batch import BatchRunner, after_commit
+from admission import AdmissionControl
+from kitchen import ACTIVE_STATUSES, KitchenQueue
+from menu_search import MenuSearchIndex
+from quick_keys import ALL_DAY, TIME_SLOTS, QuickKeys, time_slot
+from kot import KOTDispatcher
+from thermal_pdf import BatchRenderer
+from order_journal import JournalConflict, JournalReplayer, OrderJournal
+from station_config import KOT_DEFAULT_STATION, KOT_STATIONS, KOT_TIMEOUT_SECONDS
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table as ReportLabTable, TableStyle, BaseDocTemplate
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -21,31 +51,53 @@ def get_ist_time():
     ist_time = utc_now + ist_offset
     return ist_time
 
-def round_half_up(value, digits=0):
-    quantizer = Decimal('1') if digits == 0 else Decimal(f"1.{'0' * digits}")
-    rounded = float(Decimal(str(value)).quantize(quantizer, rounding=ROUND_HALF_UP))
-    return float(int(Decimal(str(rounded / 10)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)) * 10)
+def parse_ist_datetime(value):
+    # Stored timestamps are naive IST wall-clock times; convert aware inputs to match
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone(timedelta(hours=5, minutes=30))).replace(tzinfo=None)
+    return parsed
+
+def normalize_database_url(database_url):
+    # SQLAlchemy expects postgresql://, while some platforms expose postgres://.
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+    return database_url
 
 def get_database_uri():
     database_url = os.environ.get('DATABASE_URL')
     if database_url:
-        # SQLAlchemy expects postgresql://, while some platforms expose postgres://.
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        return database_url
+        return normalize_database_url(database_url)
     return 'sqlite:///restaurant.db'
 
 # Get the directory of the current file
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 STATIC_FOLDER = os.path.join(BASE_DIR, '..', 'frontend', 'build')
 
-app = Flask(__name__, static_folder=STATIC_FOLDER, static_url_path='')
+# The build is served by serve() below rather than Flask's static route
+app = Flask(__name__, static_folder=None)
 app.config['SQLALCHEMY_DATABASE_URI'] = get_database_uri()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here-change-in-production')
 
-db = SQLAlchemy(app)
-CORS(app)
+# Branches with their own database; every other outlet uses DATABASE_URL
+OUTLET_DATABASES = parse_outlet_databases(os.environ.get('OUTLET_DATABASES'))
+app.config['SQLALCHEMY_BINDS'] = {
+    outlet_bind_key(outlet_id): normalize_database_url(url) for outlet_id, url in OUTLET_DATABASES.items()
+}
+# Optional read replica of DATABASE_URL for report and dashboard reads
+if os.environ.get('DATABASE_REPLICA_URL'):
+    app.config['SQLALCHEMY_BINDS'][REPLICA_BIND] = normalize_database_url(os.environ['DATABASE_REPLICA_URL'])
+DEFAULT_OUTLET_ID = int(os.environ.get('OUTLET_ID', 1))
+
+db = SQLAlchemy(app, session_options={'class_': OutletRoutingSession})
+CORS(app, expose_headers=['X-Next-Cursor', REQUEST_ID_HEADER, 'Retry-After'])
+ResponseCompression(app)
+slow_query_log = SlowQueryLog(app, db)
+structured_log = StructuredLog(app)
+log = get_logger('app')
+# Never run maintenance against the read replica
+db_maintenance = DatabaseMaintenance(app, db, exclude_binds=(REPLICA_BIND,))
 
 # Database Models
 class Category(db.Model):
@@ -56,7 +108,7 @@ class MenuItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
+    price_paise = db.Column(db.Integer, nullable=False)
     category = db.Column(db.String(50))
     available = db.Column(db.Boolean, default=True)
 
@@ -70,50 +122,116 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     table_id = db.Column(db.Integer, db.ForeignKey('table.id'), nullable=False)
     items = db.relationship('OrderItem', backref='order', lazy=True)
-    total_amount = db.Column(db.Float, default=0.0)
+    total_amount_paise = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20), default='pending')  # pending, preparing, ready, served, paid
     tax_rate = db.Column(db.Float, default=0.0)  # Tax rate as decimal (0.05 for 5%)
-    tax_amount = db.Column(db.Float, default=0.0)  # Calculated tax amount
-    final_total = db.Column(db.Float, default=0.0)  # Total including tax
+    # Denormalized totals, maintained by pricing.adjust_order as lines change
+    tax_amount_paise = db.Column(db.Integer, default=0)  # Calculated tax amount
+    final_total_paise = db.Column(db.Integer, default=0)  # Total including tax
     payment_method = db.Column(db.String(20), default='cash')  # cash, card, digital
     created_at = db.Column(db.DateTime, default=get_ist_time)
     updated_at = db.Column(db.DateTime, default=get_ist_time, onupdate=get_ist_time)
 
+    __table_args__ = (
+        # Serves the kitchen queue's active-order scan
+        db.Index('ix_order_status_created_at', 'status', 'created_at'),
+    )
+
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False)
     quantity = db.Column(db.Integer, default=1)
-    price = db.Column(db.Float, nullable=False)
+    price_paise = db.Column(db.Integer, nullable=False)
     menu_item = db.relationship('MenuItem')
 
+class Outlet(db.Model):
+    # Restaurant details printed on every bill of this outlet
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(200))
+    state = db.Column(db.String(50))
+    state_code = db.Column(db.String(10))
+    phone = db.Column(db.String(20))
+    gstin = db.Column(db.String(20))
+    fssai = db.Column(db.String(20))
+    place_of_supply = db.Column(db.String(50))
+
 class Bill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
-    restaurant_name = db.Column(db.String(100), default='KHAN SAHAB RESTAURANT')
-    address = db.Column(db.String(200), default='4, BANSAL NAGAR FATEHABAD ROAD AGRA')
-    state = db.Column(db.String(50), default='Uttar Pradesh')
-    state_code = db.Column(db.String(10), default='09')
-    phone = db.Column(db.String(20), default='9319209322')
-    gstin = db.Column(db.String(20), default='09AHDPA1039P2ZB')
-    fssai = db.Column(db.String(20), default='12722001001504')
-    place_of_supply = db.Column(db.String(50), default='Uttar Pradesh')
-    subtotal = db.Column(db.Float, nullable=False)
+    outlet_id = db.Column(db.Integer, db.ForeignKey('outlet.id'), nullable=False)
+    subtotal_paise = db.Column(db.Integer, nullable=False)
     tax_rate = db.Column(db.Float, default=0.0)
-    tax_amount = db.Column(db.Float, default=0.0)
-    total = db.Column(db.Float, nullable=False)
+    tax_amount_paise = db.Column(db.Integer, default=0)
+    total_paise = db.Column(db.Integer, nullable=False)
     payment_method = db.Column(db.String(20), default='cash')
     bill_date = db.Column(db.DateTime, default=get_ist_time)
     created_at = db.Column(db.DateTime, default=get_ist_time)
 
+    __table_args__ = (
+        # Serves date-range filters and keyset pagination on /api/bills
+        db.Index('ix_bill_bill_date_id', 'bill_date', 'id'),
+    )
+
+class InvoiceSequence(db.Model):
+    # One row per financial year series (and outlet, for outlets sharing this database), see invoices.py
+    series = db.Column(db.String(20), primary_key=True)
+    next_number = db.Column(db.Integer, nullable=False, default=1)
+
+OUTLET_PROFILE_FIELDS = ('name', 'address', 'state', 'state_code', 'phone', 'gstin', 'fssai', 'place_of_supply')
+
+def serialize_outlet(outlet):
+    return {'id': outlet.id, **{field: getattr(outlet, field) for field in OUTLET_PROFILE_FIELDS}}
+
+# Outlet profiles change rarely; other workers pick up edits within the TTL
+OUTLET_CACHE_SECONDS = float(os.environ.get('OUTLET_CACHE_SECONDS', 300))
+_outlet_cache = {}
+
+def get_outlet_profile(outlet_id=None):
+    """Cached profile dict for an outlet (the request's outlet if None), or None if it doesn't exist."""
+    if outlet_id is None:
+        outlet_id = current_outlet_id() or DEFAULT_OUTLET_ID
+    cached = _outlet_cache.get(outlet_id)
+    if cached and time.monotonic() - cached[0] < OUTLET_CACHE_SECONDS:
+        return cached[1]
+    outlet = db.session.get(Outlet, outlet_id)
+    profile = serialize_outlet(outlet) if outlet else None
+    if profile:
+        _outlet_cache[outlet_id] = (time.monotonic(), profile)
+    return profile
+
+def database_outlet(outlet_id):
+    """The outlet whose database holds `outlet_id`'s data: itself if it has its own, else the default outlet."""
+    return outlet_id if outlet_id in OUTLET_DATABASES else DEFAULT_OUTLET_ID
+
+def shared_database_outlet(outlet_id):
+    """`outlet_id` if its bills go into another outlet's database in this request, else None."""
+    return None if outlet_id == database_outlet(current_outlet_id() or DEFAULT_OUTLET_ID) else outlet_id
+
+def outlet_registered(outlet_id):
+    """
+    Whether requests may select the outlet: the default outlet, one in
+    OUTLET_DATABASES, or one in the registry. Registry lookups are cached,
+    and a cached outlet still counts while the database is unreachable.
+    """
+    if outlet_id == DEFAULT_OUTLET_ID or outlet_id in OUTLET_DATABASES:
+        return True
+    try:
+        return get_outlet_profile(outlet_id) is not None
+    except DBAPIError:
+        db.session.rollback()
+        return outlet_id in _outlet_cache
+
 def serialize_order(order):
     table = db.session.get(Table, order.table_id)
     return {
         'id': order.id,
         'table_id': order.table_id,
         'table_number': table.number if table else order.table_id,
-        'total_amount': order.total_amount,
+        'total_amount': to_rupees(order.total_amount_paise),
+        **totals_payload(order_totals(order)),
         'status': order.status,
         'created_at': order.created_at.isoformat(),
         'items': [{
@@ -121,23 +239,575 @@ def serialize_order(order):
             'menu_item_id': item.menu_item_id,
             'menu_item_name': item.menu_item.name,
             'quantity': item.quantity,
-            'price': item.price
+            'price': to_rupees(item.price_paise)
         } for item in order.items]
     }
 
-# Serve React App
+def isoformat(value):
+    return value.isoformat() if value else None
+
+# Fields the list endpoints can emit; ?fields= selects a subset at the SQL level
+MENU_FIELDS = FieldSet(
+    id=Field(MenuItem.id),
+    name=Field(MenuItem.name),
+    description=Field(MenuItem.description),
+    price=Field(MenuItem.price_paise, build=to_rupees),
+    category=Field(MenuItem.category),
+    available=Field(MenuItem.available)
+)
+
+ORDER_TOTAL_COLUMNS = (Order.total_amount_paise, Order.tax_rate, Order.tax_amount_paise, Order.final_total_paise)
+
+ORDER_FIELDS = FieldSet(
+    id=Field(Order.id),
+    table_id=Field(Order.table_id),
+    table_number=Field(Table.number, Order.table_id, build=lambda number, table_id: table_id if number is None else number),
+    total_amount=Field(Order.total_amount_paise, build=to_rupees),
+    subtotal=Field(Order.total_amount_paise, build=to_rupees),
+    tax_rate=Field(Order.tax_rate, build=normalize_tax_rate),
+    tax_amount=Field(*ORDER_TOTAL_COLUMNS, build=lambda *stored: to_rupees(stored_totals(*stored).tax_paise)),
+    total=Field(*ORDER_TOTAL_COLUMNS, build=lambda *stored: to_rupees(stored_totals(*stored).total_paise)),
+    status=Field(Order.status),
+    created_at=Field(Order.created_at, build=isoformat),
+    items=Field()  # filled in from a single batched OrderItem query
+)
+
+BILL_FIELDS = FieldSet(
+    id=Field(Bill.id),
+    order_id=Field(Bill.order_id),
+    invoice_number=Field(Bill.invoice_number),
+    outlet_id=Field(Bill.outlet_id),
+    subtotal=Field(Bill.subtotal_paise, build=to_rupees),
+    tax_rate=Field(Bill.tax_rate),
+    tax_amount=Field(Bill.tax_amount_paise, build=to_rupees),
+    total=Field(Bill.total_paise, build=to_rupees),
+    payment_method=Field(Bill.payment_method),
+    bill_date=Field(Bill.bill_date, build=isoformat),
+    created_at=Field(Bill.created_at, build=isoformat)
+)
+
+def order_items_by_order(order_ids, chunk_size=500):
+    items = {}
+    for start in range(0, len(order_ids), chunk_size):
+        rows = db.session.query(
+            OrderItem.order_id, OrderItem.id, OrderItem.menu_item_id, MenuItem.name,
+            OrderItem.quantity, OrderItem.price_paise
+        ).join(MenuItem, MenuItem.id == OrderItem.menu_item_id).filter(
+            OrderItem.order_id.in_(order_ids[start:start + chunk_size])
+        ).order_by(OrderItem.id)
+        for order_id, item_id, menu_item_id, name, quantity, price_paise in rows:
+            items.setdefault(order_id, []).append({
+                'id': item_id,
+                'menu_item_id': menu_item_id,
+                'menu_item_name': name,
+                'quantity': quantity,
+                'price': to_rupees(price_paise)
+            })
+    return items
+
+def load_kitchen_tickets(outlet_id, order_ids=None):
+    """Kitchen tickets for an outlet's active orders (optionally just `order_ids`), oldest first."""
+    # Runs from request handlers and the queue's sync thread, so use its own session
+    with app.app_context():
+        g.outlet_id = outlet_id
+        query = db.session.query(
+            Order.id, Order.table_id, Table.number, Order.status, Order.created_at
+        ).outerjoin(Table, Table.id == Order.table_id).filter(Order.status.in_(ACTIVE_STATUSES))
+        if order_ids is not None:
+            query = query.filter(Order.id.in_(order_ids))
+        orders = query.order_by(Order.created_at, Order.id).all()
+        items = {}
+        if orders:
+            rows = db.session.query(
+                OrderItem.order_id, OrderItem.menu_item_id, MenuItem.name, MenuItem.category, OrderItem.quantity
+            ).join(MenuItem, MenuItem.id == OrderItem.menu_item_id).filter(
+                OrderItem.order_id.in_([row[0] for row in orders])
+            ).order_by(OrderItem.id)
+            for order_id, menu_item_id, name, category, quantity in rows:
+                items.setdefault(order_id, []).append({
+                    'menu_item_id': menu_item_id,
+                    'name': name,
+                    'category': category,
+                    'quantity': quantity
+                })
+        tickets = [{
+            'order_id': order_id,
+            'table_id': table_id,
+            'table_number': table_number,
+            'status': status,
+            'created_at': isoformat(created_at),
+            'items': items.get(order_id, [])
+        } for order_id, table_id, table_number, status, created_at in orders]
+        journaled = journaled_orders(outlet_id)
+        if order_ids is not None:
+            journaled = {order_id: state for order_id, state in journaled.items() if order_id in order_ids}
+        if not journaled:
+            return tickets
+        # Orders with writes still in the journal show as they will once replayed
+        menu_search_for(outlet_id).ensure_loaded()
+        by_order = {ticket['order_id']: ticket for ticket in tickets}
+        for order_id, state in journaled.items():
+            ticket = journaled_ticket(outlet_id, order_id, state, by_order.get(order_id))
+            if ticket is not None:
+                by_order[order_id] = ticket
+        return sorted(by_order.values(), key=lambda ticket: (ticket['created_at'], ticket['order_id']))
+
+# One per database, so outlets sharing the default database share its
+# in-memory state (and its sync thread); likewise the boards, indexes and keys below
+kitchen_queues = {}
+
+def kitchen_queue_for(outlet_id):
+    outlet_id = database_outlet(outlet_id)
+    queue = kitchen_queues.get(outlet_id)
+    if queue is None:
+        queue = kitchen_queues.setdefault(outlet_id, KitchenQueue(
+            partial(load_kitchen_tickets, outlet_id),
+            sync_seconds=float(os.environ.get('KITCHEN_SYNC_SECONDS', 2))
+        ))
+    return queue
+
+def load_table_board(outlet_id):
+    with app.app_context():
+        g.outlet_id = outlet_id
+        return [
+            {'id': table_id, 'number': number, 'status': status, 'current_order_id': current_order_id}
+            for table_id, number, status, current_order_id in db.session.query(
+                Table.id, Table.number, Table.status, Table.current_order_id
+            )
+        ]
+
+table_boards = {}
+
+def table_board_for(outlet_id):
+    outlet_id = database_outlet(outlet_id)
+    board = table_boards.get(outlet_id)
+    if board is None:
+        board = table_boards.setdefault(outlet_id, TableBoard(
+            partial(load_table_board, outlet_id),
+            sync_seconds=float(os.environ.get('TABLE_BOARD_SYNC_SECONDS', 2))
+        ))
+    return board
+
+def load_menu_search_items(outlet_id, item_ids=None):
+    """Available menu items for an outlet's search index (optionally just `item_ids`)."""
+    with app.app_context():
+        g.outlet_id = outlet_id
+        query = db.session.query(
+            MenuItem.id, MenuItem.name, MenuItem.description, MenuItem.price_paise, MenuItem.category
+        ).filter(MenuItem.available == True)
+        if item_ids is not None:
+            query = query.filter(MenuItem.id.in_(item_ids))
+        return [{
+            'id': item_id,
+            'name': name,
+            'description': description,
+            'price': to_rupees(price_paise),
+            'category': category
+        } for item_id, name, description, price_paise, category in query]
+
+menu_search_indexes = {}
+
+def menu_search_for(outlet_id):
+    outlet_id = database_outlet(outlet_id)
+    index = menu_search_indexes.get(outlet_id)
+    if index is None:
+        index = menu_search_indexes.setdefault(outlet_id, MenuSearchIndex(
+            partial(load_menu_search_items, outlet_id),
+            sync_seconds=float(os.environ.get('MENU_SEARCH_SYNC_SECONDS', 60))
+        ))
+    return index
+
+def quick_key_item(item_id, name, price_paise, category):
+    return {'id': item_id, 'name': name, 'price': to_rupees(price_paise), 'category': category}
+
+QUICK_KEYS_DAYS = int(os.environ.get('QUICK_KEYS_DAYS', 28))
+
+def load_quick_key_counts(outlet_id):
+    """Quantities sold per available item and hour ordered, over bills from the last QUICK_KEYS_DAYS."""
+    since = get_ist_time().replace(tzinfo=None) - timedelta(days=QUICK_KEYS_DAYS)
+    with app.app_context():
+        g.outlet_id = outlet_id
+        hour = func.extract('hour', Order.created_at)
+        rows = db.session.query(
+            MenuItem.id, MenuItem.name, MenuItem.price_paise, MenuItem.category, hour, func.sum(OrderItem.quantity)
+        ).select_from(Bill).join(Order, Order.id == Bill.order_id).join(
+            OrderItem, OrderItem.order_id == Order.id
+        ).join(MenuItem, MenuItem.id == OrderItem.menu_item_id).filter(
+            Bill.bill_date >= since, MenuItem.available == True
+        ).group_by(MenuItem.id, MenuItem.name, MenuItem.price_paise, MenuItem.category, hour)
+        return [
+            (quick_key_item(item_id, name, price_paise, category), int(hour_ordered), int(quantity))
+            for item_id, name, price_paise, category, hour_ordered, quantity in rows
+        ]
+
+quick_keys = {}
+
+def quick_keys_for(outlet_id):
+    outlet_id = database_outlet(outlet_id)
+    keys = quick_keys.get(outlet_id)
+    if keys is None:
+        keys = quick_keys.setdefault(outlet_id, QuickKeys(
+            partial(load_quick_key_counts, outlet_id),
+            top_n=int(os.environ.get('QUICK_KEYS_TOP_N', 8)),
+            sync_seconds=float(os.environ.get('QUICK_KEYS_SYNC_SECONDS', 3600))
+        ))
+    return keys
+
+# Kitchen order tickets go to the station printers in station_config.py
+kot_dispatcher = None
+if os.environ.get('KOT_ENABLED', 'false').lower() in ('1', 'true', 'yes'):
+    kot_dispatcher = KOTDispatcher(KOT_STATIONS, KOT_DEFAULT_STATION, timeout=KOT_TIMEOUT_SECONDS)
+
+def send_kitchen_tickets(order_id, table_number, lines, add_on=False):
+    """Queue KOTs for newly added lines; never waits for the printers."""
+    if kot_dispatcher is None or not lines:
+        return
+    kot_dispatcher.dispatch(order_id, table_number, lines, get_ist_time(), add_on=add_on)
+
+def kot_line(menu_item, quantity):
+    return {'name': menu_item.name, 'category': menu_item.category, 'quantity': quantity}
+
+def after_order_write(order, kot_lines, add_on=False):
+    """Post-commit side effects of an order write: kitchen screen and station printers."""
+    kitchen_queue_for(g.outlet_id).refresh(order.id)
+    if kot_dispatcher is not None and kot_lines:
+        table = db.session.get(Table, order.table_id)
+        send_kitchen_tickets(order.id, table.number if table else order.table_id, kot_lines, add_on=add_on)
+
+def database_unavailable(error):
+    """True when the database couldn't be reached, as opposed to rejecting the write."""
+    return isinstance(error, (OperationalError, InterfaceError)) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+replica_reads = ReplicaReads(
+    db, is_unavailable=database_unavailable,
+    retry_seconds=float(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+)
+
+# Optional local write-ahead journal for order writes, see order_journal.py
+order_journal = None
+journal_replayer = None
+if os.environ.get('ORDER_JOURNAL_PATH'):
+    order_journal = OrderJournal(os.environ['ORDER_JOURNAL_PATH'])
+    journal_replayer = JournalReplayer(
+        order_journal,
+        apply=lambda entry: apply_journal_entry(entry),
+        is_unavailable=database_unavailable,
+        interval=float(os.environ.get('ORDER_JOURNAL_REPLAY_SECONDS', 1))
+    )
+ORDER_JOURNAL_WAIT_SECONDS = float(os.environ.get('ORDER_JOURNAL_WAIT_SECONDS', 5))
+JOURNAL_WARM_RETRY_SECONDS = 10
+_journal_warming = set()
+_journal_seeded = set()
+
+def active_journal():
+    """The order journal, with this worker's replayer started, or None when journaling is off."""
+    if order_journal is None:
+        return None
+    journal_replayer.start()
+    return order_journal
+
+def journal_write_refused():
+    """Error response for a journaled order write inside a transactional batch, which couldn't roll it back."""
+    if g.get('hold_commits'):
+        return jsonify({'error': 'Order writes go through the order journal and cannot join a batch transaction'}), 400
+    return None
+
+def journal_ready(outlet_id):
+    """
+    Whether the outlet's order writes can go to the journal. Once the journal
+    has an order id counter for the outlet this is answered from the file
+    alone, and warm_journal_outlet() re-raises the counter in the background.
+    An outlet the journal has never seen is seeded here from the primary,
+    or written directly while the primary doesn't answer. Outlets sharing a
+    database share its journal counter, under the database's outlet.
+    """
+    journal = active_journal()
+    if journal is None:
+        return False
+    outlet_id = database_outlet(outlet_id)
+    if outlet_id not in _journal_seeded:
+        if not journal.is_seeded(outlet_id):
+            try:
+                journal.seed(outlet_id, db.session.query(func.max(Order.id)).scalar())
+            except DBAPIError:
+                db.session.rollback()
+                return False
+        _journal_seeded.add(outlet_id)
+    if outlet_id not in _journal_warming:
+        _journal_warming.add(outlet_id)
+        threading.Thread(
+            target=warm_journal_outlet, args=(outlet_id,), daemon=True, name=f'order-journal-warm-{outlet_id}'
+        ).start()
+    return True
+
+def warm_journal_outlet(outlet_id):
+    """
+    Raise the outlet's journal order id counter above the primary's highest
+    order id, in case orders were written directly while the journal was
+    off, then load the in-memory state journaled writes are answered from:
+    the table board, the menu index and the kitchen queue. Retries until the
+    primary answers.
+    """
+    while True:
+        try:
+            with app.app_context():
+                g.outlet_id = outlet_id
+                order_journal.seed(outlet_id, db.session.query(func.max(Order.id)).scalar())
+            table_board_for(outlet_id).ensure_loaded(start_sync=True)
+            menu_search_for(outlet_id).ensure_loaded(start_sync=True)
+            kitchen_queue_for(outlet_id).ensure_loaded(start_sync=True)
+            return
+        except Exception as e:
+            log.warning('Order journal warm-up failed', extra={'outlet_id': outlet_id, 'error': str(e)})
+            time.sleep(JOURNAL_WARM_RETRY_SECONDS)
+
+def settle_journal(order_id):
+    """
+    Wait for an order's journaled writes to reach the primary before a direct
+    write (status, pricing, bill) touches it. Returns an error response if
+    they don't, else None.
+    """
+    journal = active_journal()
+    if journal is None:
+        return None
+    deadline = time.monotonic() + ORDER_JOURNAL_WAIT_SECONDS
+    while True:
+        entries = journal.unapplied(database_outlet(g.outlet_id), order_id)
+        if not entries:
+            return None
+        if any(entry['status'] == 'conflict' for entry in entries):
+            return jsonify({'error': f'Order {order_id} has journaled changes in conflict, see /api/admin/journal'}), 409
+        if time.monotonic() >= deadline:
+            return jsonify({'error': f'Order {order_id} has changes still waiting to reach the database'}), 503
+        journal_replayer.kick()
+        time.sleep(0.05)
+
+def apply_journal_entry(entry):
+    """Write one journal entry to the primary database; called by the replayer in journal order."""
+    with app.app_context():
+        g.outlet_id = entry['outlet_id']
+        payload = entry['payload']
+        accepted_at = datetime.fromisoformat(entry['accepted_at'])
+        order = db.session.get(Order, entry['order_id'])
+        if entry['action'] == 'create_order':
+            if order is not None:
+                if order.table_id == payload['table_id'] and order.created_at == accepted_at:
+                    return  # committed before the replayer was interrupted
+                raise JournalConflict(f"Order id {entry['order_id']} is already used by another order")
+            try:
+                order, totals, kot_lines = record_new_order(
+                    payload['table_id'], payload['items'], order_id=entry['order_id'], created_at=accepted_at
+                )
+            except TableStateError as e:
+                db.session.rollback()
+                raise JournalConflict(str(e))
+            if db.session.get_bind(Order).dialect.name == 'postgresql':
+                # An explicit id doesn't advance the serial sequence
+                db.session.execute(text(
+                    "SELECT setval(pg_get_serial_sequence('\"order\"', 'id'), (SELECT MAX(id) FROM \"order\"))"
+                ))
+        else:
+            if order is None:
+                raise JournalConflict(f"Order {entry['order_id']} not found")
+            if order.status == 'paid':
+                raise JournalConflict(f"Order {entry['order_id']} is already paid")
+            totals, kot_lines = record_order_items(order, payload['items'])
+        db.session.commit()
+        if payload.get('kot') is not None:
+            kot_lines = []  # printed when the entry was journaled
+        after_order_write(order, kot_lines, add_on=entry['action'] != 'create_order')
+
+def journaled_orders(outlet_id, order_id=None):
+    """
+    Orders with journaled writes not yet replayed, as
+    {order_id: {'table_id', 'created_at', 'items': {menu_item_id: quantity}, 'journal_seq'}}.
+    table_id and created_at are only set for orders created in the journal.
+    """
+    journal = active_journal()
+    if journal is None:
+        return {}
+    orders = {}
+    for entry in journal.unapplied(database_outlet(outlet_id), order_id, statuses=('pending',)):
+        state = orders.setdefault(entry['order_id'], {'table_id': None, 'created_at': None})
+        if entry['action'] == 'create_order':
+            state['table_id'] = entry['payload']['table_id']
+            state['created_at'] = entry['accepted_at']
+        state['items'] = wanted_quantities(entry['payload']['items'])
+        state['journal_seq'] = entry['seq']
+    return orders
+
+def journaled_ticket(outlet_id, order_id, state, base=None):
+    """
+    Kitchen ticket for an order with journaled writes, built from memory on
+    top of its current ticket (`base`), or None if that can't be done: an
+    update to an order the kitchen isn't showing, or items the menu index
+    doesn't have.
+    """
+    if base is None and state['table_id'] is None:
+        return None
+    menu = menu_search_for(outlet_id)
+    items = []
+    for menu_item_id, quantity in state['items'].items():
+        menu_item = menu.get(menu_item_id)
+        if menu_item is None:
+            return None
+        if quantity > 0:
+            items.append({
+                'menu_item_id': menu_item_id,
+                'name': menu_item['name'],
+                'category': menu_item['category'],
+                'quantity': quantity
+            })
+    if base is not None:
+        return {**base, 'items': items}
+    table = table_board_for(outlet_id).get(state['table_id'])
+    return {
+        'order_id': order_id,
+        'table_id': state['table_id'],
+        'table_number': table['number'] if table else state['table_id'],
+        'status': 'pending',
+        'created_at': state['created_at'],
+        'items': items
+    }
+
+def journaled_kot_lines(outlet_id, previous, wanted):
+    """
+    KOT lines for the quantities `wanted` adds over `previous` (both
+    {menu_item_id: quantity}), from the menu index; None if it lacks any of
+    the items, in which case the tickets print on replay instead.
+    """
+    menu = menu_search_for(outlet_id)
+    lines = []
+    for menu_item_id, quantity in wanted.items():
+        menu_item = menu.get(menu_item_id)
+        if menu_item is None:
+            return None
+        added = quantity - previous.get(menu_item_id, 0)
+        if added > 0:
+            lines.append({'name': menu_item['name'], 'category': menu_item['category'], 'quantity': added})
+    return lines
+
+def after_journal_append(order_id, kot_lines, add_on=False):
+    """
+    Kitchen side effects of a journaled order write, without waiting for
+    replay: the kitchen screen shows it and the station printers get its
+    KOTs (when `kot_lines` isn't None) straight away.
+    """
+    state = journaled_orders(g.outlet_id, order_id).get(order_id)
+    kitchen_queue = kitchen_queue_for(g.outlet_id)
+    ticket = journaled_ticket(g.outlet_id, order_id, state, kitchen_queue.ticket(order_id)) if state else None
+    if ticket is not None:
+        kitchen_queue.put(ticket)
+        send_kitchen_tickets(order_id, ticket['table_number'], kot_lines, add_on=add_on)
+
+def journaled_order_view(order_id, state, order=None):
+    """An order as it will read once its journaled writes are replayed, shaped like serialize_order()."""
+    if order is None and state['table_id'] is None:
+        return None  # an update to an order the primary doesn't have
+    lines = {}
+    if order is not None:
+        for line in order.items:
+            lines.setdefault(line.menu_item_id, line)
+    menu = {item.id: item for item in MenuItem.query.filter(MenuItem.id.in_(list(state['items']))).all()}
+    subtotal_paise = 0
+    items = []
+    for menu_item_id, quantity in state['items'].items():
+        menu_item = menu.get(menu_item_id)
+        if menu_item is None or quantity <= 0:
+            continue
+        line = lines.get(menu_item_id)
+        # Lines already on the order keep their price, as in record_order_items()
+        price_paise = line.price_paise if line else menu_item.price_paise
+        subtotal_paise += line_amount(price_paise, quantity)
+        items.append({
+            'id': line.id if line else None,
+            'menu_item_id': menu_item_id,
+            'menu_item_name': menu_item.name,
+            'quantity': quantity,
+            'price': to_rupees(price_paise)
+        })
+    table_id = order.table_id if order else state['table_id']
+    table = db.session.get(Table, table_id)
+    return {
+        'id': order_id,
+        'table_id': table_id,
+        'table_number': table.number if table else table_id,
+        'total_amount': to_rupees(subtotal_paise),
+        **totals_payload(price(subtotal_paise, order.tax_rate if order else 0.0)),
+        'status': order.status if order else 'pending',
+        'created_at': order.created_at.isoformat() if order else state['created_at'],
+        'items': items,
+        'journal_seq': state['journal_seq']
+    }
+
+@app.before_request
+def select_outlet():
+    # EventSource can't send headers, so the query string works too
+    outlet_id = request.headers.get('X-Outlet-Id') or request.args.get('outlet_id')
+    try:
+        outlet_id = int(outlet_id) if outlet_id else DEFAULT_OUTLET_ID
+    except ValueError:
+        return jsonify({'error': 'Invalid outlet id'}), 400
+    # Per-outlet state is created on first use, so unknown ids are turned away here
+    if not outlet_registered(outlet_id):
+        return jsonify({'error': f'Outlet {outlet_id} not found'}), 404
+    g.outlet_id = outlet_id
+
+# Heavy routes get a bounded share of each worker's threads, see admission.py
+REPORT_ENDPOINTS = {'generate_pdf', 'get_bills_thermal_pdf', 'get_outlet_report'}
+ADMISSION_HISTORY_DAYS = int(os.environ.get('ADMISSION_HISTORY_DAYS', 31))
+
+def admission_pool():
+    if request.endpoint in REPORT_ENDPOINTS:
+        return 'reports'
+    if request.endpoint == 'kitchen_stream' or (request.endpoint == 'get_kitchen_queue' and 'since' in request.args):
+        return 'kitchen'
+    if request.endpoint == 'get_bills' and not request.args.get('limit'):
+        # Unpaged listings that reach back further than the recent window
+        try:
+            date_from = parse_ist_datetime(request.args['from']) if request.args.get('from') else None
+        except ValueError:
+            return None  # the view answers 400
+        if date_from is None or date_from < get_ist_time().replace(tzinfo=None) - timedelta(days=ADMISSION_HISTORY_DAYS):
+            return 'history'
+    return None
+
+admission = AdmissionControl(
+    app, admission_pool,
+    limits={
+        'reports': int(os.environ.get('ADMISSION_REPORT_LIMIT', 1)),
+        'history': int(os.environ.get('ADMISSION_HISTORY_LIMIT', 1)),
+        'kitchen': int(os.environ.get('ADMISSION_KITCHEN_LIMIT', 1)),
+    },
+    # Defaults to the thread count the Docker image starts gunicorn with
+    threads=int(os.environ.get('ADMISSION_THREADS') or os.environ.get('GUNICORN_THREADS') or 3),
+    reserved=int(os.environ.get('ADMISSION_POS_RESERVED_THREADS', 1)),
+    queue_seconds=float(os.environ.get('ADMISSION_QUEUE_SECONDS', 5)),
+    retry_after=int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', 10)),
+    # A kitchen screen waiting for a slot would hold a thread itself; it reconnects instead
+    pool_queue_seconds={'kitchen': 0},
+    # Screens hold their thread for the whole stream, so they get threads of their own
+    dedicated=('kitchen',)
+)
+
+# Serve React App from a manifest of the build, scanned once at startup
+static_assets = StaticAssets(STATIC_FOLDER)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
     # If path doesn't start with /api/, serve the React app
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
+    response = static_assets.send(path) if path else None
+    if response is not None:
+        return response
     elif path.startswith('api/'):
         # Let Flask handle API routes
         return jsonify({'error': 'API endpoint not found'}), 404
     else:
         # Serve index.html for React Router
-        return send_from_directory(app.static_folder, 'index.html')
+        return static_assets.send('index.html') or (jsonify({'error': 'Frontend build not found'}), 404)
 
 # API Routes
 @app.route('/api/health', methods=['GET'])
@@ -147,31 +817,45 @@ def health_check():
 # Menu endpoints
 @app.route('/api/menu', methods=['GET'])
 def get_menu():
+    try:
+        fields = MENU_FIELDS.parse(request.args.get('fields'), default=['id', 'name', 'description', 'price', 'category'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    columns = MENU_FIELDS.columns(fields)
+    query = db.session.query(*columns).filter(MenuItem.available == True)
     category = request.args.get('category')
     if category:
-        menu_items = MenuItem.query.filter_by(available=True, category=category).all()
-    else:
-        menu_items = MenuItem.query.filter_by(available=True).all()
-    return jsonify([{
-        'id': item.id,
-        'name': item.name,
-        'description': item.description,
-        'price': item.price,
-        'category': item.category
-    } for item in menu_items])
+        query = query.filter(MenuItem.category == category)
+    return json_response(MENU_FIELDS.serialize(query.all(), fields, columns))
+
+@app.route('/api/menu/search', methods=['GET'])
+def search_menu():
+    """Typo- and abbreviation-tolerant search over available items, served from memory."""
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    index = menu_search_for(g.outlet_id)
+    index.ensure_loaded(start_sync=True)
+    return json_response(index.search(request.args.get('q', ''), limit=limit, category=request.args.get('category')))
+
+@app.route('/api/menu/quick-keys', methods=['GET'])
+def get_quick_keys():
+    """Precomputed best sellers for the current (or ?slot=) time of day, overall and per category."""
+    slot = request.args.get('slot') or time_slot(get_ist_time().hour)
+    if slot != ALL_DAY and slot not in {name for name, _, _ in TIME_SLOTS}:
+        return jsonify({'error': f'Unknown slot: {slot}'}), 400
+    keys = quick_keys_for(g.outlet_id)
+    keys.ensure_loaded(start_sync=True)
+    return json_response(keys.get(slot))
 
 @app.route('/api/menu/all', methods=['GET'])
 def get_all_menu():
     """Return all menu items including unavailable ones (for admin management)."""
-    menu_items = MenuItem.query.all()
-    return jsonify([{
-        'id': item.id,
-        'name': item.name,
-        'description': item.description,
-        'price': item.price,
-        'category': item.category,
-        'available': item.available
-    } for item in menu_items])
+    try:
+        fields = MENU_FIELDS.parse(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    columns = MENU_FIELDS.columns(fields)
+    rows = db.session.query(*columns).select_from(MenuItem).all()
+    return json_response(MENU_FIELDS.serialize(rows, fields, columns))
 
 @app.route('/api/menu/categories', methods=['GET'])
 def get_menu_categories():
@@ -211,11 +895,12 @@ def add_menu_item():
     new_item = MenuItem(
         name=data['name'],
         description=data.get('description', ''),
-        price=data['price'],
+        price_paise=to_paise(data['price']),
         category=data.get('category', 'General')
     )
     db.session.add(new_item)
     db.session.commit()
+    after_commit(menu_search_for(g.outlet_id).refresh, new_item.id)
     return jsonify({'message': 'Menu item added successfully', 'id': new_item.id}), 201
 
 @app.route('/api/menu/<int:item_id>', methods=['PUT'])
@@ -227,12 +912,13 @@ def update_menu_item(item_id):
     if 'description' in data:
         item.description = data['description']
     if 'price' in data:
-        item.price = data['price']
+        item.price_paise = to_paise(data['price'])
     if 'category' in data:
         item.category = data['category']
     if 'available' in data:
         item.available = data['available']
     db.session.commit()
+    after_commit(menu_search_for(g.outlet_id).refresh, item.id)
     return jsonify({'message': 'Menu item updated successfully', 'id': item.id})
 
 @app.route('/api/menu/<int:item_id>', methods=['DELETE'])
@@ -244,21 +930,30 @@ def delete_menu_item(item_id):
         # Soft delete: mark as unavailable instead of deleting
         item.available = False
         db.session.commit()
+        after_commit(menu_search_for(g.outlet_id).refresh, item_id)
         return jsonify({'message': 'Menu item marked as unavailable (referenced by existing orders)'}), 200
     db.session.delete(item)
     db.session.commit()
+    after_commit(menu_search_for(g.outlet_id).refresh, item_id)
     return jsonify({'message': 'Menu item deleted successfully'}), 200
 
 # Table endpoints
 @app.route('/api/tables', methods=['GET'])
 def get_tables():
     tables = Table.query.all()
-    return jsonify([{
+    payload = [{
         'id': table.id,
         'number': table.number,
         'status': table.status,
         'current_order_id': table.current_order_id
-    } for table in tables])
+    } for table in tables]
+    table_board_for(g.outlet_id).update(payload)
+    # Tables taken by orders still waiting in the journal
+    opened = {state['table_id']: order_id for order_id, state in journaled_orders(g.outlet_id).items() if state['table_id']}
+    for entry in payload:
+        if entry['id'] in opened:
+            entry.update(status='occupied', current_order_id=opened[entry['id']])
+    return jsonify(payload)
 
 @app.route('/api/tables', methods=['POST'])
 def add_table():
@@ -270,111 +965,271 @@ def add_table():
     db.session.commit()
     return jsonify({'message': 'Table added successfully', 'id': new_table.id}), 201
 
+@app.route('/api/tables/<int:table_id>/status', methods=['PUT'])
+def update_table_status(table_id):
+    data = request.get_json()
+    try:
+        found = set_table_status(db.session, Table, table_id, data.get('status'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TableStateError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'current_order_id': e.current_order_id}), 409
+    if not found:
+        return jsonify({'error': 'Table not found'}), 404
+    db.session.commit()
+    return jsonify({'message': 'Table status updated successfully'})
+
 # Order endpoints
 @app.route('/api/orders', methods=['GET'])
+@replica_reads
 def get_orders():
-    orders = Order.query.all()
-    return jsonify([serialize_order(order) for order in orders])
+    try:
+        fields = ORDER_FIELDS.parse(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Journaled writes the replayer hasn't applied yet are merged in by id
+    journaled = journaled_orders(g.outlet_id)
+    columns = ORDER_FIELDS.columns(fields, extra=[Order.id] if 'items' in fields or journaled else ())
+    query = db.session.query(*columns).select_from(Order)
+    if 'table_number' in fields:
+        query = query.outerjoin(Table, Table.id == Order.table_id)
+    rows = query.order_by(Order.id).all()
+    payload = ORDER_FIELDS.serialize(rows, fields, columns)
+    if 'items' in fields or journaled:
+        id_index = ORDER_FIELDS.index_of(columns, Order.id)
+        order_ids = [row[id_index] for row in rows]
+    if 'items' in fields:
+        items = order_items_by_order(order_ids)
+        for order_id, entry in zip(order_ids, payload):
+            entry['items'] = items.get(order_id, [])
+    if journaled:
+        payload = overlay_journaled_orders(payload, order_ids, journaled, fields)
+    return json_response(payload)
 
-@app.route('/api/orders', methods=['POST'])
-def create_order():
-    data = request.get_json()
-    
-    # Create new order
-    new_order = Order(table_id=data['table_id'])
+def overlay_journaled_orders(payload, order_ids, journaled, fields):
+    """Replace or append the orders in a list that have journaled writes pending."""
+    existing = {order.id: order for order in Order.query.filter(Order.id.in_(list(journaled))).all()}
+    views = {}
+    for order_id, state in journaled.items():
+        view = journaled_order_view(order_id, state, existing.get(order_id))
+        if view is not None:
+            views[order_id] = {field: view[field] for field in fields}
+    merged = [views.pop(order_id, entry) for order_id, entry in zip(order_ids, payload)]
+    return merged + [views[order_id] for order_id in sorted(views)]
+
+def wanted_quantities(items):
+    """Requested quantity per menu item from an order's item list."""
+    wanted = {}
+    for item_data in items:
+        if 'menu_item_id' in item_data and 'quantity' in item_data:
+            menu_item_id = item_data['menu_item_id']
+            wanted[menu_item_id] = wanted.get(menu_item_id, 0) + int(item_data['quantity'])
+    return wanted
+
+def record_new_order(table_id, items, order_id=None, created_at=None):
+    """Add an order, its lines and the table change to the session. Returns (order, totals, kot_lines); the caller commits."""
+    new_order = Order(id=order_id, table_id=table_id, total_amount_paise=0, tax_rate=0.0)
+    if created_at is not None:
+        new_order.created_at = new_order.updated_at = created_at
     db.session.add(new_order)
     db.session.flush()  # Get the order ID
     
-    total_amount = 0
+    delta_paise = 0
+    kot_lines = []
     
     # Add order items
-    for item_data in data['items']:
+    for item_data in items:
         menu_item = db.session.get(MenuItem, item_data['menu_item_id'])
         if menu_item:
             order_item = OrderItem(
                 order_id=new_order.id,
                 menu_item_id=item_data['menu_item_id'],
                 quantity=item_data['quantity'],
-                price=menu_item.price
+                price_paise=menu_item.price_paise
             )
             db.session.add(order_item)
-            total_amount += menu_item.price * item_data['quantity']
+            delta_paise += line_amount(menu_item.price_paise, item_data['quantity'])
+            kot_lines.append(kot_line(menu_item, item_data['quantity']))
     
-    new_order.total_amount = total_amount
+    totals = adjust_order(new_order, delta_paise)
     
-    # Update table status
-    table = db.session.get(Table, data['table_id'])
-    if table:
-        table.status = 'occupied'
-        table.current_order_id = new_order.id
+    # Claim the table; raises TableStateError if another order got it first
+    occupy_table(db.session, Table, table_id, new_order.id)
+    return new_order, totals, kot_lines
+
+def record_order_items(order, items):
+    """Set the order's quantities to `items`. Returns (totals, kot_lines for added quantities); the caller commits."""
+    wanted = wanted_quantities(items)
+    
+    # Only touch lines whose quantity changed; unchanged lines keep their price
+    delta_paise = 0
+    kot_lines = []
+    existing = {}
+    for line in order.items:
+        existing.setdefault(line.menu_item_id, []).append(line)
+    for menu_item_id, lines in existing.items():
+        quantity = wanted.pop(menu_item_id, 0)
+        current = sum(line.quantity for line in lines)
+        if quantity == current:
+            continue
+        if quantity > current:
+            kot_lines.append(kot_line(lines[0].menu_item, quantity - current))
+        keep = lines[0]
+        for line in lines:
+            delta_paise -= line_amount(line.price_paise, line.quantity)
+            if line is not keep or quantity <= 0:
+                db.session.delete(line)
+        if quantity > 0:
+            keep.quantity = quantity
+            delta_paise += line_amount(keep.price_paise, quantity)
     
+    # Add lines for newly ordered items
+    for menu_item_id, quantity in wanted.items():
+        if quantity <= 0:
+            continue
+        menu_item = db.session.get(MenuItem, menu_item_id)
+        if menu_item:
+            order_item = OrderItem(
+                order_id=order.id,
+                menu_item_id=menu_item_id,
+                quantity=quantity,
+                price_paise=menu_item.price_paise
+            )
+            db.session.add(order_item)
+            delta_paise += line_amount(menu_item.price_paise, quantity)
+            kot_lines.append(kot_line(menu_item, quantity))
+    
+    return adjust_order(order, delta_paise), kot_lines
+
+@app.route('/api/orders', methods=['POST'])
+def create_order():
+    data = request.get_json()
+    
+    if journal_ready(g.outlet_id):
+        refused = journal_write_refused()
+        if refused:
+            return refused
+        # Answered from the journal and memory only. Turn away tables already
+        # taken; replay parks any order that still loses a race for its table
+        if data['table_id'] in {state['table_id'] for state in journaled_orders(g.outlet_id).values()}:
+            return jsonify({'error': f"Table {data['table_id']} already has an order waiting in the journal"}), 409
+        table = table_board_for(g.outlet_id).get(data['table_id'])
+        if table is not None and table['status'] == 'occupied':
+            return jsonify({
+                'error': f"Table {table['id']} is occupied by order {table['current_order_id']}",
+                'current_order_id': table['current_order_id']
+            }), 409
+        kot_lines = journaled_kot_lines(g.outlet_id, {}, wanted_quantities(data['items']))
+        # Acknowledge once the journal has it; the replayer writes it to the database
+        seq, order_id = order_journal.append(
+            database_outlet(g.outlet_id), 'create_order', {'table_id': data['table_id'], 'items': data['items'], 'kot': kot_lines},
+            accepted_at=get_ist_time().replace(tzinfo=None).isoformat()
+        )
+        journal_replayer.kick()
+        after_journal_append(order_id, kot_lines)
+        return jsonify({
+            'message': 'Order accepted',
+            'order_id': order_id,
+            'journal_seq': seq,
+            'pending': True
+        }), 202
+    
+    try:
+        new_order, totals, kot_lines = record_new_order(data['table_id'], data['items'])
+    except TableStateError as e:
+        # Another terminal opened this table first
+        db.session.rollback()
+        return jsonify({'error': str(e), 'current_order_id': e.current_order_id}), 409
     db.session.commit()
+    after_commit(after_order_write, new_order, kot_lines)
     
     return jsonify({
         'message': 'Order created successfully',
         'order_id': new_order.id,
-        'total_amount': total_amount
+        'total_amount': to_rupees(totals.subtotal_paise),
+        **totals_payload(totals)
     }), 201
 
 @app.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
+    journaled = journaled_orders(g.outlet_id, order_id)
+    if journaled:
+        # Read-your-writes for changes the replayer hasn't applied yet
+        view = journaled_order_view(order_id, journaled[order_id], db.session.get(Order, order_id))
+        if view is not None:
+            return jsonify(view)
     order = Order.query.get_or_404(order_id)
     return jsonify(serialize_order(order))
 
 @app.route('/api/orders/<int:order_id>', methods=['PUT'])
 def update_order(order_id):
     data = request.get_json()
-    print(f"Update order data received: {data}")
-    order = Order.query.get_or_404(order_id)
-    
-    # Clear existing order items
-    OrderItem.query.filter_by(order_id=order.id).delete()
+    log.debug('Update order data received', extra={'order_id': order_id, 'payload': data})
     
-    # Add new order items
-    total_amount = 0
-    for item_data in data['items']:
-        if 'menu_item_id' in item_data and 'quantity' in item_data:
-            menu_item = db.session.get(MenuItem, item_data['menu_item_id'])
-            if menu_item:
-                order_item = OrderItem(
-                    order_id=order.id,
-                    menu_item_id=item_data['menu_item_id'],
-                    quantity=item_data['quantity'],
-                    price=menu_item.price
-                )
-                db.session.add(order_item)
-                total_amount += menu_item.price * item_data['quantity']
+    if journal_ready(g.outlet_id):
+        refused = journal_write_refused()
+        if refused:
+            return refused
+        # Answered from the journal and memory only; replay reports any
+        # other missing or paid order as a conflict
+        journaled = journaled_orders(g.outlet_id, order_id).get(order_id)
+        if journaled is None and order_id > (order_journal.last_order_id(database_outlet(g.outlet_id)) or 0):
+            return jsonify({'error': 'Order not found'}), 404
+        ticket = kitchen_queue_for(g.outlet_id).ticket(order_id)
+        kot_lines = None
+        if journaled is not None and (journaled['table_id'] is not None or ticket is not None):
+            kot_lines = journaled_kot_lines(g.outlet_id, journaled['items'], wanted_quantities(data['items']))
+        elif journaled is None and ticket is not None:
+            kot_lines = journaled_kot_lines(g.outlet_id, wanted_quantities(ticket['items']), wanted_quantities(data['items']))
+        seq, _ = order_journal.append(
+            database_outlet(g.outlet_id), 'update_order', {'items': data['items'], 'kot': kot_lines}, order_id=order_id,
+            accepted_at=get_ist_time().replace(tzinfo=None).isoformat()
+        )
+        journal_replayer.kick()
+        after_journal_append(order_id, kot_lines, add_on=True)
+        return jsonify({'message': 'Order update accepted', 'order_id': order_id, 'journal_seq': seq, 'pending': True}), 202
     
-    order.total_amount = total_amount
+    order = Order.query.get_or_404(order_id)
+    totals, kot_lines = record_order_items(order, data['items'])
     db.session.commit()
+    after_commit(after_order_write, order, kot_lines, add_on=True)
     
-    return jsonify({'message': 'Order updated successfully'})
+    return jsonify({'message': 'Order updated successfully', **totals_payload(totals)})
 
 @app.route('/api/orders/<int:order_id>/status', methods=['PUT'])
 def update_order_status(order_id):
     data = request.get_json()
+    unsettled = settle_journal(order_id)
+    if unsettled:
+        return unsettled
     order = Order.query.get_or_404(order_id)
     order.status = data['status']
     
-    # Update additional fields if provided
+    # Tax and totals are priced here; client-sent tax_amount/final_total are ignored
     if 'tax_rate' in data:
-        order.tax_rate = data['tax_rate']
-    if 'tax_amount' in data:
-        order.tax_amount = data['tax_amount']
-    if 'final_total' in data:
-        order.final_total = round_half_up(data['final_total'])
+        adjust_order(order, tax_rate=data['tax_rate'])
     if 'payment_method' in data:
         order.payment_method = data['payment_method']
     
-    # If order is paid, update table status
+    # If order is paid, free its table (unless it has already been re-seated)
     if data['status'] == 'paid':
-        table = db.session.get(Table, order.table_id)
-        if table:
-            table.status = 'available'
-            table.current_order_id = None
+        release_table(db.session, Table, order.table_id, order.id)
     
     db.session.commit()
-    return jsonify({'message': 'Order status updated successfully'})
+    after_commit(after_order_write, order, [])
+    return jsonify({'message': 'Order status updated successfully', **totals_payload(order_totals(order))})
+
+@app.route('/api/orders/<int:order_id>/pricing', methods=['PUT'])
+def update_order_pricing(order_id):
+    data = request.get_json()
+    unsettled = settle_journal(order_id)
+    if unsettled:
+        return unsettled
+    order = Order.query.get_or_404(order_id)
+    adjust_order(order, tax_rate=data.get('tax_rate', 0))
+    db.session.commit()
+    return jsonify(serialize_order(order))
 
 @app.route('/api/bills', methods=['POST'])
 def create_bill():
@@ -384,56 +1239,366 @@ def create_bill():
         # Check if bill already exists for this order
         existing_bill = Bill.query.filter_by(order_id=data.get('order_id')).first()
         if existing_bill:
-            return jsonify({'message': 'Bill already exists for this order', 'bill_id': existing_bill.id})
+            return jsonify({
+                'message': 'Bill already exists for this order',
+                'bill_id': existing_bill.id,
+                'invoice_number': existing_bill.invoice_number,
+                'outlet': get_outlet_profile(existing_bill.outlet_id)
+            })
+        
+        unsettled = settle_journal(data.get('order_id'))
+        if unsettled:
+            return unsettled
+        order = db.session.get(Order, data.get('order_id'))
+        if not order:
+            return jsonify({'error': 'Order not found'}), 404
+        
+        outlet = get_outlet_profile(data.get('outlet_id'))
+        if not outlet:
+            return jsonify({'error': 'Outlet not found'}), 400
         
-        total = data.get('total')
-        if total is None:
-            total = data.get('subtotal', 0.0) + data.get('tax_amount', 0.0)
+        # Bill figures come from the order's stored totals, not the client; a different tax rate re-prices it
+        tax_rate = data.get('tax_rate')
+        if tax_rate is None or normalize_tax_rate(tax_rate) == normalize_tax_rate(order.tax_rate):
+            totals = order_totals(order)
+        else:
+            totals = price(order.total_amount_paise or 0, tax_rate)
 
         # Create bill record with IST time
+        bill_date = get_ist_time()
         new_bill = Bill(
             order_id=data.get('order_id'),
-            invoice_number=data.get('invoice_number'),
-            restaurant_name=data.get('restaurant_name', 'KHAN SAHAB RESTAURANT'),
-            address=data.get('address', '4, BANSAL NAGAR FATEHABAD ROAD AGRA'),
-            state=data.get('state', 'Uttar Pradesh'),
-            state_code=data.get('state_code', '09'),
-            phone=data.get('phone', '9319209322'),
-            gstin=data.get('gstin', '09AHDPA1039P2ZB'),
-            fssai=data.get('fssai', '12722001001504'),
-            place_of_supply=data.get('place_of_supply', 'Uttar Pradesh'),
-            subtotal=data.get('subtotal', 0.0),
-            tax_rate=data.get('tax_rate', 0.0),
-            tax_amount=data.get('tax_amount', 0.0),
-            total=round_half_up(total),
-            payment_method=data.get('payment_method', 'cash')
+            outlet_id=outlet['id'],
+            subtotal_paise=totals.subtotal_paise,
+            tax_rate=totals.tax_rate,
+            tax_amount_paise=totals.tax_paise,
+            total_paise=totals.total_paise,
+            payment_method=data.get('payment_method', 'cash'),
+            bill_date=bill_date,
+            created_at=bill_date
+        )
+        # Numbered last so the series row stays locked only until the commit
+        new_bill.invoice_number = allocate_invoice_number(
+            db.session, InvoiceSequence, bill_date, shared_database_outlet(outlet['id'])
         )
-        
         db.session.add(new_bill)
         db.session.commit()
+        after_commit(quick_keys_for(g.outlet_id).add_order, order.created_at.hour, [
+            (quick_key_item(line.menu_item.id, line.menu_item.name, line.menu_item.price_paise, line.menu_item.category), line.quantity)
+            for line in order.items if line.menu_item.available
+        ])
         
-        return jsonify({'message': 'Bill created successfully', 'bill_id': new_bill.id})
+        return jsonify({
+            'message': 'Bill created successfully',
+            'bill_id': new_bill.id,
+            'invoice_number': new_bill.invoice_number,
+            'outlet': outlet,
+            **totals_payload(totals)
+        })
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating bill: {e}")
+        log.exception('Error creating bill', extra={'order_id': (data or {}).get('order_id')})
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bills', methods=['GET'])
+@replica_reads
 def get_bills():
-    bills = Bill.query.order_by(Bill.created_at.desc()).all()
-    return jsonify([{
-        'id': bill.id,
-        'order_id': bill.order_id,
+    try:
+        fields = BILL_FIELDS.parse(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Optional bill_date window (from inclusive, to exclusive) and keyset page
+    try:
+        date_from = parse_ist_datetime(request.args['from']) if request.args.get('from') else None
+        date_to = parse_ist_datetime(request.args['to']) if request.args.get('to') else None
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = request.args.get('limit', type=int)
+    
+    columns = BILL_FIELDS.columns(fields, extra=[Bill.bill_date, Bill.id] if limit else ())
+    query = db.session.query(*columns).select_from(Bill)
+    if date_from:
+        query = query.filter(Bill.bill_date >= date_from)
+    if date_to:
+        query = query.filter(Bill.bill_date < date_to)
+    if cursor:
+        query = query.filter(tuple_(Bill.bill_date, Bill.id) < tuple_(*cursor))
+    query = query.order_by(Bill.bill_date.desc(), Bill.id.desc())
+    
+    if not limit:
+        return json_response(BILL_FIELDS.serialize(query.all(), fields, columns))
+    
+    limit = max(1, min(limit, 1000))
+    rows = query.limit(limit + 1).all()
+    response = json_response(BILL_FIELDS.serialize(rows[:limit], fields, columns))
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(
+            last[BILL_FIELDS.index_of(columns, Bill.bill_date)],
+            last[BILL_FIELDS.index_of(columns, Bill.id)]
+        )
+    return response
+
+# Batch reprints: many bills as one thermal PDF
+THERMAL_PDF_MAX_BILLS = int(os.environ.get('THERMAL_PDF_MAX_BILLS', 2000))
+thermal_pdf_renderer = BatchRenderer(max_workers=int(os.environ.get('THERMAL_PDF_WORKERS', 0)) or None)
+
+def thermal_bill_data(bill, table_number, items):
+    """A stored bill in the shape the printer's bill layout takes."""
+    return {
         'invoice_number': bill.invoice_number,
-        'restaurant_name': bill.restaurant_name,
-        'subtotal': bill.subtotal,
-        'tax_rate': bill.tax_rate,
-        'tax_amount': bill.tax_amount,
-        'total': bill.total,
-        'payment_method': bill.payment_method,
-        'bill_date': bill.bill_date.isoformat(),
-        'created_at': bill.created_at.isoformat()
-    } for bill in bills])
+        'date': bill.bill_date.strftime('%d/%m/%Y'),
+        'time': bill.bill_date.strftime('%I:%M %p').lower(),
+        'table_number': table_number,
+        'items': [{'name': item['menu_item_name'], 'qty': item['quantity'], 'price': item['price']} for item in items],
+        'subtotal': to_rupees(bill.subtotal_paise),
+        'tax_rate': bill.tax_rate or 0,
+        'tax_amount': to_rupees(bill.tax_amount_paise or 0),
+        'total': to_rupees(bill.total_paise)
+    }
+
+@app.route('/api/bills/thermal-pdf', methods=['GET'])
+@replica_reads
+def get_bills_thermal_pdf():
+    """Every bill in a bill_date window (?from=&to=) or listed in ?ids=1,2,3, one page each."""
+    query = db.session.query(Bill, Order.table_id, Table.number).join(
+        Order, Order.id == Bill.order_id
+    ).outerjoin(Table, Table.id == Order.table_id)
+    try:
+        if request.args.get('ids'):
+            query = query.filter(Bill.id.in_([int(bill_id) for bill_id in request.args['ids'].split(',')]))
+        elif request.args.get('from') or request.args.get('to'):
+            if request.args.get('from'):
+                query = query.filter(Bill.bill_date >= parse_ist_datetime(request.args['from']))
+            if request.args.get('to'):
+                query = query.filter(Bill.bill_date < parse_ist_datetime(request.args['to']))
+        else:
+            return jsonify({'error': 'Give a from/to date range or a list of bill ids'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows = query.order_by(Bill.bill_date, Bill.id).limit(THERMAL_PDF_MAX_BILLS + 1).all()
+    if not rows:
+        return jsonify({'error': 'No bills found'}), 404
+    if len(rows) > THERMAL_PDF_MAX_BILLS:
+        return jsonify({'error': f'More than {THERMAL_PDF_MAX_BILLS} bills; narrow the range'}), 400
+    
+    items = order_items_by_order([bill.order_id for bill, _, _ in rows])
+    bills = [
+        (thermal_bill_data(bill, table_id if number is None else number, items.get(bill.order_id, [])),
+         get_outlet_profile(bill.outlet_id))
+        for bill, table_id, number in rows
+    ]
+    db.session.rollback()  # release the connection while the pages render
+    
+    return send_file(
+        BytesIO(thermal_pdf_renderer.render(bills)),
+        as_attachment=True,
+        download_name=f"khan-sahab-bills-{get_ist_time().strftime('%Y%m%d_%H%M%S')}.pdf",
+        mimetype='application/pdf'
+    )
+
+# Several API calls in one request, optionally as one transaction (see batch.py)
+batch_runner = BatchRunner(app, db, max_requests=int(os.environ.get('BATCH_MAX_REQUESTS', 20)))
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    data = request.get_json(silent=True) or {}
+    try:
+        calls = batch_runner.parse(data.get('requests'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(batch_runner.run(calls, transaction=bool(data.get('transaction'))))
+
+# Kitchen display. Each open screen holds a request thread while it waits, so keep the holds short
+KITCHEN_POLL_SECONDS = float(os.environ.get('KITCHEN_POLL_SECONDS', 10))
+KITCHEN_STREAM_SECONDS = float(os.environ.get('KITCHEN_STREAM_SECONDS', 30))
+
+@app.route('/api/kitchen/queue', methods=['GET'])
+def get_kitchen_queue():
+    kitchen_queue = kitchen_queue_for(g.outlet_id)
+    kitchen_queue.ensure_loaded(start_sync=True)
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify(kitchen_queue.snapshot())
+    # Long-poll: hold the request until the queue changes or `wait` seconds pass
+    wait = max(0.0, min(request.args.get('wait', KITCHEN_POLL_SECONDS, type=float), KITCHEN_POLL_SECONDS))
+    return jsonify(kitchen_queue.wait(since, wait))
+
+@app.route('/api/kitchen/stream', methods=['GET'])
+def kitchen_stream():
+    kitchen_queue = kitchen_queue_for(g.outlet_id)
+    kitchen_queue.ensure_loaded(start_sync=True)
+    response = Response(
+        kitchen_queue.stream(duration=KITCHEN_STREAM_SECONDS),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Cross-outlet reports
+report_fan_out = OutletFanOut(
+    app,
+    max_workers=int(os.environ.get('REPORT_WORKERS', 4)),
+    timeout=float(os.environ.get('REPORT_TIMEOUT_SECONDS', 30)),
+    replica_reads=replica_reads
+)
+
+def outlet_sales(date_from, date_to, outlet_id):
+    """Bill totals for one outlet, in paise, by payment method."""
+    query = db.session.query(
+        Bill.payment_method, func.count(Bill.id), func.sum(Bill.subtotal_paise),
+        func.sum(Bill.tax_amount_paise), func.sum(Bill.total_paise)
+    ).filter(Bill.outlet_id == outlet_id)
+    if date_from:
+        query = query.filter(Bill.bill_date >= date_from)
+    if date_to:
+        query = query.filter(Bill.bill_date < date_to)
+    return {
+        method or 'unknown': [count, subtotal or 0, tax or 0, total or 0]
+        for method, count, subtotal, tax, total in query.group_by(Bill.payment_method)
+    }
+
+def sales_payload(by_method):
+    totals = [sum(values[i] for values in by_method.values()) for i in range(4)]
+    return {
+        'bills': totals[0],
+        'subtotal': to_rupees(totals[1]),
+        'tax_amount': to_rupees(totals[2]),
+        'total': to_rupees(totals[3]),
+        'payment_methods': {
+            method: {'bills': values[0], 'total': to_rupees(values[3])} for method, values in by_method.items()
+        }
+    }
+
+@app.route('/api/reports/outlets', methods=['GET'])
+@replica_reads
+def get_outlet_report():
+    try:
+        date_from = parse_ist_datetime(request.args['from']) if request.args.get('from') else None
+        date_to = parse_ist_datetime(request.args['to']) if request.args.get('to') else None
+        requested = request.args.get('outlet_ids')
+        outlet_ids = [int(value) for value in requested.split(',')] if requested else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    outlets = {outlet.id: outlet.name for outlet in Outlet.query.order_by(Outlet.id)}
+    if outlet_ids is None:
+        outlet_ids = list(outlets)
+    
+    # One query per outlet database, in parallel; merged here
+    results, errors = report_fan_out(outlet_ids, partial(outlet_sales, date_from, date_to))
+    merged = {}
+    report = []
+    for outlet_id in outlet_ids:
+        entry = {'outlet_id': outlet_id, 'name': outlets.get(outlet_id)}
+        if outlet_id in errors:
+            entry['error'] = errors[outlet_id]
+        else:
+            entry.update(sales_payload(results[outlet_id]))
+            for method, values in results[outlet_id].items():
+                merged[method] = [a + b for a, b in zip(merged.get(method, [0, 0, 0, 0]), values)]
+        report.append(entry)
+    return jsonify({'outlets': report, 'combined': sales_payload(merged)})
+
+# Outlet profiles
+@app.route('/api/outlets', methods=['GET'])
+def get_outlets():
+    return jsonify([serialize_outlet(outlet) for outlet in Outlet.query.order_by(Outlet.id)])
+
+@app.route('/api/outlets/<int:outlet_id>', methods=['GET'])
+def get_outlet(outlet_id):
+    profile = get_outlet_profile(outlet_id)
+    if not profile:
+        return jsonify({'error': 'Outlet not found'}), 404
+    return jsonify(profile)
+
+@app.route('/api/outlets', methods=['POST'])
+def add_outlet():
+    data = request.get_json()
+    if not data.get('name'):
+        return jsonify({'error': 'Outlet name is required'}), 400
+    outlet = Outlet(**{field: data.get(field) for field in OUTLET_PROFILE_FIELDS})
+    db.session.add(outlet)
+    db.session.commit()
+    return jsonify(serialize_outlet(outlet)), 201
+
+@app.route('/api/outlets/<int:outlet_id>', methods=['PUT'])
+def update_outlet(outlet_id):
+    data = request.get_json()
+    outlet = Outlet.query.get_or_404(outlet_id)
+    for field in OUTLET_PROFILE_FIELDS:
+        if field in data:
+            setattr(outlet, field, data[field])
+    db.session.commit()
+    _outlet_cache.pop(outlet_id, None)
+    return jsonify(serialize_outlet(outlet))
+
+# Admin endpoints
+@app.route('/api/admin/slow-queries', methods=['GET'])
+def get_slow_queries():
+    limit = request.args.get('limit', 100, type=int)
+    result = slow_query_log.query(
+        limit=max(1, min(limit, 1000)),
+        endpoint=request.args.get('endpoint'),
+        min_duration_ms=request.args.get('min_ms', type=float),
+        statement_id=request.args.get('statement_id')
+    )
+    return jsonify(result)
+
+@app.route('/api/admin/maintenance', methods=['GET'])
+def get_maintenance():
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify(db_maintenance.status(limit=max(1, min(limit, 365))))
+
+@app.route('/api/admin/maintenance', methods=['POST'])
+def run_maintenance():
+    data = request.get_json(silent=True) or {}
+    try:
+        tasks = parse_tasks(data['tasks']) if data.get('tasks') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # VACUUM can outlast a request timeout, so the run continues in the background
+    if not db_maintenance.run_in_background(tasks):
+        return jsonify({'error': 'Database maintenance is already running'}), 409
+    return jsonify({'message': 'Database maintenance started', 'tasks': tasks or db_maintenance.tasks}), 202
+
+@app.route('/api/admin/admission', methods=['GET'])
+def get_admission_stats():
+    return jsonify(admission.stats())
+
+@app.route('/api/admin/journal', methods=['GET'])
+def get_journal():
+    journal = active_journal()
+    if journal is None:
+        return jsonify({'error': 'Order journal is not enabled'}), 404
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({
+        'counts': journal.counts(),
+        'entries': journal.entries(status=request.args.get('status'), limit=max(1, min(limit, 1000)))
+    })
+
+@app.route('/api/admin/journal/<int:seq>/retry', methods=['POST'])
+def retry_journal_entry(seq):
+    journal = active_journal()
+    if journal is None:
+        return jsonify({'error': 'Order journal is not enabled'}), 404
+    if not journal.requeue(seq):
+        return jsonify({'error': 'No conflicting journal entry with that sequence number'}), 404
+    journal_replayer.kick()
+    return jsonify({'message': 'Journal entry queued for replay'})
+
+@app.route('/api/admin/journal/<int:seq>/discard', methods=['POST'])
+def discard_journal_entry(seq):
+    journal = active_journal()
+    if journal is None:
+        return jsonify({'error': 'Order journal is not enabled'}), 404
+    if not journal.discard(seq):
+        return jsonify({'error': 'No unapplied journal entry with that sequence number'}), 404
+    return jsonify({'message': 'Journal entry discarded'})
 
 @app.route('/api/print-bill', methods=['POST'])
 def print_bill_endpoint():
@@ -450,8 +1615,11 @@ def print_bill_endpoint():
         # Remove printer config from bill data
         bill_data = {k: v for k, v in data.items() if k != 'printer'}
         
+        # Header details come from the outlet profile
+        outlet = get_outlet_profile(bill_data.get('outlet_id'))
+        
         # Use restaurant format for bills
-        success = print_bill(bill_data, printer_config, bill_format='restaurant')
+        success = print_bill(bill_data, printer_config, bill_format='restaurant', outlet=outlet)
         
         if success:
             return jsonify({'success': True, 'message': 'Restaurant bill printed successfully'})
@@ -459,12 +1627,13 @@ def print_bill_endpoint():
             return jsonify({'success': False, 'message': 'Failed to print bill'}), 500
             
     except Exception as e:
+        log.exception('Error printing bill', extra={'invoice_number': (data or {}).get('invoice_number')})
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/generate-pdf', methods=['POST'])
 def generate_pdf():
     data = request.get_json()
-    print(f"Received PDF data: {data}")
+    log.debug('Received PDF data', extra={'payload': data})
     
     try:
         # Create PDF in memory
@@ -570,16 +1739,56 @@ def generate_pdf():
         )
         
     except Exception as e:
-        print(f"Error generating PDF: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception('Error generating PDF')
         return jsonify({'error': str(e)}), 500
 
 # Initialize database with sample data
 def init_db():
+    # The default database, then every branch with its own database
+    init_outlet_db(None)
+    for outlet_id in OUTLET_DATABASES:
+        init_outlet_db(outlet_id)
+
+def init_outlet_db(outlet_id):
     with app.app_context():
+        g.outlet_id = outlet_id
+        engine = db.engines[outlet_bind_key(outlet_id)] if outlet_id is not None else db.engine
         # Only create tables if they don't exist (never drop existing data)
-        db.create_all()
+        db.metadata.create_all(engine)
+        # create_all() skips indexes on tables that already exist
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+        # Older databases still store money as float rupees
+        converted = migrate_money_columns(engine)
+        if converted:
+            print(f"Converted money columns to paise: {', '.join(converted)}")
+        # ...and copy the restaurant details onto every bill
+        outlets = migrate_bill_outlets(engine)
+        if outlets:
+            print(f"Moved bill restaurant details into {outlets} outlet profile(s)")
+        if outlet_id is None:
+            if Outlet.query.first() is None:
+                db.session.add(Outlet(**DEFAULT_OUTLET))
+                db.session.commit()
+        else:
+            # The registry lives in the default database; the branch keeps a
+            # copy of its own row so its bills' outlet_id foreign key holds.
+            profile = get_outlet_profile(outlet_id)
+            if profile is None:
+                db.session.add(Outlet(id=outlet_id, **DEFAULT_OUTLET))
+                if db.engine.dialect.name == 'postgresql':
+                    # An explicit id doesn't advance the serial sequence
+                    db.session.flush()
+                    db.session.execute(text(
+                        "SELECT setval(pg_get_serial_sequence('outlet', 'id'), (SELECT MAX(id) FROM outlet))"
+                    ))
+                db.session.commit()
+                print(f"Registered outlet {outlet_id}; set its details with PUT /api/outlets/{outlet_id}")
+                profile = get_outlet_profile(outlet_id)
+            with engine.begin() as conn:
+                if conn.execute(db.select(Outlet.id).where(Outlet.id == outlet_id)).first() is None:
+                    conn.execute(Outlet.__table__.insert(), profile)
 
         # Only seed menu items if the table is empty
         if MenuItem.query.first() is not None:
@@ -729,7 +1938,12 @@ def init_db():
         ]
         
         for item_data in menu_items:
-            item = MenuItem(**item_data)
+            item = MenuItem(
+                name=item_data['name'],
+                description=item_data['description'],
+                price_paise=to_paise(item_data['price']),
+                category=item_data['category']
+            )
             db.session.add(item)
         
         # Add sample tables (without capacity field)
@@ -0,0 +1,132 @@
+"""
+Multiplexed API requests.
+
+POST /api/batch runs several API calls in one HTTP request:
+
+    {"requests": [{"method": "GET", "path": "/api/tables"},
+                  {"method": "GET", "path": "/api/orders", "headers": {"X-Read-Your-Writes": "1"}},
+                  {"method": "PUT", "path": "/api/orders/7/status", "body": {"status": "paid"}}],
+     "transaction": false}
+
+Each call goes through its route's normal view, in order, inside the
+batch's application context. The calls therefore share one database session
+and connection checkout. Responses come back in the same order as
+{"status": ..., "body": ...}. The batch's X-Outlet-Id and X-Request-Id
+headers apply to every call.
+
+With "transaction": true, commits made by the views only flush, and the
+batch commits once after the last call. If any call fails (status 400 or
+above), everything is rolled back and the remaining calls are skipped
+(status 424). Side effects that must only follow committed data, such as
+kitchen tickets, are registered with after_commit(). In a transaction they
+run once the batch commits.
+"""
+from urllib.parse import urlsplit
+
+from flask import g, has_app_context, request
+from werkzeug.test import EnvironBuilder
+
+from outlet_routing import READ_YOUR_WRITES_HEADER
+from structured_log import REQUEST_ID_HEADER, get_logger
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+FORWARDED_HEADERS = ('X-Outlet-Id', REQUEST_ID_HEADER, READ_YOUR_WRITES_HEADER)
+SKIPPED = {'status': 424, 'body': {'error': 'Not run because an earlier request in the batch failed'}}
+
+log = get_logger('batch')
+
+
+def after_commit(callback, *args, **kwargs):
+    """Run a post-commit side effect now, or after the enclosing transactional batch commits."""
+    if has_app_context() and g.get('hold_commits'):
+        g.batch_commit_callbacks.append((callback, args, kwargs))
+    else:
+        callback(*args, **kwargs)
+
+
+class BatchRunner:
+    def __init__(self, app, db, max_requests=20):
+        self.app = app
+        self.db = db
+        self.max_requests = max_requests
+
+    def parse(self, calls):
+        """Validated (method, path, body, headers) tuples; raises ValueError."""
+        if not isinstance(calls, list) or not calls:
+            raise ValueError('requests must be a non-empty list')
+        if len(calls) > self.max_requests:
+            raise ValueError(f'A batch can hold at most {self.max_requests} requests')
+        parsed = []
+        for index, call in enumerate(calls):
+            if not isinstance(call, dict):
+                raise ValueError(f'Request {index} must be an object')
+            method = str(call.get('method', 'GET')).upper()
+            path = call.get('path')
+            if method not in METHODS:
+                raise ValueError(f'Request {index}: unsupported method {method}')
+            if not isinstance(path, str) or not path.startswith('/api/') or urlsplit(path).path == '/api/batch':
+                raise ValueError(f'Request {index}: path must be an API route other than /api/batch')
+            headers = call.get('headers') or {}
+            if not isinstance(headers, dict):
+                raise ValueError(f'Request {index}: headers must be an object')
+            parsed.append((method, path, call.get('body'), {str(k): str(v) for k, v in headers.items()}))
+        return parsed
+
+    def run(self, calls, transaction=False):
+        shared_headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        if transaction:
+            # Later calls must read the batch's own uncommitted writes, so never from the replica
+            shared_headers[READ_YOUR_WRITES_HEADER] = '1'
+            g.hold_commits = True
+            g.batch_commit_callbacks = []
+        responses = []
+        try:
+            for method, path, body, headers in calls:
+                if transaction and responses and responses[-1]['status'] >= 400:
+                    responses.append(SKIPPED)
+                    continue
+                responses.append(self._dispatch(method, path, body, {**shared_headers, **headers}))
+        finally:
+            g.hold_commits = False
+        if not transaction:
+            return {'responses': responses}
+
+        failed = any(response['status'] >= 400 for response in responses)
+        if failed:
+            self.db.session.rollback()
+            return {'responses': responses, 'committed': False}
+        try:
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            log.exception('Batch transaction failed to commit')
+            return {'responses': responses, 'committed': False, 'error': str(e)}
+        for callback, args, kwargs in g.batch_commit_callbacks:
+            callback(*args, **kwargs)
+        return {'responses': responses, 'committed': True}
+
+    def _dispatch(self, method, path, body, headers):
+        url = urlsplit(path)
+        builder = EnvironBuilder(path=url.path, query_string=url.query, method=method, headers=headers, json=body)
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+        # Reuses the batch's app context, so g and the database session are shared
+        with self.app.request_context(environ):
+            try:
+                response = self.app.full_dispatch_request()
+            except Exception:
+                log.exception('Batch request failed', extra={'batch_method': method, 'batch_path': path})
+                self.db.session.rollback()
+                return {'status': 500, 'body': {'error': 'Internal server error'}}
+        try:
+            # Error responses from abort() are iterator-backed too, so only event streams and files count as streams
+            if response.mimetype == 'text/event-stream' or response.direct_passthrough:
+                return {'status': 400, 'body': {'error': f'{path} streams its response and cannot be batched'}}
+            body = response.get_json(silent=True)
+            if body is None and not response.is_json:
+                body = response.get_data(as_text=True) or None
+            return {'status': response.status_code, 'body': body}
+        finally:
+            response.close()
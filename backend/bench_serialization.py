@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Serialization and wire-size benchmark for list payloads.
+
+Builds a deterministic /api/bills-shaped payload (10k bills by default) and
+reports encode time for Flask's jsonify, the stdlib fallback and orjson,
+plus the gzip and brotli wire sizes and compression times, as JSON.
+
+    python bench_serialization.py --bills 10000 --repeat 5
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify
+
+import responses
+
+
+def make_bills(count, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 4, 1, 12, 0)
+    bills = []
+    for bill_id in range(count, 0, -1):
+        subtotal = rng.randint(2, 80) * 5000
+        tax_rate = rng.choice((0.0, 0.05))
+        tax = subtotal * tax_rate
+        created = start + timedelta(minutes=bill_id * 7)
+        bills.append({
+            'id': bill_id,
+            'order_id': bill_id,
+            'invoice_number': str(bill_id),
+            'restaurant_name': 'KHAN SAHAB RESTAURANT',
+            'subtotal': subtotal / 100,
+            'tax_rate': tax_rate,
+            'tax_amount': tax / 100,
+            'total': round((subtotal + tax) / 1000) * 10.0,
+            'payment_method': rng.choice(('cash', 'card', 'digital')),
+            'bill_date': created.isoformat(),
+            'created_at': created.isoformat(),
+        })
+    return bills
+
+
+def best_of(repeat, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 3), result
+
+
+def run(count, repeat, seed):
+    payload = make_bills(count, seed)
+    app = Flask(__name__)
+    results = {
+        'meta': {
+            'bills': count,
+            'repeat': repeat,
+            'seed': seed,
+            'python': sys.version.split()[0],
+            'orjson': responses.orjson is not None,
+            'brotli': responses.brotli is not None,
+        },
+        'encode_ms': {},
+        'wire_bytes': {},
+        'compress_ms': {},
+    }
+
+    with app.app_context():
+        elapsed, body = best_of(repeat, lambda: jsonify(payload).get_data())
+    results['encode_ms']['flask_jsonify'] = elapsed
+    results['wire_bytes']['flask_jsonify'] = len(body)
+
+    elapsed, body = best_of(
+        repeat, lambda: json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    )
+    results['encode_ms']['stdlib_compact'] = elapsed
+    if responses.orjson is not None:
+        elapsed, body = best_of(repeat, lambda: responses.orjson.dumps(payload))
+        results['encode_ms']['orjson'] = elapsed
+    raw = responses.dumps(payload)
+    results['wire_bytes']['identity'] = len(raw)
+
+    for level in (1, 6):
+        elapsed, compressed = best_of(repeat, lambda: responses.gzip_compress(raw, level))
+        results['compress_ms'][f'gzip_{level}'] = elapsed
+        results['wire_bytes'][f'gzip_{level}'] = len(compressed)
+    if responses.brotli is not None:
+        for quality in (4, 11):
+            elapsed, compressed = best_of(repeat, lambda: responses.brotli_compress(raw, quality))
+            results['compress_ms'][f'brotli_{quality}'] = elapsed
+            results['wire_bytes'][f'brotli_{quality}'] = len(compressed)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding and compression of bill lists.')
+    parser.add_argument('--bills', type=int, default=10000, help='Bills in the payload.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is reported.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the payload.')
+    args = parser.parse_args()
+    json.dump(run(args.bills, args.repeat, args.seed), sys.stdout, indent=2)
+    sys.stdout.write('\n')
@@ -0,0 +1,308 @@
+"""
+Scheduled database maintenance.
+
+Runs housekeeping on every database the app writes to (DATABASE_URL and each
+outlet in OUTLET_DATABASES; never the read replica), task by task:
+
+    integrity   PRAGMA integrity_check (SQLite; Postgres has no built-in check)
+    analyze     ANALYZE, so the query planner has fresh statistics
+    vacuum      VACUUM; on SQLite this rewrites the file and returns free pages
+    checkpoint  PRAGMA wal_checkpoint(TRUNCATE) (SQLite in WAL mode; Postgres checkpoints on its own)
+
+With DB_MAINTENANCE_TIME set, each worker runs a small scheduler thread. Once
+a day, inside the window that starts at that IST time, the first worker to
+take the lock file runs the tasks. The others see that today's run is
+recorded and skip it. Every run is appended to a JSON-lines history with
+per-task durations and the size of each database before and after.
+
+    python db_maintenance.py                       # run all tasks now
+    python db_maintenance.py --tasks analyze,vacuum
+    python db_maintenance.py --history 5           # show recent runs
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from file_lock import open_lock_file, try_lock
+from structured_log import get_logger
+
+TASKS = ('integrity', 'analyze', 'vacuum', 'checkpoint')
+IST = timezone(timedelta(hours=5, minutes=30))
+CHECK_INTERVAL_SECONDS = 60
+MAX_INTEGRITY_ERRORS = 20
+
+log = get_logger('maintenance')
+
+
+def parse_tasks(value):
+    """Task names from a list or comma-separated string, in run order; raises ValueError for unknown ones."""
+    if value is None:
+        return list(TASKS)
+    names = [name.strip().lower() for name in (value.split(',') if isinstance(value, str) else value)]
+    names = [name for name in names if name]
+    unknown = sorted(set(names) - set(TASKS))
+    if unknown:
+        raise ValueError(f"Unknown maintenance tasks: {', '.join(unknown)} (expected {', '.join(TASKS)})")
+    return [task for task in TASKS if task in names]
+
+
+def parse_time(value):
+    """(hour, minute) from "HH:MM"; raises ValueError."""
+    hour, minute = (int(part) for part in value.strip().split(':'))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f'Invalid DB_MAINTENANCE_TIME: {value!r} (expected HH:MM)')
+    return hour, minute
+
+
+def database_size(conn):
+    """Bytes on disk for the connection's database, or None if it can't be measured."""
+    if conn.dialect.name == 'sqlite':
+        path = conn.engine.url.database
+        if not path or path == ':memory:' or not os.path.exists(path):
+            return None
+        return sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+    if conn.dialect.name == 'postgresql':
+        return conn.execute(text('SELECT pg_database_size(current_database())')).scalar()
+    return None
+
+
+def run_task(conn, task):
+    """Run one task on an autocommit connection. Returns a detail dict, or None if the backend has no equivalent."""
+    dialect = conn.dialect.name
+    if task == 'integrity':
+        if dialect != 'sqlite':
+            return None
+        problems = [row[0] for row in conn.execute(text('PRAGMA integrity_check'))]
+        ok = problems == ['ok']
+        if not ok:
+            log.warning('Integrity check failed', extra={'problems': problems[:MAX_INTEGRITY_ERRORS]})
+        return {'ok': ok, 'problems': [] if ok else problems[:MAX_INTEGRITY_ERRORS]}
+    if task == 'analyze':
+        conn.execute(text('ANALYZE'))
+        return {}
+    if task == 'vacuum':
+        if dialect == 'sqlite':
+            free_pages = conn.execute(text('PRAGMA freelist_count')).scalar()
+            conn.execute(text('VACUUM'))
+            return {'free_pages': free_pages}
+        conn.execute(text('VACUUM'))
+        return {}
+    if task == 'checkpoint':
+        # Postgres's CHECKPOINT needs superuser or pg_checkpoint, and its checkpointer runs anyway
+        if dialect != 'sqlite' or conn.execute(text('PRAGMA journal_mode')).scalar().lower() != 'wal':
+            return None
+        busy, wal_pages, checkpointed = conn.execute(text('PRAGMA wal_checkpoint(TRUNCATE)')).first()
+        return {'busy': bool(busy), 'wal_pages': wal_pages, 'checkpointed_pages': checkpointed}
+    raise ValueError(f'Unknown maintenance task: {task}')
+
+
+def maintain(engine, tasks):
+    """Run `tasks` on one database; a failing task is recorded and the rest still run."""
+    report = {'dialect': engine.dialect.name, 'tasks': []}
+    # VACUUM can't run inside a transaction
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        report['size_before'] = database_size(conn)
+        for task in tasks:
+            started = time.perf_counter()
+            result = {'task': task}
+            try:
+                detail = run_task(conn, task)
+                if detail is None:
+                    result['skipped'] = f'not applicable to {engine.dialect.name}'
+                else:
+                    result.update(detail)
+            except Exception as e:
+                log.warning('Maintenance task failed', extra={'task': task, 'error': str(e)})
+                result['error'] = str(e)
+            result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            report['tasks'].append(result)
+        report['size_after'] = database_size(conn)
+    if report['size_before'] is not None and report['size_after'] is not None:
+        report['reclaimed_bytes'] = report['size_before'] - report['size_after']
+    return report
+
+
+class DatabaseMaintenance:
+    def __init__(self, app=None, db=None, exclude_binds=()):
+        self.engines = {}
+        self.tasks = list(TASKS)
+        self.schedule = None
+        self.window_minutes = 120
+        self.history_path = None
+        self._running = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        if app is not None and db is not None:
+            self.init_app(app, db, exclude_binds)
+
+    def init_app(self, app, db, exclude_binds=()):
+        self.tasks = parse_tasks(os.environ.get('DB_MAINTENANCE_TASKS') or None)
+        scheduled = os.environ.get('DB_MAINTENANCE_TIME')
+        self.schedule = parse_time(scheduled) if scheduled else None
+        self.window_minutes = int(os.environ.get('DB_MAINTENANCE_WINDOW_MINUTES', 120))
+        self.history_path = os.environ.get('DB_MAINTENANCE_LOG_FILE') or os.path.join(
+            app.instance_path, 'db_maintenance.log'
+        )
+        with app.app_context():
+            self.engines = {
+                key or 'default': engine for key, engine in db.engines.items() if key not in exclude_binds
+            }
+        app.extensions['db_maintenance'] = self
+        if self.schedule is not None:
+            app.before_request(self.start)
+
+    def start(self):
+        """Start this worker's scheduler thread (once)."""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._schedule_loop, daemon=True, name='db-maintenance')
+                    self._thread.start()
+
+    def _schedule_loop(self):
+        while True:
+            time.sleep(CHECK_INTERVAL_SECONDS)
+            try:
+                window_start = self.window_start(datetime.now(IST))
+                if window_start is not None and not self.ran_since(window_start):
+                    self.run(trigger='schedule', since=window_start)
+            except Exception as e:
+                log.error('Scheduled maintenance failed', extra={'error': str(e)})
+
+    def window_start(self, now):
+        """Start of the maintenance window `now` falls in, or None outside the window."""
+        hour, minute = self.schedule
+        start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if start > now:
+            start -= timedelta(days=1)  # a window that runs past midnight
+        return start if now < start + timedelta(minutes=self.window_minutes) else None
+
+    def ran_since(self, moment):
+        return any(
+            datetime.fromisoformat(entry['started_at']) >= moment
+            for entry in self.history(limit=10) if entry.get('trigger') == 'schedule'
+        )
+
+    @property
+    def running(self):
+        """Whether this or another worker is running maintenance right now."""
+        if self._running.locked():
+            return True
+        lock_path = self.history_path + '.lock'
+        if not os.path.exists(lock_path):
+            return False
+        with open_lock_file(lock_path) as lock_file:
+            return not try_lock(lock_file)
+
+    def run(self, tasks=None, trigger='manual', since=None):
+        """
+        Run the tasks on every database and record the run. Returns the run's
+        record, or None if another thread or worker is already running
+        maintenance (or, with `since`, already ran after that moment).
+        """
+        tasks = self.tasks if tasks is None else tasks
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.history_path)), exist_ok=True)
+            with open_lock_file(self.history_path + '.lock') as lock_file:
+                if not try_lock(lock_file):
+                    return None
+                # Another worker may have finished the scheduled run while we waited for our turn
+                if since is not None and self.ran_since(since):
+                    return None
+                return self._run_locked(tasks, trigger)
+        finally:
+            self._running.release()
+
+    def _run_locked(self, tasks, trigger):
+        started_at = datetime.now(IST)
+        started = time.perf_counter()
+        log.info('Database maintenance started', extra={'tasks': tasks, 'trigger': trigger})
+        databases = {}
+        for name, engine in self.engines.items():
+            try:
+                databases[name] = maintain(engine, tasks)
+            except Exception as e:
+                log.error('Database maintenance failed', extra={'database': name, 'error': str(e)})
+                databases[name] = {'dialect': engine.dialect.name, 'error': str(e)}
+        entry = {
+            'started_at': started_at.isoformat(),
+            'trigger': trigger,
+            'tasks': tasks,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            'reclaimed_bytes': sum(report.get('reclaimed_bytes') or 0 for report in databases.values()),
+            'databases': databases,
+        }
+        with open(self.history_path, 'a', encoding='utf-8') as history_file:
+            history_file.write(json.dumps(entry, default=str) + '\n')
+        log.info('Database maintenance finished', extra={
+            'duration_ms': entry['duration_ms'], 'reclaimed_bytes': entry['reclaimed_bytes']
+        })
+        return entry
+
+    def run_in_background(self, tasks=None):
+        """Start a manual run on its own thread. False if maintenance is already running."""
+        if self.running:
+            return False
+        threading.Thread(target=self.run, args=(tasks,), daemon=True, name='db-maintenance-run').start()
+        return True
+
+    def history(self, limit=20):
+        """The most recent runs, newest first."""
+        if not self.history_path or not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path, encoding='utf-8') as history_file:
+            lines = history_file.readlines()
+        entries = []
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def status(self, limit=20):
+        schedule = None
+        if self.schedule is not None:
+            schedule = {
+                'time': '%02d:%02d' % self.schedule,
+                'timezone': 'IST',
+                'window_minutes': self.window_minutes,
+            }
+        return {
+            'schedule': schedule,
+            'tasks': self.tasks,
+            'databases': sorted(self.engines),
+            'running': self.running,
+            'runs': self.history(limit),
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run database maintenance on DATABASE_URL and every outlet database.')
+    parser.add_argument('--tasks', help=f"Comma-separated subset of {','.join(TASKS)} (default: DB_MAINTENANCE_TASKS or all)")
+    parser.add_argument('--history', type=int, metavar='N', help='Print the last N recorded runs instead of running')
+    args = parser.parse_args()
+
+    from app import db_maintenance
+
+    if args.history:
+        print(json.dumps(db_maintenance.history(args.history), indent=2))
+        raise SystemExit(0)
+    try:
+        selected = parse_tasks(args.tasks) if args.tasks else None
+    except ValueError as e:
+        raise SystemExit(str(e))
+    result = db_maintenance.run(selected, trigger='cli')
+    if result is None:
+        raise SystemExit('Database maintenance is already running')
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,16 @@
+"""Typed environment settings; an unset or empty variable falls back to the default."""
+import os
+
+
+def env_float(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return float(value)
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return int(value)
@@ -0,0 +1,68 @@
+"""
+Sparse fieldsets for list endpoints.
+
+An endpoint declares each key it can emit as a Field: the columns it needs
+and how to turn those column values into the JSON value. A request such as
+``?fields=id,total`` then selects only those columns at the SQL level and
+emits only those keys, without hydrating ORM objects.
+"""
+
+
+class Field:
+    def __init__(self, *columns, build=None):
+        self.columns = columns
+        # Called with the selected values of `columns`; defaults to the single value.
+        self.build = build
+
+
+class FieldSet:
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def parse(self, raw, default=None):
+        """Requested field names from a comma-separated ?fields= value, else the default (all fields)."""
+        if not raw:
+            return list(default or self.fields)
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.fields)}"
+            )
+        return names
+
+    def columns(self, names, extra=()):
+        """Distinct columns needed for the given fields, plus any extra columns the caller needs."""
+        selected = {}
+        for name in names:
+            for column in self.fields[name].columns:
+                selected.setdefault(id(column), column)
+        for column in extra:
+            selected.setdefault(id(column), column)
+        return list(selected.values())
+
+    @staticmethod
+    def index_of(columns, column):
+        for index, candidate in enumerate(columns):
+            if candidate is column:
+                return index
+        raise KeyError(column)
+
+    def serialize(self, rows, names, columns):
+        """Turn result tuples into dicts holding just the requested keys."""
+        plan = []
+        for name in names:
+            field = self.fields[name]
+            indexes = [self.index_of(columns, column) for column in field.columns]
+            plan.append((name, indexes, field.build))
+
+        payload = []
+        for row in rows:
+            entry = {}
+            for name, indexes, build in plan:
+                if build is None:
+                    entry[name] = row[indexes[0]] if indexes else None
+                else:
+                    entry[name] = build(*[row[index] for index in indexes])
+            payload.append(entry)
+        return payload
@@ -0,0 +1,35 @@
+"""
+Cross-process lock files.
+
+Several workers share one lock file and whichever locks it first does the
+work. flock() is used where it exists, and msvcrt byte-range locks on
+Windows. Either way the lock belongs to the open file and is released when
+the file is closed.
+"""
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def open_lock_file(path):
+    # Byte-range locks on Windows need a byte at offset 0 to lock
+    lock_file = open(path, 'a+')
+    if fcntl is None and lock_file.tell() == 0:
+        lock_file.write('\n')
+        lock_file.flush()
+    return lock_file
+
+
+def try_lock(lock_file):
+    """Lock an open lock file exclusively without waiting. False if another holder has it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
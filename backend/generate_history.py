@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Synthetic trading history for capacity testing.
+
+Generates paid orders, order items and bills with a realistic lunch/dinner
+time-of-day curve, busier weekends and a menu mix skewed towards breads,
+biryani and drinks. Rows are written with bulk executemany inserts in large
+batches, and the same --seed always produces the same history so benchmark
+runs are comparable.
+
+    python generate_history.py --database sqlite:////tmp/history.db --days 365
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+OPEN_MINUTE = 11 * 60
+CLOSE_MINUTE = 23 * 60 + 30
+
+# (weight, mean minute of day, standard deviation in minutes)
+SERVICE_PEAKS = [
+    (0.35, 13 * 60 + 30, 60),
+    (0.55, 20 * 60 + 45, 75),
+]
+
+# Relative popularity of a line coming from each category.
+CATEGORY_WEIGHTS = {
+    'Indian Breads': 30,
+    'Beverages': 18,
+    'Rice & Biryani': 14,
+    'Khan Sahab Spl. Chicken': 9,
+    'Khan Sahab Veg Special': 8,
+    'Khan Sahab Spl. Mutton': 6,
+    'Non-Veg Starters': 6,
+    'Veg Starters': 4,
+    'Khan Sahab Spl. Chinese': 5,
+    'Salad / Papad': 5,
+    'Dessert': 3,
+    'Soups': 2,
+}
+DEFAULT_CATEGORY_WEIGHT = 2
+
+# Fixed so that the same arguments always generate the same history
+DEFAULT_END_DATE = date(2026, 3, 31)
+
+# Monday == 0
+WEEKDAY_FACTORS = [0.8, 0.8, 0.85, 0.9, 1.1, 1.4, 1.45]
+
+
+def minute_of_day(rng):
+    """Sample an order time from the lunch/dinner mixture, within opening hours."""
+    while True:
+        pick = rng.random()
+        for weight, mean, sd in SERVICE_PEAKS:
+            if pick < weight:
+                minute = rng.gauss(mean, sd)
+                break
+            pick -= weight
+        else:
+            minute = rng.uniform(OPEN_MINUTE, CLOSE_MINUTE)
+        if OPEN_MINUTE <= minute < CLOSE_MINUTE:
+            return int(minute)
+
+
+class MenuMix:
+    """Weighted sampler over menu items: category weight times a Zipf-like rank weight."""
+
+    def __init__(self, items):
+        by_category = {}
+        for item in items:
+            by_category.setdefault(item['category'] or 'General', []).append(item)
+
+        self.items = []
+        cumulative = []
+        running = 0.0
+        for category, members in sorted(by_category.items()):
+            category_weight = CATEGORY_WEIGHTS.get(category, DEFAULT_CATEGORY_WEIGHT)
+            rank_weights = [1.0 / (rank + 1) for rank in range(len(members))]
+            scale = category_weight / sum(rank_weights)
+            for item, rank_weight in zip(sorted(members, key=lambda m: m['id']), rank_weights):
+                running += rank_weight * scale
+                self.items.append(item)
+                cumulative.append(running)
+        self.cumulative = cumulative
+        self.total = running
+
+    def sample(self, rng):
+        target = rng.random() * self.total
+        low, high = 0, len(self.cumulative) - 1
+        while low < high:
+            mid = (low + high) // 2
+            if self.cumulative[mid] < target:
+                low = mid + 1
+            else:
+                high = mid
+        return self.items[low]
+
+
+def quantity_for(item, rng):
+    if item['category'] == 'Indian Breads':
+        return rng.randint(2, 6)
+    if item['category'] == 'Beverages':
+        return rng.randint(1, 4)
+    return 1 if rng.random() < 0.8 else 2
+
+
+@contextmanager
+def bulk_load_settings(engine):
+    """Trade durability for speed on SQLite while generating, then restore the database's own settings."""
+    if engine.dialect.name != 'sqlite':
+        yield
+        return
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+        synchronous = conn.exec_driver_sql('PRAGMA synchronous').scalar()
+        conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        conn.exec_driver_sql('PRAGMA synchronous=OFF')
+    try:
+        yield
+    finally:
+        # Leaving WAL needs the only connection to the file, so close the pooled ones first
+        engine.dispose()
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f'PRAGMA synchronous={synchronous}')
+            conn.exec_driver_sql(f'PRAGMA journal_mode={journal_mode}')
+
+
+def generate(app_module, days, end_date, orders_per_day, seed, batch_size):
+    from sqlalchemy import func
+    from money import round_bill_total, tax_paise
+    from invoices import format_invoice_number, invoice_series
+
+    app = app_module.app
+    db = app_module.db
+    MenuItem, Table, Order, OrderItem, Bill = (
+        app_module.MenuItem, app_module.Table, app_module.Order, app_module.OrderItem, app_module.Bill
+    )
+    InvoiceSequence, Outlet = app_module.InvoiceSequence, app_module.Outlet
+
+    rng = random.Random(seed)
+    with app.app_context():
+        db.create_all()
+        menu = [
+            {'id': item.id, 'price_paise': item.price_paise, 'category': item.category}
+            for item in MenuItem.query.filter_by(available=True).order_by(MenuItem.id)
+        ]
+        table_ids = [table.id for table in Table.query.order_by(Table.id)]
+        outlet = Outlet.query.order_by(Outlet.id).first()
+        if not menu or not table_ids or outlet is None:
+            raise RuntimeError('Menu, tables or outlets are empty; run init_db() first.')
+        outlet_id = outlet.id
+        series_outlet = None if outlet_id == app_module.DEFAULT_OUTLET_ID else outlet_id
+        mix = MenuMix(menu)
+        prices = {item['id']: item['price_paise'] for item in menu}
+
+        next_order_id = (db.session.query(func.max(Order.id)).scalar() or 0) + 1
+        next_item_id = (db.session.query(func.max(OrderItem.id)).scalar() or 0) + 1
+        next_bill_id = (db.session.query(func.max(Bill.id)).scalar() or 0) + 1
+        # Continue each financial year's invoice series where it stands
+        next_invoice = {row.series: row.next_number for row in InvoiceSequence.query}
+        db.session.close()
+
+        engine = db.engine
+        with bulk_load_settings(engine):
+            order_rows, item_rows, bill_rows = [], [], []
+            counts = {'orders': 0, 'order_items': 0, 'bills': 0}
+
+            def flush():
+                with engine.begin() as conn:
+                    if order_rows:
+                        conn.execute(Order.__table__.insert(), order_rows)
+                    if item_rows:
+                        conn.execute(OrderItem.__table__.insert(), item_rows)
+                    if bill_rows:
+                        conn.execute(Bill.__table__.insert(), bill_rows)
+                counts['orders'] += len(order_rows)
+                counts['order_items'] += len(item_rows)
+                counts['bills'] += len(bill_rows)
+                order_rows.clear()
+                item_rows.clear()
+                bill_rows.clear()
+
+            start_day = end_date - timedelta(days=days - 1)
+            for day_offset in range(days):
+                day = start_day + timedelta(days=day_offset)
+                expected = orders_per_day * WEEKDAY_FACTORS[day.weekday()]
+                # Day-to-day noise around the weekday average.
+                day_orders = max(0, int(round(rng.gauss(expected, math.sqrt(expected) * 2))))
+                minutes = sorted(minute_of_day(rng) for _ in range(day_orders))
+                for minute in minutes:
+                    created_at = datetime(day.year, day.month, day.day) + timedelta(
+                        minutes=minute, seconds=rng.randint(0, 59)
+                    )
+                    paid_at = created_at + timedelta(minutes=rng.randint(25, 90))
+                    series = invoice_series(paid_at, series_outlet)
+                    invoice = next_invoice.get(series, 1)
+                    next_invoice[series] = invoice + 1
+                    order_id = next_order_id
+                    next_order_id += 1
+
+                    subtotal = 0
+                    lines = {}
+                    for _ in range(rng.randint(2, 8)):
+                        item = mix.sample(rng)
+                        lines[item['id']] = lines.get(item['id'], 0) + quantity_for(item, rng)
+                    for menu_item_id, quantity in lines.items():
+                        price = prices[menu_item_id]
+                        item_rows.append({
+                            'id': next_item_id,
+                            'order_id': order_id,
+                            'menu_item_id': menu_item_id,
+                            'quantity': quantity,
+                            'price_paise': price,
+                        })
+                        next_item_id += 1
+                        subtotal += price * quantity
+
+                    tax_rate = 0.05 if rng.random() < 0.4 else 0.0
+                    tax_amount = tax_paise(subtotal, tax_rate)
+                    total = round_bill_total(subtotal + tax_amount)
+                    payment_method = rng.choices(('cash', 'card', 'digital'), weights=(45, 20, 35))[0]
+
+                    order_rows.append({
+                        'id': order_id,
+                        'table_id': rng.choice(table_ids),
+                        'total_amount_paise': subtotal,
+                        'status': 'paid',
+                        'tax_rate': tax_rate,
+                        'tax_amount_paise': tax_amount,
+                        'final_total_paise': total,
+                        'payment_method': payment_method,
+                        'created_at': created_at,
+                        'updated_at': paid_at,
+                    })
+                    bill_rows.append({
+                        'id': next_bill_id,
+                        'order_id': order_id,
+                        'invoice_number': format_invoice_number(series, invoice),
+                        'outlet_id': outlet_id,
+                        'subtotal_paise': subtotal,
+                        'tax_rate': tax_rate,
+                        'tax_amount_paise': tax_amount,
+                        'total_paise': total,
+                        'payment_method': payment_method,
+                        'bill_date': paid_at,
+                        'created_at': paid_at,
+                    })
+                    next_bill_id += 1
+
+                    if len(order_rows) >= batch_size:
+                        flush()
+            flush()
+
+            for series, next_number in next_invoice.items():
+                db.session.merge(InvoiceSequence(series=series, next_number=next_number))
+            db.session.commit()
+
+        if engine.dialect.name == 'postgresql':
+            # Explicit ids were inserted, so move the serial sequences past them.
+            from migrate_sqlite_to_database import reset_postgres_sequences
+
+            reset_postgres_sequences()
+            db.session.commit()
+
+        with engine.begin() as conn:
+            # Refresh planner statistics after the bulk load.
+            conn.exec_driver_sql('ANALYZE')
+        return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic order and bill history.')
+    parser.add_argument('--database', default=None, help='Target database URL (defaults to DATABASE_URL / the app default).')
+    parser.add_argument('--days', type=int, default=365, help='Days of trading history to generate.')
+    parser.add_argument(
+        '--end-date', type=date.fromisoformat, default=DEFAULT_END_DATE,
+        help=f'Last trading day, YYYY-MM-DD (default {DEFAULT_END_DATE}).'
+    )
+    parser.add_argument('--orders-per-day', type=float, default=350, help='Average orders on a mid-week day.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same history.')
+    parser.add_argument('--batch-size', type=int, default=20000, help='Orders per bulk insert transaction.')
+    args = parser.parse_args()
+
+    if args.database:
+        # The app reads its configuration at import time.
+        os.environ['DATABASE_URL'] = args.database
+    sys.path.insert(0, BASE_DIR)
+    import app as app_module
+
+    app_module.init_db()
+    started = time.perf_counter()
+    counts = generate(app_module, args.days, args.end_date, args.orders_per_day, args.seed, args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Generated {counts['orders']} orders, {counts['order_items']} order items and "
+        f"{counts['bills']} bills in {elapsed:.1f}s "
+        f"({counts['orders'] / elapsed if elapsed else 0:.0f} orders/s)."
+    )
@@ -0,0 +1,58 @@
+"""
+GST invoice numbering.
+
+Invoices are numbered in one series per Indian financial year (April to
+March), e.g. 2025-26/00001, 2025-26/00002, ... Every database numbers the
+bills of the outlet it belongs to in that plain series. An outlet without a
+database of its own shares the default one, so its series also carries its
+id, e.g. 2/2025-26/00001, and each outlet's numbers stay consecutive. Each
+series is a single counter row. A number is taken by incrementing that row
+inside the bill's own transaction, so a rolled-back bill gives its number
+back and the series has no gaps. The row lock is held only from the
+increment to the commit, so callers should allocate as the last step before
+committing.
+"""
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+
+def financial_year(when):
+    """Series name for a date: '2025-26' for 1 Apr 2025 to 31 Mar 2026."""
+    start = when.year if when.month >= 4 else when.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def invoice_series(when, outlet_id=None):
+    """Series for `when`'s financial year; `outlet_id` for an outlet sharing another outlet's database."""
+    year = financial_year(when)
+    return year if outlet_id is None else f"{outlet_id}/{year}"
+
+
+def format_invoice_number(series, number):
+    return f"{series}/{number:05d}"
+
+
+def allocate_invoice_number(session, sequence_model, when, outlet_id=None):
+    """
+    Take the next invoice number in invoice_series(when, outlet_id) in the
+    current transaction. The caller commits (keeping the number) or rolls
+    back (releasing it).
+    """
+    series = invoice_series(when, outlet_id)
+    bump = update(sequence_model).where(sequence_model.series == series).values(
+        next_number=sequence_model.next_number + 1
+    )
+    # The UPDATE takes the row lock first, so concurrent checkouts queue
+    # here and each reads back its own number below.
+    if session.execute(bump).rowcount == 0:
+        try:
+            with session.begin_nested():
+                session.add(sequence_model(series=series, next_number=2))
+            return format_invoice_number(series, 1)
+        except IntegrityError:
+            # Another checkout started the series first
+            session.execute(bump)
+    next_number = session.execute(
+        select(sequence_model.next_number).where(sequence_model.series == series)
+    ).scalar_one()
+    return format_invoice_number(series, next_number - 1)
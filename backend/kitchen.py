@@ -0,0 +1,147 @@
+"""
+Kitchen display queue.
+
+Keeps the open kitchen tickets (orders that are pending or preparing) in
+memory, oldest first, so the kitchen screen never has to read the order
+history. The queue is loaded from the database on first use, updated by the
+order endpoints as they commit, and periodically re-synced so tickets
+written by other worker processes show up too.
+
+Readers either long-poll for a newer version or hold an SSE stream.
+"""
+import bisect
+import json
+import threading
+import time
+
+from structured_log import get_logger
+
+ACTIVE_STATUSES = ('pending', 'preparing')
+
+log = get_logger('kitchen')
+
+
+class KitchenQueue:
+    def __init__(self, loader=None, sync_seconds=2.0):
+        # loader(order_ids=None) -> list of ticket dicts for active orders
+        self.loader = loader
+        self.sync_seconds = sync_seconds
+        self.version = 0
+        self._tickets = {}
+        self._order = []  # sorted (created_at, order_id) keys
+        self._loaded = False
+        self._sync_thread = None
+        self._changed = threading.Condition()
+
+    @staticmethod
+    def _key(ticket):
+        return (ticket['created_at'], ticket['order_id'])
+
+    def ensure_loaded(self, start_sync=False):
+        if not self._loaded:
+            self.rebuild()
+        if start_sync and self.sync_seconds > 0 and self._sync_thread is None:
+            with self._changed:
+                if self._sync_thread is None:
+                    self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+                    self._sync_thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_seconds)
+            try:
+                self.rebuild()
+            except Exception as e:
+                log.warning('Kitchen queue sync failed', extra={'error': str(e)})
+
+    def rebuild(self):
+        """Replace the queue with the active orders from the database."""
+        tickets = {ticket['order_id']: ticket for ticket in self.loader()}
+        with self._changed:
+            self._loaded = True
+            if tickets == self._tickets:
+                return
+            self._tickets = tickets
+            self._order = sorted(self._key(ticket) for ticket in tickets.values())
+            self._bump()
+
+    def refresh(self, order_id):
+        """Reload one order after a write and publish it, or drop it once it leaves the kitchen."""
+        self.ensure_loaded()
+        tickets = self.loader([order_id])
+        with self._changed:
+            if tickets:
+                self._put(tickets[0])
+            else:
+                self._discard(order_id)
+
+    def ticket(self, order_id):
+        """The order's ticket as the kitchen sees it now, or None."""
+        with self._changed:
+            return self._tickets.get(order_id)
+
+    def put(self, ticket):
+        """Publish a ticket built elsewhere, e.g. from an order write still waiting in the journal."""
+        with self._changed:
+            self._put(ticket)
+
+    def _put(self, ticket):
+        previous = self._tickets.get(ticket['order_id'])
+        if previous == ticket:
+            return
+        if previous is not None:
+            self._order.remove(self._key(previous))
+        self._tickets[ticket['order_id']] = ticket
+        bisect.insort(self._order, self._key(ticket))
+        self._bump()
+
+    def _discard(self, order_id):
+        previous = self._tickets.pop(order_id, None)
+        if previous is not None:
+            self._order.remove(self._key(previous))
+            self._bump()
+
+    def _bump(self):
+        # Callers hold self._changed
+        self.version += 1
+        self._changed.notify_all()
+
+    def snapshot(self):
+        with self._changed:
+            return {
+                'version': self.version,
+                'orders': [self._tickets[order_id] for _, order_id in self._order],
+            }
+
+    def wait(self, since, timeout):
+        """
+        Block until the queue version differs from `since` or the timeout
+        passes, then return a snapshot. Versions are per process, so any
+        difference (not just a higher number) counts as a change.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self.version == since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self.snapshot()
+
+    def stream(self, duration=30, heartbeat=15):
+        """
+        Server-sent events: the current queue, then one `queue` event per change.
+
+        The stream ends after `duration` seconds so it doesn't pin a worker
+        thread forever; EventSource reconnects on its own.
+        """
+        deadline = time.monotonic() + duration
+        last_version = None
+        yield 'retry: 1000\n\n'
+        while time.monotonic() < deadline:
+            snapshot = self.wait(last_version, min(heartbeat, max(0, deadline - time.monotonic())))
+            if snapshot['version'] != last_version:
+                last_version = snapshot['version']
+                yield f'id: {last_version}\nevent: queue\ndata: {json.dumps(snapshot)}\n\n'
+            else:
+                yield ': keep-alive\n\n'
@@ -0,0 +1,142 @@
+"""
+Kitchen order tickets (KOTs).
+
+When items are added to an order, the new lines are split by station using
+the menu category (see station_config.py) and each station's ticket is sent
+as raw ESC/POS to its network printer on port 9100. Every station has its
+own single-threaded sender, so tickets reach a station in order and a slow
+or offline printer only holds up its own queue.
+
+Run this module directly to print a sample order to local fake printers:
+
+    python kot.py
+"""
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from structured_log import get_logger
+
+ESC_INIT = b'\x1b@'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+GS_DOUBLE_SIZE = b'\x1d!\x11'
+GS_NORMAL_SIZE = b'\x1d!\x00'
+GS_FEED_AND_CUT = b'\x1dVB\x03'
+LINE_WIDTH = 42
+
+log = get_logger('kot')
+
+
+def route_lines(lines, stations, default_station):
+    """Group ticket lines by station, keeping each station's lines in order."""
+    by_category = {}
+    for name, station in stations.items():
+        for category in station.get('categories', ()):
+            by_category[category.lower()] = name
+
+    routed = {}
+    for line in lines:
+        station = by_category.get((line.get('category') or '').lower(), default_station)
+        routed.setdefault(station, []).append(line)
+    return routed
+
+
+def format_ticket(station, order_id, table_number, lines, printed_at, add_on=False):
+    """ESC/POS bytes for one station's ticket."""
+    def text(value):
+        return str(value).encode('ascii', 'replace')
+
+    out = [ESC_INIT, GS_DOUBLE_SIZE, text(f'KOT {station.upper()}'), b'\n', GS_NORMAL_SIZE]
+    if add_on:
+        out += [ESC_BOLD_ON, b'** ADD-ON **\n', ESC_BOLD_OFF]
+    out += [
+        text(f'Table {table_number}'.ljust(LINE_WIDTH - 12) + f'Order #{order_id}'.rjust(12)), b'\n',
+        text(printed_at.strftime('%d/%m/%Y %I:%M %p')), b'\n',
+        b'-' * LINE_WIDTH, b'\n',
+        ESC_BOLD_ON,
+    ]
+    for line in lines:
+        out += [text(f"{line['quantity']:>3} x {line['name']}"[:LINE_WIDTH]), b'\n']
+    out += [ESC_BOLD_OFF, b'-' * LINE_WIDTH, b'\n', GS_FEED_AND_CUT]
+    return b''.join(out)
+
+
+def send_to_printer(host, port, data, timeout):
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall(data)
+
+
+class KOTDispatcher:
+    def __init__(self, stations, default_station, timeout=3, retries=1):
+        self.stations = stations
+        self.default_station = default_station
+        self.timeout = timeout
+        self.retries = retries
+        self._senders = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'kot-{name}')
+            for name in stations
+        }
+
+    def dispatch(self, order_id, table_number, lines, printed_at, add_on=False):
+        """
+        Queue one ticket per station for the given new lines and return
+        {station: future} without waiting for the printers.
+        """
+        futures = {}
+        for station, station_lines in route_lines(lines, self.stations, self.default_station).items():
+            if station not in self.stations:
+                log.warning('No printer configured for KOT station', extra={'station': station, 'order_id': order_id})
+                continue
+            data = format_ticket(station, order_id, table_number, station_lines, printed_at, add_on)
+            futures[station] = self._senders[station].submit(self._send, station, order_id, data)
+        return futures
+
+    def _send(self, station, order_id, data):
+        printer = self.stations[station]
+        for attempt in range(self.retries + 1):
+            try:
+                send_to_printer(printer['host'], printer['port'], data, self.timeout)
+                return True
+            except OSError as e:
+                error = e
+        log.error('KOT print failed', extra={
+            'order_id': order_id, 'station': station, 'host': printer['host'], 'port': printer['port'], 'error': str(error)
+        })
+        return False
+
+
+if __name__ == '__main__':
+    from datetime import datetime
+
+    from station_config import KOT_DEFAULT_STATION, KOT_STATIONS
+    from tests.fake_printer import FakePrinter
+
+    # Same routing as the real config, but every station is a local fake printer
+    # and the tandoor printer is switched off.
+    printers = {name: FakePrinter() for name in KOT_STATIONS}
+    stations = {
+        name: {**config, 'host': '127.0.0.1', 'port': printers[name].port}
+        for name, config in KOT_STATIONS.items()
+    }
+    # A bound socket that isn't listening refuses connections like a powered-off printer
+    switched_off = socket.socket()
+    switched_off.bind(('127.0.0.1', 0))
+    stations['tandoor']['port'] = switched_off.getsockname()[1]
+    dispatcher = KOTDispatcher(stations, KOT_DEFAULT_STATION)
+
+    sample_lines = [
+        {'name': 'Butter Naan', 'category': 'Indian Breads', 'quantity': 4},
+        {'name': 'Chicken Chilli', 'category': 'Khan Sahab Spl. Chinese', 'quantity': 1},
+        {'name': 'Mint Mojito', 'category': 'Beverages', 'quantity': 2},
+        {'name': 'Dal Makhani', 'category': 'Khan Sahab Veg Special', 'quantity': 1},
+    ]
+    started = time.monotonic()
+    futures = dispatcher.dispatch(17, 5, sample_lines, datetime.now())
+    print(f'dispatch returned after {(time.monotonic() - started) * 1000:.1f}ms')
+    for station, future in futures.items():
+        printed = future.result()
+        print(f"\n{station}: {'printed' if printed else 'FAILED'}")
+        for received_at, data in printers[station].wait_for(1 if printed else 0):
+            print(f'{len(data)} bytes after {(received_at - started) * 1000:.1f}ms')
+            print(data.decode('ascii', 'replace'))
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Dinner-rush load test.
+
+Starts the Flask app on a throwaway SQLite database, then drives it over HTTP
+with N simulated terminals running the same flows the POS screens do:
+open a table, POST /api/orders, repeated PUT /api/orders/<id>, status
+changes, payment and POST /api/bills, with periodic dashboard reads.
+
+Throughput and p50/p95/p99 latency per endpoint are written as JSON so runs
+can be compared across commits:
+
+    python loadtest.py --terminals 8 --flows 50 --output results.json
+    python loadtest.py --terminals 8 --flows 50 --compare results.json
+
+With --batch the terminals send the payment and bill as one transactional
+POST /api/batch and the dashboard reads as another, as the POS screens do.
+Those calls are then timed as "POST /api/batch", so compare batched runs
+only with other batched runs.
+
+The table-race scenario checks table occupancy under contention. In each
+round, the even-numbered terminals all open the same table at the same
+moment, and the odd-numbered terminals open their own tables. Exactly one
+order per table must succeed, with the rest refused with 409, and each
+table must point at its winning order. Any violation is reported under
+"failures":
+
+    python loadtest.py --scenario table-race --terminals 8 --flows 20
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# Requests are grouped by route so that /api/orders/1 and /api/orders/2 share a bucket.
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, key, elapsed_ms, ok):
+        with self.lock:
+            self.samples.setdefault(key, []).append(elapsed_ms)
+            if not ok:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def summary(self, wall_seconds):
+        endpoints = {}
+        total = 0
+        total_errors = 0
+        for key in sorted(self.samples):
+            values = sorted(self.samples[key])
+            errors = self.errors.get(key, 0)
+            total += len(values)
+            total_errors += errors
+            endpoints[key] = {
+                'count': len(values),
+                'errors': errors,
+                'throughput_rps': round(len(values) / wall_seconds, 2),
+                'mean_ms': round(sum(values) / len(values), 3),
+                'p50_ms': round(percentile(values, 50), 3),
+                'p95_ms': round(percentile(values, 95), 3),
+                'p99_ms': round(percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3),
+            }
+        return {
+            'requests': total,
+            'errors': total_errors,
+            'wall_seconds': round(wall_seconds, 3),
+            'throughput_rps': round(total / wall_seconds, 2) if wall_seconds else None,
+        }, endpoints
+
+
+def last_day():
+    return (datetime.now(timezone.utc) - timedelta(days=1)).isoformat().replace('+00:00', 'Z')
+
+
+class Terminal:
+    """One POS terminal with its own keep-alive connection and random stream."""
+
+    def __init__(self, host, port, recorder, rng, batch=False):
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.rng = rng
+        self.batch = batch
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.last_status = None
+
+    def call(self, method, path, payload=None, expected=(), headers=None):
+        body = None
+        headers = dict(headers or {})
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        key = f"{method} {ID_SEGMENT.sub('/<id>', path.split('?', 1)[0])}"
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            raw = response.read()
+            status = response.status
+        except (http.client.HTTPException, OSError):
+            # The dev server may close idle keep-alive sockets; reconnect once.
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            raw = response.read()
+            status = response.status
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.last_status = status
+        self.recorder.record(key, elapsed_ms, status < 400 or status in expected)
+        if raw and response.getheader('Content-Type', '').startswith('application/json'):
+            return json.loads(raw)
+        return None
+
+    def dashboard(self):
+        # Same five reads MainPage.fetchData issues
+        requests = [
+            {'method': 'GET', 'path': '/api/menu/all'},
+            {'method': 'GET', 'path': '/api/tables'},
+            {'method': 'GET', 'path': '/api/orders', 'headers': {'X-Read-Your-Writes': '1'}},
+            {'method': 'GET', 'path': '/api/menu/categories'},
+            # The dashboard's default "last day" bill window
+            {'method': 'GET', 'path': '/api/bills?' + urlencode({'from': last_day()})},
+        ]
+        if not self.batch:
+            for request in requests:
+                self.call(request['method'], request['path'], headers=request.get('headers'))
+            return
+        result = self.call('POST', '/api/batch', {'requests': requests})
+        statuses = [response['status'] for response in result['responses']]
+        if any(status >= 400 for status in statuses):
+            raise RuntimeError(f'dashboard batch returned {statuses}')
+
+    def dinner_flow(self, table_id, menu_ids, edits):
+        rng = self.rng
+        self.call('GET', '/api/tables')
+        self.call('GET', '/api/menu')
+
+        lines = {}
+        for menu_item_id in rng.sample(menu_ids, rng.randint(1, 4)):
+            lines[menu_item_id] = rng.randint(1, 3)
+        created = self.call('POST', '/api/orders', {
+            'table_id': table_id,
+            'items': [{'menu_item_id': k, 'quantity': v} for k, v in lines.items()],
+        })
+        order_id = created['order_id']
+
+        for _ in range(edits):
+            menu_item_id = rng.choice(menu_ids)
+            lines[menu_item_id] = lines.get(menu_item_id, 0) + rng.randint(1, 2)
+            self.call('PUT', f'/api/orders/{order_id}', {
+                'items': [{'menu_item_id': k, 'quantity': v} for k, v in lines.items()],
+            })
+
+        for status in ('preparing', 'ready', 'served'):
+            self.call('PUT', f'/api/orders/{order_id}/status', {'status': status})
+
+        order = self.call('GET', f'/api/orders/{order_id}')
+        subtotal = order['total_amount']
+        tax_rate = rng.choice((0, 5))
+        tax = subtotal * tax_rate / 100
+        payment_method = rng.choice(('cash', 'card', 'digital'))
+        requests = [
+            {'method': 'PUT', 'path': f'/api/orders/{order_id}/status', 'body': {
+                'status': 'paid',
+                'tax_rate': tax_rate,
+                'tax_amount': tax,
+                'final_total': subtotal + tax,
+                'payment_method': payment_method,
+            }},
+            {'method': 'POST', 'path': '/api/bills', 'body': {
+                'order_id': order_id,
+                'tax_rate': tax_rate / 100,
+                'payment_method': payment_method,
+            }},
+        ]
+        if not self.batch:
+            for request in requests:
+                self.call(request['method'], request['path'], request['body'])
+            return
+        # PaymentPage marks the order paid and saves the bill as one transaction
+        result = self.call('POST', '/api/batch', {'transaction': True, 'requests': requests})
+        if not result['committed']:
+            raise RuntimeError(f"payment batch for order {order_id} rolled back: {result['responses']}")
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(flask_app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True, request_handler=KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='khan-sahab-loadtest-')
+    db_path = args.database or os.path.join(workdir, 'loadtest.db')
+    # The app reads its configuration at import time.
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(db_path)}'
+    os.environ.setdefault('SLOW_QUERY_LOG_FILE', os.path.join(workdir, 'slow_queries.log'))
+    sys.path.insert(0, BASE_DIR)
+    import app as app_module
+
+    quiet = open(os.devnull, 'w') if not args.verbose else None
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        app_module.init_db()
+        with app_module.app.app_context():
+            menu_ids = [item.id for item in app_module.MenuItem.query.filter_by(available=True)]
+            existing = app_module.Table.query.count()
+            next_number = max([t.number for t in app_module.Table.query.all()] or [0]) + 1
+            for offset in range(max(0, args.terminals - existing)):
+                app_module.db.session.add(app_module.Table(number=next_number + offset))
+            app_module.db.session.commit()
+            table_ids = [t.id for t in app_module.Table.query.order_by(app_module.Table.id)]
+
+        server = start_server(app_module.app)
+        recorder = Recorder()
+        failures = []
+        barrier = threading.Barrier(args.terminals, timeout=60)
+        opened = {}
+        opened_lock = threading.Lock()
+
+        def race_rounds(terminal, index):
+            # Even terminals contend for the first table; odd ones each open their own
+            table_id = table_ids[0] if index % 2 == 0 else table_ids[index]
+            for round_number in range(args.flows):
+                barrier.wait()
+                created = terminal.call('POST', '/api/orders', {
+                    'table_id': table_id,
+                    'items': [{'menu_item_id': menu_ids[0], 'quantity': 1}],
+                }, expected=(409,))
+                order_id = created['order_id'] if terminal.last_status == 201 else None
+                if order_id:
+                    with opened_lock:
+                        opened.setdefault(round_number, {}).setdefault(table_id, []).append(order_id)
+                barrier.wait()
+                if index == 0:
+                    tables = {table['id']: table for table in terminal.call('GET', '/api/tables')}
+                    for round_table in {table_ids[0]} | {table_ids[i] for i in range(1, args.terminals, 2)}:
+                        winners = opened.get(round_number, {}).get(round_table, [])
+                        if len(winners) != 1:
+                            failures.append(f'round {round_number}: table {round_table} opened by orders {winners}')
+                        elif tables[round_table]['current_order_id'] != winners[0]:
+                            failures.append(
+                                f'round {round_number}: table {round_table} points at order '
+                                f"{tables[round_table]['current_order_id']}, not {winners[0]}"
+                            )
+                barrier.wait()
+                if order_id:
+                    terminal.call('PUT', f'/api/orders/{order_id}/status', {'status': 'paid'})
+
+        def terminal_worker(index):
+            terminal = Terminal(
+                '127.0.0.1', server.server_port, recorder, random.Random(args.seed + index), batch=args.batch
+            )
+            # Each terminal serves its own table, as a waiter would.
+            table_id = table_ids[index % len(table_ids)]
+            try:
+                if args.scenario == 'table-race':
+                    race_rounds(terminal, index)
+                    return
+                for flow in range(args.flows):
+                    terminal.dinner_flow(table_id, menu_ids, args.edits)
+                    if args.dashboard_every and (flow + 1) % args.dashboard_every == 0:
+                        terminal.dashboard()
+            except Exception as e:
+                failures.append(f'terminal {index}: {e!r}')
+                barrier.abort()
+
+        threads = [threading.Thread(target=terminal_worker, args=(i,)) for i in range(args.terminals)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started
+        server.shutdown()
+    if quiet:
+        quiet.close()
+
+    overall, endpoints = recorder.summary(wall_seconds)
+    return {
+        'meta': {
+            'commit': current_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'database': 'sqlite',
+            'scenario': args.scenario,
+            'batch': args.batch,
+            'terminals': args.terminals,
+            'flows_per_terminal': args.flows,
+            'edits_per_order': args.edits,
+            'dashboard_every': args.dashboard_every,
+            'seed': args.seed,
+        },
+        'overall': overall,
+        'endpoints': endpoints,
+        'failures': failures,
+    }
+
+
+def compare(baseline, current, tolerance_pct):
+    """Return human-readable regressions of p95 latency beyond the tolerance."""
+    regressions = []
+    for key, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(key)
+        if not before or not before.get('p95_ms'):
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        if change > tolerance_pct:
+            regressions.append(f"{key}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms (+{change:.1f}%)")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate a dinner rush against the Flask API.')
+    parser.add_argument('--scenario', choices=('dinner', 'table-race'), default='dinner', help='Flow each terminal runs.')
+    parser.add_argument('--batch', action='store_true', help='Send payment and dashboard calls through /api/batch.')
+    parser.add_argument('--terminals', type=int, default=8, help='Concurrent POS terminals.')
+    parser.add_argument('--flows', type=int, default=25, help='Orders each terminal takes end to end.')
+    parser.add_argument('--edits', type=int, default=3, help='PUT /api/orders/<id> calls per order.')
+    parser.add_argument('--dashboard-every', type=int, default=5, help='Dashboard refresh every N flows (0 disables).')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible runs.')
+    parser.add_argument('--database', default=None, help='SQLite file to use (defaults to a fresh temporary file).')
+    parser.add_argument('--output', default=None, help='Write JSON results to this file instead of stdout.')
+    parser.add_argument('--compare', default=None, help='Baseline JSON to check p95 regressions against.')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='Allowed p95 regression in percent.')
+    parser.add_argument('--verbose', action='store_true', help="Keep the app's own stdout output.")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    exit_code = 1 if results['failures'] else 0
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            exit_code = 1
+    sys.exit(exit_code)
@@ -0,0 +1,225 @@
+"""
+In-memory menu search for the POS.
+
+Indexes the name, category and description of every available menu item,
+so GET /api/menu/search answers without touching the database. Each query
+word must match a word of the item in one of these ways:
+
+- prefix: "pan" -> paneer
+- abbreviation: "chk" -> chicken, "btr" -> butter. The first letter must
+  match, and the remaining letters must appear in the word in order.
+- typo: "panner" -> paneer, "chiken" -> chicken. Candidates share a
+  trigram, then must be within one edit (two for long words).
+
+Items rank by match quality, weighted by where the word matched: name over
+category over description.
+
+Like the kitchen queue, the index is built from the database on first use.
+The menu endpoints patch it as they commit, and it is re-synced
+periodically so edits made by other worker processes show up.
+"""
+import bisect
+import re
+import threading
+import time
+
+from structured_log import get_logger
+
+FIELD_WEIGHTS = {'name': 1.0, 'category': 0.6, 'description': 0.4}
+
+EXACT, PREFIX, ABBREVIATION, TYPO = 1.0, 0.85, 0.6, 0.5
+
+WORD = re.compile(r'[a-z0-9]+')
+
+log = get_logger('menu_search')
+
+
+def words(text):
+    return WORD.findall((text or '').lower())
+
+
+def trigrams(word):
+    padded = f'^{word}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def is_abbreviation(query, word):
+    """'chk' for 'chicken': same first letter, the rest in order."""
+    if len(query) < 2 or len(query) >= len(word) or query[0] != word[0]:
+        return False
+    letters = iter(word[1:])
+    return all(letter in letters for letter in query[1:])
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count once), or limit + 1 once it's exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class MenuSearchIndex:
+    def __init__(self, loader=None, sync_seconds=60.0, cache_size=2048):
+        # loader(item_ids=None) -> list of item dicts for available menu items
+        self.loader = loader
+        self.sync_seconds = sync_seconds
+        self.cache_size = cache_size
+        self._items = {}
+        self._postings = {}  # word -> {item_id: best field weight}
+        self._vocabulary = []  # sorted words, for prefix lookups
+        self._trigrams = {}  # trigram -> set of words, for typo candidates
+        self._matches = {}  # query word -> [(word, quality)], cleared on every change
+        self._loaded = False
+        self._sync_thread = None
+        self._lock = threading.RLock()
+
+    def ensure_loaded(self, start_sync=False):
+        if not self._loaded:
+            self.rebuild()
+        if start_sync and self.sync_seconds > 0 and self._sync_thread is None:
+            with self._lock:
+                if self._sync_thread is None:
+                    self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+                    self._sync_thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_seconds)
+            try:
+                self.rebuild()
+            except Exception as e:
+                log.warning('Menu search sync failed', extra={'error': str(e)})
+
+    def rebuild(self):
+        """Replace the index with the available items from the database."""
+        items = {item['id']: item for item in self.loader()}
+        with self._lock:
+            self._loaded = True
+            if items == self._items:
+                return
+            for item_id in list(self._items):
+                if item_id not in items:
+                    self._remove(item_id)
+            for item in items.values():
+                if self._items.get(item['id']) != item:
+                    self._put(item)
+
+    def refresh(self, item_id):
+        """Reload one item after a menu edit; unavailable or deleted items drop out."""
+        self.ensure_loaded()
+        items = self.loader([item_id])
+        with self._lock:
+            if items:
+                self._put(items[0])
+            else:
+                self._remove(item_id)
+
+    def get(self, item_id):
+        """An available item by id, from memory only; None if it isn't indexed (or the index isn't loaded)."""
+        with self._lock:
+            return self._items.get(item_id)
+
+    def _put(self, item):
+        self._remove(item['id'])
+        self._items[item['id']] = item
+        for field, weight in FIELD_WEIGHTS.items():
+            for word in words(item.get(field)):
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = {}
+                    bisect.insort(self._vocabulary, word)
+                    for gram in trigrams(word):
+                        self._trigrams.setdefault(gram, set()).add(word)
+                postings[item['id']] = max(postings.get(item['id'], 0), weight)
+        self._matches.clear()
+
+    def _remove(self, item_id):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        for word in {word for field in FIELD_WEIGHTS for word in words(item.get(field))}:
+            postings = self._postings[word]
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+                for gram in trigrams(word):
+                    self._trigrams[gram].discard(word)
+        self._matches.clear()
+
+    def _match(self, query):
+        """Indexed words matching one query word, with the best quality for each."""
+        cached = self._matches.get(query)
+        if cached is not None:
+            return cached
+        found = {}
+        if query in self._postings:
+            found[query] = EXACT
+        start = bisect.bisect_left(self._vocabulary, query)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(query):
+                break
+            found.setdefault(word, PREFIX)
+        if len(query) >= 2:
+            initial = bisect.bisect_left(self._vocabulary, query[0])
+            for word in self._vocabulary[initial:]:
+                if word[0] != query[0]:
+                    break
+                if word not in found and is_abbreviation(query, word):
+                    found[word] = ABBREVIATION
+        if len(query) >= 4:
+            limit = 1 if len(query) < 7 else 2
+            candidates = set()
+            for gram in trigrams(query):
+                candidates |= self._trigrams.get(gram, set())
+            for word in candidates:
+                if word not in found and edit_distance(query, word, limit) <= limit:
+                    found[word] = TYPO
+        matches = list(found.items())
+        if len(self._matches) >= self.cache_size:
+            self._matches.clear()
+        self._matches[query] = matches
+        return matches
+
+    def search(self, text, limit=20, category=None):
+        """Items matching every word of `text`, best first."""
+        query_words = list(dict.fromkeys(words(text)))
+        if not query_words:
+            return []
+        with self._lock:
+            scores = None
+            for query in query_words:
+                best = {}
+                for word, quality in self._match(query):
+                    for item_id, weight in self._postings[word].items():
+                        score = quality * weight
+                        if score > best.get(item_id, 0):
+                            best[item_id] = score
+                if scores is None:
+                    scores = best
+                else:
+                    scores = {item_id: scores[item_id] + score for item_id, score in best.items() if item_id in scores}
+                if not scores:
+                    return []
+            items = [self._items[item_id] for item_id in scores]
+        if category:
+            items = [item for item in items if item.get('category') == category]
+        # Among equal scores, names starting with the first word, then shorter names:
+        # "Lassi (Sweet/Salted)" before "Mango Lassi", "Chicken Tikka" before "Garlic Chicken Tikka"
+        first = query_words[0]
+        items.sort(key=lambda item: (
+            -scores[item['id']], not item['name'].lower().startswith(first), len(item['name']), item['name']
+        ))
+        return items[:limit]
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Convert float rupee columns to integer paise columns.
+
+Each money column is replaced by a ``<name>_paise`` integer column holding
+ROUND(value * 100). The migration is idempotent and runs automatically from
+init_db(); it can also be run on its own against DATABASE_URL.
+"""
+from sqlalchemy import inspect, text
+
+MONEY_COLUMNS = {
+    'menu_item': ['price'],
+    'order': ['total_amount', 'tax_amount', 'final_total'],
+    'order_item': ['price'],
+    'bill': ['subtotal', 'tax_amount', 'total'],
+}
+
+
+def quote(name):
+    return f'"{name}"'
+
+
+def migrate_money_columns(engine):
+    """Add and backfill the paise columns, then drop the float ones. Returns the columns converted."""
+    converted = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table_name, columns in MONEY_COLUMNS.items():
+            if table_name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table_name)}
+            for column in columns:
+                paise_column = f'{column}_paise'
+                if column not in present:
+                    continue
+                if paise_column not in present:
+                    conn.execute(text(
+                        f'ALTER TABLE {quote(table_name)} ADD COLUMN {quote(paise_column)} INTEGER DEFAULT 0'
+                    ))
+                conn.execute(text(
+                    f'UPDATE {quote(table_name)} '
+                    f'SET {quote(paise_column)} = CAST(ROUND(COALESCE({quote(column)}, 0) * 100) AS INTEGER)'
+                ))
+                # SQLite 3.35+ and Postgres can drop columns in place.
+                conn.execute(text(f'ALTER TABLE {quote(table_name)} DROP COLUMN {quote(column)}'))
+                converted.append(f'{table_name}.{column}')
+    return converted
+
+
+if __name__ == '__main__':
+    from app import app, db
+
+    with app.app_context():
+        converted = migrate_money_columns(db.engine)
+    if converted:
+        print('Converted to paise: ' + ', '.join(converted))
+    else:
+        print('Money columns already stored as paise.')
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Move per-bill restaurant metadata into the outlet table.
+
+Older bills carry their own copy of the restaurant name, address, GSTIN and
+so on. Each distinct combination becomes one outlet row, bills get an
+outlet_id pointing at it, and the copied columns are dropped. The migration
+is idempotent and runs automatically from init_db(); it can also be run on
+its own against DATABASE_URL.
+"""
+from sqlalchemy import inspect, text
+
+from migrate_money_to_paise import quote
+
+# bill column -> outlet column
+OUTLET_COLUMNS = {
+    'restaurant_name': 'name',
+    'address': 'address',
+    'state': 'state',
+    'state_code': 'state_code',
+    'phone': 'phone',
+    'gstin': 'gstin',
+    'fssai': 'fssai',
+    'place_of_supply': 'place_of_supply',
+}
+
+DEFAULT_OUTLET = {
+    'name': 'KHAN SAHAB RESTAURANT',
+    'address': '4, BANSAL NAGAR FATEHABAD ROAD AGRA',
+    'state': 'Uttar Pradesh',
+    'state_code': '09',
+    'phone': '9319209322',
+    'gstin': '09AHDPA1039P2ZB',
+    'fssai': '12722001001504',
+    'place_of_supply': 'Uttar Pradesh',
+}
+
+
+def matches(columns, values):
+    """NULL-safe equality on each column, with bind names p0, p1, ..."""
+    conditions = []
+    params = {}
+    for index, (column, value) in enumerate(zip(columns, values)):
+        if value is None:
+            conditions.append(f'{quote(column)} IS NULL')
+        else:
+            conditions.append(f'{quote(column)} = :p{index}')
+            params[f'p{index}'] = value
+    return ' AND '.join(conditions), params
+
+
+def find_or_create_outlet(conn, values):
+    outlet_columns = list(OUTLET_COLUMNS.values())
+    where, params = matches(outlet_columns, values)
+    outlet_id = conn.execute(text(f'SELECT id FROM outlet WHERE {where} ORDER BY id'), params).scalar()
+    if outlet_id is None:
+        conn.execute(
+            text(
+                f"INSERT INTO outlet ({', '.join(quote(c) for c in outlet_columns)}) "
+                f"VALUES ({', '.join(f':v{i}' for i in range(len(outlet_columns)))})"
+            ),
+            {f'v{i}': value for i, value in enumerate(values)},
+        )
+        outlet_id = conn.execute(text(f'SELECT id FROM outlet WHERE {where} ORDER BY id'), params).scalar()
+    return outlet_id
+
+
+def migrate_bill_outlets(engine):
+    """Deduplicate bill metadata into outlets and drop the copies. Returns the number of outlets used."""
+    inspector = inspect(engine)
+    if 'bill' not in inspector.get_table_names():
+        return 0
+    present = {column['name'] for column in inspector.get_columns('bill')}
+    legacy = [column for column in OUTLET_COLUMNS if column in present]
+    if not legacy:
+        return 0
+
+    with engine.begin() as conn:
+        if 'outlet_id' not in present:
+            conn.execute(text('ALTER TABLE bill ADD COLUMN outlet_id INTEGER REFERENCES outlet (id)'))
+        combinations = conn.execute(
+            text(f"SELECT DISTINCT {', '.join(quote(c) for c in legacy)} FROM bill WHERE outlet_id IS NULL")
+        ).fetchall()
+        for combination in combinations:
+            values = dict(zip(legacy, combination))
+            outlet_id = find_or_create_outlet(conn, [values.get(column) for column in OUTLET_COLUMNS])
+            where, params = matches(legacy, combination)
+            conn.execute(
+                text(f'UPDATE bill SET outlet_id = :outlet_id WHERE outlet_id IS NULL AND {where}'),
+                {'outlet_id': outlet_id, **params},
+            )
+        for column in legacy:
+            # SQLite 3.35+ and Postgres can drop columns in place.
+            conn.execute(text(f'ALTER TABLE bill DROP COLUMN {quote(column)}'))
+    return len(combinations)
+
+
+if __name__ == '__main__':
+    from app import app, db
+
+    with app.app_context():
+        outlets = migrate_bill_outlets(db.engine)
+    if outlets:
+        print(f'Moved bill restaurant details into {outlets} outlet profile(s).')
+    else:
+        print('Bills already reference outlet profiles.')
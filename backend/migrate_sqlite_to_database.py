@@ -5,7 +5,10 @@ from datetime import datetime
 
 from sqlalchemy import text
 
-from app import app, db, Bill, MenuItem, Order, OrderItem, Table
+from app import app, db, Bill, InvoiceSequence, MenuItem, Order, OrderItem, Outlet, Table
+from db_maintenance import maintain
+from migrate_outlets import DEFAULT_OUTLET, OUTLET_COLUMNS
+from money import to_paise
 
 
 def parse_datetime(value):
@@ -23,6 +26,20 @@ def parse_datetime(value):
     raise ValueError(f"Unsupported datetime format: {value}")
 
 
+def paise(row, column):
+    """Read a money column from either a paise or a legacy float-rupee source."""
+    paise_column = f"{column}_paise"
+    if paise_column in row:
+        return row[paise_column] or 0
+    return to_paise(row.get(column) or 0)
+
+
+def has_table(connection, table_name):
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone() is not None
+
+
 def fetch_rows(connection, table_name):
     cursor = connection.execute(f'SELECT * FROM "{table_name}" ORDER BY id')
     columns = [column[0] for column in cursor.description]
@@ -32,7 +49,7 @@ def fetch_rows(connection, table_name):
 def target_has_data():
     return any(
         db.session.query(model.id).first() is not None
-        for model in (MenuItem, Table, Order, OrderItem, Bill)
+        for model in (MenuItem, Table, Order, OrderItem, Outlet, Bill)
     )
 
 
@@ -40,7 +57,7 @@ def reset_postgres_sequences():
     if db.engine.url.get_backend_name() != "postgresql":
         return
 
-    table_names = ["menu_item", '"table"', '"order"', "order_item", "bill"]
+    table_names = ["menu_item", '"table"', '"order"', "order_item", "outlet", "bill"]
     for table_name in table_names:
         db.session.execute(
             text(
@@ -84,7 +101,7 @@ def migrate(source_path):
                     id=row["id"],
                     name=row["name"],
                     description=row.get("description"),
-                    price=row.get("price", 0.0),
+                    price_paise=paise(row, "price"),
                     category=row.get("category"),
                     available=bool(row.get("available", 1)),
                 )
@@ -105,11 +122,11 @@ def migrate(source_path):
                 Order(
                     id=row["id"],
                     table_id=row["table_id"],
-                    total_amount=row.get("total_amount", 0.0),
+                    total_amount_paise=paise(row, "total_amount"),
                     status=row.get("status", "pending"),
                     tax_rate=row.get("tax_rate", 0.0),
-                    tax_amount=row.get("tax_amount", 0.0),
-                    final_total=row.get("final_total", 0.0),
+                    tax_amount_paise=paise(row, "tax_amount"),
+                    final_total_paise=paise(row, "final_total"),
                     payment_method=row.get("payment_method", "cash"),
                     created_at=parse_datetime(row.get("created_at")),
                     updated_at=parse_datetime(row.get("updated_at")),
@@ -123,37 +140,68 @@ def migrate(source_path):
                     order_id=row["order_id"],
                     menu_item_id=row["menu_item_id"],
                     quantity=row.get("quantity", 1),
-                    price=row.get("price", 0.0),
+                    price_paise=paise(row, "price"),
                 )
             )
 
+        if has_table(sqlite_connection, "outlet"):
+            for row in fetch_rows(sqlite_connection, "outlet"):
+                db.session.add(Outlet(**row))
+            db.session.flush()
+
+        # Legacy sources keep restaurant details on each bill; dedupe them into outlets
+        legacy_outlets = {}
+
+        def outlet_id_for(row):
+            if row.get("outlet_id") is not None:
+                return row["outlet_id"]
+            profile = {outlet_column: row.get(bill_column) for bill_column, outlet_column in OUTLET_COLUMNS.items()}
+            if profile["name"] is None:
+                # Bills saved without restaurant details belong to the default outlet
+                profile = dict(DEFAULT_OUTLET)
+            key = tuple(profile.values())
+            if key not in legacy_outlets:
+                outlet = Outlet(**profile)
+                db.session.add(outlet)
+                db.session.flush()
+                legacy_outlets[key] = outlet.id
+            return legacy_outlets[key]
+
         for row in fetch_rows(sqlite_connection, "bill"):
             db.session.add(
                 Bill(
                     id=row["id"],
                     order_id=row["order_id"],
                     invoice_number=row["invoice_number"],
-                    restaurant_name=row.get("restaurant_name"),
-                    address=row.get("address"),
-                    state=row.get("state"),
-                    state_code=row.get("state_code"),
-                    phone=row.get("phone"),
-                    gstin=row.get("gstin"),
-                    fssai=row.get("fssai"),
-                    place_of_supply=row.get("place_of_supply"),
-                    subtotal=row.get("subtotal", 0.0),
+                    outlet_id=outlet_id_for(row),
+                    subtotal_paise=paise(row, "subtotal"),
                     tax_rate=row.get("tax_rate", 0.0),
-                    tax_amount=row.get("tax_amount", 0.0),
-                    total=row.get("total", 0.0),
+                    tax_amount_paise=paise(row, "tax_amount"),
+                    total_paise=paise(row, "total"),
                     payment_method=row.get("payment_method", "cash"),
                     bill_date=parse_datetime(row.get("bill_date")),
                     created_at=parse_datetime(row.get("created_at")),
                 )
             )
 
+        # A source without bills or outlets still needs the outlet new bills are made out to
+        if db.session.query(Outlet.id).first() is None:
+            db.session.add(Outlet(**DEFAULT_OUTLET))
+
+        # Invoice series counters (absent in databases from before server-side numbering)
+        if has_table(sqlite_connection, "invoice_sequence"):
+            for row in sqlite_connection.execute("SELECT series, next_number FROM invoice_sequence"):
+                db.session.add(InvoiceSequence(series=row["series"], next_number=row["next_number"]))
+
         db.session.commit()
         reset_postgres_sequences()
         db.session.commit()
+        db.session.close()
+
+        # The planner has no statistics for the freshly loaded tables yet
+        for task in maintain(db.engine, ["analyze"])["tasks"]:
+            if "error" in task:
+                print(f"ANALYZE failed, run `python db_maintenance.py --tasks analyze` later: {task['error']}")
 
     sqlite_connection.close()
 
@@ -0,0 +1,52 @@
+"""
+Money helpers.
+
+All amounts are stored and computed as integer paise. Rupee values only
+exist at the edges: JSON payloads from the POS screens and what we send
+back to them.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+PAISE_PER_RUPEE = 100
+BASIS_POINTS = 10000
+
+
+def to_paise(amount):
+    """Convert a rupee amount (int, float, str or Decimal) to integer paise, rounding half up."""
+    if amount is None or amount == '':
+        return 0
+    if isinstance(amount, int) and not isinstance(amount, bool):
+        return amount * PAISE_PER_RUPEE
+    # Parsed once at the API boundary; str() keeps 0.1 from becoming 0.1000000000000000055.
+    return int((Decimal(str(amount)) * PAISE_PER_RUPEE).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def to_rupees(paise):
+    """Rupee value of an integer paise amount, for JSON responses."""
+    if paise is None:
+        return 0.0
+    return paise / PAISE_PER_RUPEE
+
+
+def rate_to_basis_points(rate):
+    """Convert a fractional tax rate (0.05 for 5%) to integer basis points."""
+    if not rate:
+        return 0
+    return int((Decimal(str(rate)) * BASIS_POINTS).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def tax_paise(subtotal_paise, rate):
+    """Tax on a subtotal at a fractional rate, rounded half up to the paisa."""
+    basis_points = rate_to_basis_points(rate)
+    return (subtotal_paise * basis_points + BASIS_POINTS // 2) // BASIS_POINTS
+
+
+def round_bill_total(paise):
+    """
+    Round a bill total to the nearest ten rupees.
+
+    Matches the historical rule: first round half up to whole rupees, then
+    round that half up to the nearest ten.
+    """
+    rupees = (paise + PAISE_PER_RUPEE // 2) // PAISE_PER_RUPEE
+    return (rupees + 5) // 10 * 10 * PAISE_PER_RUPEE
@@ -0,0 +1,256 @@
+"""
+Local write-ahead journal for order writes.
+
+With ORDER_JOURNAL_PATH set, create_order and update_order append the
+request to a local SQLite file and answer at once instead of waiting on the
+primary database. New orders get their id from the journal, so the POS
+can keep using it straight away. A background replayer applies entries to
+the primary database in journal order.
+
+The journal hands out order ids from a counter per database (kept under the
+outlet that owns it) seeded from the primary's highest order id. Replay detects conflicts: an id taken by a
+different order, an update to an order that doesn't exist or is already
+paid. Conflicting entries, and later entries for the same order, are parked
+as 'conflict' for an operator to retry or discard. If the primary is
+unreachable, the replayer stops and retries the same entry later.
+
+Every worker process shares the journal file. Only the process holding the
+replay lock file replays, so entries are applied once and in order.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from file_lock import open_lock_file, try_lock
+from structured_log import get_logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    outlet_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    accepted_at TEXT NOT NULL,
+    applied_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_journal_status_seq ON journal (status, seq);
+CREATE INDEX IF NOT EXISTS ix_journal_order ON journal (outlet_id, order_id, status);
+CREATE TABLE IF NOT EXISTS order_ids (
+    outlet_id INTEGER PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+UNAPPLIED = ('pending', 'conflict')
+
+log = get_logger('order_journal')
+
+
+class JournalConflict(Exception):
+    """The entry can't be applied to the primary database as written."""
+
+
+class OrderJournal:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode; writes use explicit BEGIN IMMEDIATE so they are
+        # serialized across worker processes.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=FULL')
+        return conn
+
+    def is_seeded(self, outlet_id):
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM order_ids WHERE outlet_id = ?', (outlet_id,)).fetchone() is not None
+
+    def seed(self, outlet_id, max_order_id):
+        """Make sure new journal ids for the outlet start above the primary's highest order id."""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO order_ids (outlet_id, last_id) VALUES (?, ?) '
+                'ON CONFLICT (outlet_id) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)',
+                (outlet_id, max_order_id or 0)
+            )
+
+    def last_order_id(self, outlet_id):
+        """The highest order id the journal has handed out (or been seeded with) for the outlet."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT last_id FROM order_ids WHERE outlet_id = ?', (outlet_id,)).fetchone()
+        return row['last_id'] if row else None
+
+    def append(self, outlet_id, action, payload, order_id=None, accepted_at=None):
+        """
+        Durably record one write and return (seq, order_id). Without an
+        order_id a new one is taken from the outlet's counter in the same
+        transaction.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if order_id is None:
+                row = conn.execute('SELECT last_id FROM order_ids WHERE outlet_id = ?', (outlet_id,)).fetchone()
+                if row is None:
+                    raise RuntimeError(f'Order journal has no id counter for outlet {outlet_id}')
+                order_id = row['last_id'] + 1
+                conn.execute('UPDATE order_ids SET last_id = ? WHERE outlet_id = ?', (order_id, outlet_id))
+            cursor = conn.execute(
+                'INSERT INTO journal (outlet_id, action, order_id, payload, accepted_at) VALUES (?, ?, ?, ?, ?)',
+                (outlet_id, action, order_id, json.dumps(payload), accepted_at or time.strftime('%Y-%m-%dT%H:%M:%S'))
+            )
+            conn.execute('COMMIT')
+            return cursor.lastrowid, order_id
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def next_pending(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM journal WHERE status = 'pending' ORDER BY seq LIMIT 1"
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def has_conflict(self, outlet_id, order_id, before_seq):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM journal WHERE outlet_id = ? AND order_id = ? AND status = 'conflict' AND seq < ?",
+                (outlet_id, order_id, before_seq)
+            ).fetchone() is not None
+
+    def mark(self, seq, status, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE journal SET status = ?, error = ?, attempts = attempts + 1, applied_at = ? WHERE seq = ?',
+                (status, error, time.strftime('%Y-%m-%dT%H:%M:%S') if status == 'applied' else None, seq)
+            )
+
+    def record_failure(self, seq, error):
+        with self._connect() as conn:
+            conn.execute('UPDATE journal SET error = ?, attempts = attempts + 1 WHERE seq = ?', (error, seq))
+
+    def requeue(self, seq):
+        """Put a parked entry back in the replay queue."""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE journal SET status = 'pending', error = NULL WHERE seq = ? AND status = 'conflict'", (seq,)
+            ).rowcount > 0
+
+    def discard(self, seq):
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE journal SET status = 'discarded' WHERE seq = ? AND status IN ('pending', 'conflict')", (seq,)
+            ).rowcount > 0
+
+    def unapplied(self, outlet_id, order_id=None, statuses=UNAPPLIED):
+        """Pending and parked entries for an outlet (optionally one order), in journal order."""
+        query = f"SELECT * FROM journal WHERE outlet_id = ? AND status IN ({', '.join('?' * len(statuses))})"
+        params = [outlet_id, *statuses]
+        if order_id is not None:
+            query += ' AND order_id = ?'
+            params.append(order_id)
+        with self._connect() as conn:
+            return [self._entry(row) for row in conn.execute(query + ' ORDER BY seq', params)]
+
+    def entries(self, status=None, limit=100):
+        query = 'SELECT * FROM journal'
+        params = []
+        if status:
+            query += ' WHERE status = ?'
+            params.append(status)
+        query += ' ORDER BY seq DESC LIMIT ?'
+        params.append(limit)
+        with self._connect() as conn:
+            return [self._entry(row) for row in conn.execute(query, params)]
+
+    def counts(self):
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT status, COUNT(*) FROM journal GROUP BY status').fetchall())
+
+    @staticmethod
+    def _entry(row):
+        entry = dict(row)
+        entry['payload'] = json.loads(entry['payload'])
+        return entry
+
+
+class JournalReplayer:
+    """Background thread that applies pending journal entries in order."""
+
+    def __init__(self, journal, apply, is_unavailable, interval=1.0):
+        self.journal = journal
+        # apply(entry) writes one entry to the primary, raising JournalConflict if it can't
+        self.apply = apply
+        # is_unavailable(error) tells connection failures (retry later) from bad entries
+        self.is_unavailable = is_unavailable
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock_file = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='order-journal-replay')
+            self._thread.start()
+
+    def kick(self):
+        self._wake.set()
+
+    def _holds_lock(self):
+        if self._lock_file is None:
+            lock_file = open_lock_file(self.journal.path + '.lock')
+            if not try_lock(lock_file):
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                if self._holds_lock():
+                    self.replay()
+            except Exception as e:
+                log.error('Order journal replay failed', extra={'error': str(e)})
+
+    def replay(self):
+        """Apply entries until the queue is empty or the primary stops answering. Returns the count applied."""
+        applied = 0
+        while True:
+            entry = self.journal.next_pending()
+            if entry is None:
+                return applied
+            if self.journal.has_conflict(entry['outlet_id'], entry['order_id'], entry['seq']):
+                self.journal.mark(entry['seq'], 'conflict', 'An earlier entry for this order is in conflict')
+                continue
+            try:
+                self.apply(entry)
+            except JournalConflict as e:
+                self.journal.mark(entry['seq'], 'conflict', str(e))
+                continue
+            except Exception as e:
+                if self.is_unavailable(e):
+                    # Keep the entry at the head of the queue and try again later
+                    self.journal.record_failure(entry['seq'], str(e))
+                    return applied
+                self.journal.mark(entry['seq'], 'conflict', str(e))
+                continue
+            self.journal.mark(entry['seq'], 'applied')
+            applied += 1
@@ -0,0 +1,197 @@
+"""
+Per-outlet database routing.
+
+Each branch can keep its operational data (tables, orders, bills, invoice
+series, menu) in its own database, configured as
+
+    OUTLET_DATABASES="2=postgresql://.../branch2,3=sqlite:////data/branch3.db"
+
+Every entry becomes a Flask-SQLAlchemy bind named ``outlet_<id>``. The
+request's outlet is kept in ``flask.g.outlet_id`` and OutletRoutingSession
+sends every query to that outlet's engine, except for the outlet registry
+itself, which always lives in the default database. Outlets without an entry
+use the default database.
+
+Cross-outlet reports run one query per outlet in parallel with fan_out().
+
+With DATABASE_REPLICA_URL set, the default database also gets a ``replica``
+bind. Views wrapped with ReplicaReads send their queries there, unless the
+client asks to read its own writes, and retry on the primary if the replica
+can't be reached. Outlets with their own database always read from it.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+from structured_log import get_logger
+
+# Tables shared by every outlet, kept in the default database
+GLOBAL_TABLES = {'outlet'}
+
+REPLICA_BIND = 'replica'
+# Sent by clients that must see data they just wrote
+READ_YOUR_WRITES_HEADER = 'X-Read-Your-Writes'
+
+log = get_logger('outlet_routing')
+
+
+def parse_outlet_databases(raw):
+    """{outlet_id: database_url} from "id=url,id=url"."""
+    databases = {}
+    for entry in (raw or '').split(','):
+        if not entry.strip():
+            continue
+        outlet_id, separator, url = entry.partition('=')
+        if not separator or not url.strip():
+            raise ValueError(f"Invalid OUTLET_DATABASES entry: {entry!r} (expected <outlet id>=<database url>)")
+        databases[int(outlet_id)] = url.strip()
+    return databases
+
+
+def outlet_bind_key(outlet_id):
+    return f'outlet_{outlet_id}'
+
+
+def current_outlet_id():
+    """The outlet selected for this request or worker thread, if any."""
+    return g.get('outlet_id') if has_app_context() else None
+
+
+def replica_selected():
+    return has_app_context() and g.get('read_replica', False)
+
+
+class OutletRoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = self._db.engines.get(outlet_bind_key(current_outlet_id()))
+            if engine is not None and not self._is_global(mapper, clause):
+                return engine
+            if engine is None and replica_selected() and not self._flushing:
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        # Inside a transactional /api/batch the views' commits only flush; the batch commits once
+        if has_app_context() and g.get('hold_commits'):
+            self.flush()
+            return
+        super().commit()
+
+    @staticmethod
+    def _is_global(mapper, clause):
+        table = None
+        if mapper is not None:
+            table = sa.inspect(mapper).local_table
+        elif clause is not None:
+            table = getattr(clause, 'table', None)
+        return getattr(table, 'name', None) in GLOBAL_TABLES
+
+
+class OutletFanOut:
+    """
+    Runs a function once per outlet, in parallel, each in its own app context.
+    Called from a view wrapped with `replica_reads`, the workers read from the
+    replica too and fall back to the primary the same way.
+    """
+
+    def __init__(self, app, max_workers=4, timeout=30, replica_reads=None):
+        self.app = app
+        self.timeout = timeout
+        self.replica_reads = replica_reads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='outlet-report')
+
+    def _run(self, outlet_id, func, read_replica):
+        with self.app.app_context():
+            g.outlet_id = outlet_id
+            if not read_replica:
+                return func(outlet_id)
+            g.read_replica = True
+            try:
+                return func(outlet_id)
+            except Exception as e:
+                if self.replica_reads is None or not self.replica_reads.replica_failed(e):
+                    raise
+            finally:
+                g.read_replica = False
+            return func(outlet_id)
+
+    def __call__(self, outlet_ids, func):
+        """
+        Returns ({outlet_id: result}, {outlet_id: error message}). An outlet
+        that fails or doesn't answer within the timeout is reported as an
+        error, so one slow branch can't hold up or break the report for the
+        others.
+        """
+        read_replica = replica_selected()
+        futures = {
+            outlet_id: self._executor.submit(self._run, outlet_id, func, read_replica) for outlet_id in outlet_ids
+        }
+        wait(futures.values(), timeout=self.timeout)
+        results, errors = {}, {}
+        for outlet_id, future in futures.items():
+            if not future.done():
+                future.cancel()
+                errors[outlet_id] = f'timed out after {self.timeout}s'
+            elif future.exception() is not None:
+                errors[outlet_id] = str(future.exception())
+            else:
+                results[outlet_id] = future.result()
+        return results, errors
+
+
+class ReplicaReads:
+    """Decorator for read-only GET views that may be served from the replica bind."""
+
+    def __init__(self, db, is_unavailable, retry_seconds=30):
+        self.db = db
+        # is_unavailable(error) tells a replica that can't be reached from a failing query
+        self.is_unavailable = is_unavailable
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    def use_replica(self):
+        return (
+            REPLICA_BIND in self.db.engines
+            and request.method == 'GET'
+            and not request.headers.get(READ_YOUR_WRITES_HEADER)
+            and time.monotonic() >= self._down_until
+        )
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.use_replica():
+                return view(*args, **kwargs)
+            g.read_replica = True
+            try:
+                return view(*args, **kwargs)
+            except Exception as e:
+                if not self.replica_failed(e):
+                    raise
+            finally:
+                g.read_replica = False
+            return view(*args, **kwargs)
+        return wrapper
+
+    def replica_failed(self, error):
+        """
+        True when `error` means the replica couldn't be reached. The caller
+        then repeats its reads on the primary, and the replica is left alone
+        for a while.
+        """
+        if not self.is_unavailable(error):
+            return False
+        log.warning(
+            'Read replica unavailable, using the primary',
+            extra={'retry_seconds': self.retry_seconds, 'error': str(error)}
+        )
+        self._down_until = time.monotonic() + self.retry_seconds
+        self.db.session.rollback()
+        return True
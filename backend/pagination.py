@@ -0,0 +1,25 @@
+"""
+Keyset pagination cursors.
+
+A cursor is the sort key of the last row of a page, encoded as an opaque
+URL-safe string. The next page is everything strictly after that key, so
+page N costs the same as page 1 and rows inserted meanwhile never shift it.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_datetime, row_id):
+    raw = json.dumps([sort_datetime.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (datetime, id) from a cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
@@ -0,0 +1,68 @@
+"""
+Order pricing.
+
+The backend owns every figure shown on the POS and printed on bills:
+subtotal, tax rate, tax and the rounded grand total. Orders carry these as
+denormalized columns that are moved by line deltas as items change, so no
+caller ever has to re-read an order's lines to know what it costs.
+"""
+from collections import namedtuple
+
+from money import round_bill_total, tax_paise, to_rupees
+
+OrderTotals = namedtuple('OrderTotals', ['subtotal_paise', 'tax_rate', 'tax_paise', 'total_paise'])
+
+
+def normalize_tax_rate(rate):
+    """Return a fractional tax rate; the POS historically sent percentages (5 for 5%)."""
+    if not rate:
+        return 0.0
+    rate = float(rate)
+    return rate / 100 if rate >= 1 else rate
+
+
+def line_amount(price_paise, quantity):
+    return price_paise * quantity
+
+
+def price(subtotal_paise, tax_rate):
+    """Price a subtotal: tax rounded to the paisa, total rounded to the nearest ten rupees."""
+    rate = normalize_tax_rate(tax_rate)
+    tax = tax_paise(subtotal_paise, rate)
+    return OrderTotals(subtotal_paise, rate, tax, round_bill_total(subtotal_paise + tax))
+
+
+def adjust_order(order, delta_paise=0, tax_rate=None):
+    """Apply a line delta and/or a new tax rate to an order's stored totals."""
+    rate = order.tax_rate if tax_rate is None else tax_rate
+    totals = price((order.total_amount_paise or 0) + delta_paise, rate)
+    order.total_amount_paise = totals.subtotal_paise
+    order.tax_rate = totals.tax_rate
+    order.tax_amount_paise = totals.tax_paise
+    order.final_total_paise = totals.total_paise
+    return totals
+
+
+def stored_totals(subtotal_paise, tax_rate, tax_amount_paise, final_total_paise):
+    """
+    Totals as stored on an order. Unpaid orders from before the totals were
+    maintained have no final total yet, so those are priced from the subtotal.
+    """
+    if final_total_paise is None or (not final_total_paise and subtotal_paise):
+        return price(subtotal_paise or 0, tax_rate)
+    return OrderTotals(subtotal_paise or 0, normalize_tax_rate(tax_rate), tax_amount_paise or 0, final_total_paise)
+
+
+def order_totals(order):
+    """An order's stored totals, without touching its lines."""
+    return stored_totals(order.total_amount_paise, order.tax_rate, order.tax_amount_paise, order.final_total_paise)
+
+
+def totals_payload(totals):
+    """Rupee values for JSON responses."""
+    return {
+        'subtotal': to_rupees(totals.subtotal_paise),
+        'tax_rate': totals.tax_rate,
+        'tax_amount': to_rupees(totals.tax_paise),
+        'total': to_rupees(totals.total_paise),
+    }
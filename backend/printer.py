@@ -3,8 +3,12 @@ import tempfile
 import os
 import webbrowser
 from datetime import datetime
-from decimal import Decimal, ROUND_HALF_UP
 import pytz
+from money import PAISE_PER_RUPEE, to_paise, to_rupees, tax_paise, round_bill_total
+from structured_log import get_logger
+from thermal_logo import logo_data_uri
+
+log = get_logger('printer')
 
 class HTMLBillGenerator:
     @staticmethod
@@ -27,44 +31,77 @@ class HTMLBillGenerator:
             date_obj = HTMLBillGenerator.get_ist_time()
         return date_obj.strftime('%I:%M %p').lower()
 
-    @staticmethod
-    def round_half_up(amount):
-        """Round to the nearest 10 with .5 rounding up."""
-        whole = int(Decimal(str(amount)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
-        return int(Decimal(str(whole / 10)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)) * 10
-
 class RestaurantBillGenerator(HTMLBillGenerator):
     @staticmethod
-    def generate_html_bill(bill_data):
-        """Generate HTML bill optimized for 80mm thermal printer"""
+    def bill_summary(bill_data, outlet=None):
+        """Header details, line items and totals for a thermal bill; shared by the HTML and PDF layouts."""
+        # Header details: the outlet profile, else whatever the bill data carries
+        outlet = outlet or {}
+        
         # Use IST times
         current_time = HTMLBillGenerator.get_ist_time()
         current_date = HTMLBillGenerator.format_ist_date(current_time)
         current_time_str = HTMLBillGenerator.format_ist_time(current_time)
         
-        # Calculate totals
-        computed_subtotal = 0
+        # Calculate line amounts and totals in paise
+        items = []
+        computed_subtotal_paise = 0
         for item in bill_data.get('items', []):
             qty = item.get('qty', 1)
-            price = item.get('price', 0)
-            amount = qty * price
-            computed_subtotal += amount
+            price_paise = to_paise(item.get('price', 0))
+            items.append((item['name'], qty, to_rupees(price_paise), to_rupees(qty * price_paise)))
+            computed_subtotal_paise += qty * price_paise
         
         tax_rate = bill_data.get('tax_rate', 0.05)  # Default 5% Tax
-        subtotal = bill_data.get('subtotal', computed_subtotal)
-        tax_amount = bill_data.get('tax_amount', subtotal * tax_rate)
-        total = HTMLBillGenerator.round_half_up(bill_data.get('total', subtotal + tax_amount))
-        table_number = bill_data.get('table_number', bill_data.get('table_id', 'N/A'))
+        subtotal_paise = to_paise(bill_data['subtotal']) if 'subtotal' in bill_data else computed_subtotal_paise
+        if 'tax_amount' in bill_data:
+            tax_amount_paise = to_paise(bill_data['tax_amount'])
+        else:
+            tax_amount_paise = tax_paise(subtotal_paise, tax_rate)
+        total_paise = to_paise(bill_data['total']) if 'total' in bill_data else subtotal_paise + tax_amount_paise
+        
+        return {
+            'restaurant_name': outlet.get('name') or bill_data.get('restaurant_name', 'KHAN SAHAB RESTAURANT'),
+            'address': outlet.get('address') or bill_data.get('address', '4, BANSAL NAGAR FATEHABAD ROAD AGRA'),
+            'phone': outlet.get('phone') or bill_data.get('phone', '9319209322'),
+            'gstin': outlet.get('gstin') or bill_data.get('gstin', '09AHDPA1039P2ZB'),
+            'fssai': outlet.get('fssai') or bill_data.get('fssai', '12722001001504'),
+            'date': bill_data.get('date', current_date),
+            'time': bill_data.get('time', current_time_str),
+            'invoice_number': bill_data.get('invoice_number', '1'),
+            'table_number': bill_data.get('table_number', bill_data.get('table_id', 'N/A')),
+            'items': items,
+            'subtotal': to_rupees(subtotal_paise),
+            'tax_rate': tax_rate,
+            'tax_amount': to_rupees(tax_amount_paise),
+            'total': round_bill_total(total_paise) // PAISE_PER_RUPEE,
+        }
+
+    @staticmethod
+    def generate_html_bill(bill_data, outlet=None):
+        """Generate HTML bill optimized for 80mm thermal printer"""
+        summary = RestaurantBillGenerator.bill_summary(bill_data, outlet)
+        restaurant_name = summary['restaurant_name']
+        address = summary['address']
+        phone = summary['phone']
+        gstin = summary['gstin']
+        fssai = summary['fssai']
+        tax_rate = summary['tax_rate']
+        subtotal = summary['subtotal']
+        tax_amount = summary['tax_amount']
+        total = summary['total']
+        table_number = summary['table_number']
+        
+        # Pre-dithered paper-width logo, cached once per process; text if unavailable
+        logo_uri = logo_data_uri()
+        logo_html = f'<img class="logo-image" src="{logo_uri}" alt="KHAN SAHAB">' if logo_uri else '<div class="logo">KHAN SAHAB</div>'
         
         # Generate items HTML
-        items_html = ""
-        for item in bill_data.get('items', []):
-            qty = item.get('qty', 1)
-            price = item.get('price', 0)
-            amount = qty * price
+        items_html = ''
+        for name, qty, price, amount in summary['items']:
             items_html += f"""
             <tr>
-                <td style="padding: 3px 1px 3px 2px; border-bottom: 1px solid #ddd; font-weight: 600; font-size: 10px;">{item['name']}</td>
+                <td style="padding: 3px 1px 3px 2px; border-bottom: 1px solid #ddd; font-weight: 600; font-size: 10px;">{name}</td>
                 <td style="padding: 3px 1px 3px 2px; border-bottom: 1px solid #ddd; text-align: center; font-weight: 600; font-size: 10px;">{qty}</td>
                 <td style="padding: 3px 1px 3px 2px; border-bottom: 1px solid #ddd; text-align: right; font-weight: 600; font-size: 10px;">₹{price:.2f}</td>
                 <td style="padding: 3px 1px 3px 2px; border-bottom: 1px solid #ddd; text-align: right; font-weight: 600; font-size: 10px;">₹{amount:.2f}</td>
@@ -116,6 +153,13 @@ class RestaurantBillGenerator(HTMLBillGenerator):
                     letter-spacing: 2px;
                 }}
                 
+                .logo-image {{
+                    display: block;
+                    width: 100%;
+                    margin: 0 0 4px 0;
+                    image-rendering: pixelated;
+                }}
+                
                 .restaurant-name {{
                     font-size: 16px;
                     font-weight: 700;
@@ -283,25 +327,25 @@ class RestaurantBillGenerator(HTMLBillGenerator):
         </head>
         <body>
             <div class="header">
-                <div class="logo">KHAN SAHAB</div>
+                {logo_html}
                 <div class="halal">حلال - HALAL</div>
                 <div class="halal">UNIT OF TUAHA FOOD</div>
-                <div class="restaurant-name">{bill_data.get('restaurant_name', 'KHAN SAHAB RESTAURANT')}</div>
-                <div class="address">{bill_data.get('address', '4, BANSAL NAGAR FATEHABAD ROAD AGRA')}</div>
-                <div class="address">Ph: {bill_data.get('phone', '9319209322')}</div>
-                <div class="address">GSTIN: {bill_data.get('gstin', '09AHDPA1039P2ZB')}</div>
-                <div class="address">FSSAI: {bill_data.get('fssai', '12722001001504')}</div>
+                <div class="restaurant-name">{restaurant_name}</div>
+                <div class="address">{address}</div>
+                <div class="address">Ph: {phone}</div>
+                <div class="address">GSTIN: {gstin}</div>
+                <div class="address">FSSAI: {fssai}</div>
             </div>
             
             <div class="invoice-details">
                 <div class="invoice-title">TAX INVOICE</div>
                 <div class="detail-row">
                     <span>Cash Sale</span>
-                    <span>Date: {bill_data.get('date', current_date)}</span>
+                    <span>Date: {summary['date']}</span>
                 </div>
                 <div class="detail-row">
                     <span>Invoice: {bill_data.get('invoice_number', '1')}</span>
-                    <span>Time: {bill_data.get('time', current_time_str)}</span>
+                    <span>Time: {summary['time']}</span>
                 </div>
                 <div class="detail-row">
                     <span>Table No: {table_number}</span>
@@ -355,14 +399,14 @@ class RestaurantBillGenerator(HTMLBillGenerator):
 
 class WindowsPrintHandler:
     @staticmethod
-    def create_print_preview(bill_data, bill_format='restaurant'):
+    def create_print_preview(bill_data, bill_format='restaurant', outlet=None):
         """Create HTML print preview and open in browser for Windows printing"""
         try:
             # Generate HTML content based on format
             if bill_format == 'restaurant':
-                html_content = RestaurantBillGenerator.generate_html_bill(bill_data)
+                html_content = RestaurantBillGenerator.generate_html_bill(bill_data, outlet)
             else:
-                html_content = RestaurantBillGenerator.generate_html_bill(bill_data)  # Use restaurant format as default
+                html_content = RestaurantBillGenerator.generate_html_bill(bill_data, outlet)  # Use restaurant format as default
             
             # Create temporary HTML file
             with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as temp_file:
@@ -372,36 +416,35 @@ class WindowsPrintHandler:
             # Open in default browser for print preview
             webbrowser.open(f'file://{temp_file_path}')
             
-            print(f"Print preview opened in browser: {bill_data.get('invoice_number', 'Unknown')}")
+            log.info('Print preview opened in browser', extra={'invoice_number': bill_data.get('invoice_number')})
             return temp_file_path
             
-        except Exception as e:
-            print(f"Error creating print preview: {e}")
+        except Exception:
+            log.exception('Error creating print preview', extra={'invoice_number': bill_data.get('invoice_number')})
             return None
 
-def print_bill(bill_data, printer_config=None, bill_format='restaurant'):
+def print_bill(bill_data, printer_config=None, bill_format='restaurant', outlet=None):
     """
     Main function to print a bill using Windows system print dialog
     
     This implementation creates an HTML preview and opens it in browser,
     allowing users to select any printer through Windows print dialog.
     The printer_config parameter is kept for API compatibility but not used
-    since we rely on Windows system printer selection.
+    since we rely on Windows system printer selection. The optional outlet
+    profile supplies the header details.
     """
     try:
         # Use Windows print handler for print preview and dialog
-        temp_file_path = WindowsPrintHandler.create_print_preview(bill_data, bill_format)
+        temp_file_path = WindowsPrintHandler.create_print_preview(bill_data, bill_format, outlet)
         
         if temp_file_path:
-            print(f"Print preview created successfully for invoice: {bill_data.get('invoice_number', 'Unknown')}")
-            print("Click 'Print Bill' in the browser window to open Windows print dialog")
             return temp_file_path
         else:
-            print("Failed to create print preview")
+            log.warning('Failed to create print preview', extra={'invoice_number': bill_data.get('invoice_number')})
             return False
         
-    except Exception as e:
-        print(f"Error printing bill: {e}")
+    except Exception:
+        log.exception('Error printing bill', extra={'invoice_number': bill_data.get('invoice_number')})
         return False
 
 # Test function
@@ -428,11 +471,11 @@ if __name__ == '__main__':
     }
     
     # Test print preview (opens browser with print dialog)
-    print("Opening print preview...")
+    print('Opening print preview...')
     result = print_bill(sample_restaurant_bill, bill_format='restaurant')
     
     if result:
-        print(f"Print preview file created: {result}")
+        print(f'Print preview file created: {result}')
         print("Use Ctrl+P in the browser or click 'Print Bill' to open Windows print dialog")
     else:
-        print("Failed to create print preview") 
+        print('Failed to create print preview') 
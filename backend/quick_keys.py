@@ -0,0 +1,120 @@
+"""
+Top-selling quick keys for the POS.
+
+Keeps, for each time-of-day slot, the best-selling menu items overall and
+within each category. The counts come from the lines of billed orders.
+Rankings are computed whenever the counts change, so GET
+/api/menu/quick-keys only returns a precomputed list.
+
+Like the kitchen queue, the counts are loaded from the database on first
+use. create_bill adds each closed order's lines as it commits. A periodic
+rebuild drops lines that have aged out of the window and picks up bills
+closed through other worker processes.
+"""
+import threading
+import time
+from collections import Counter
+
+from structured_log import get_logger
+
+log = get_logger('quick_keys')
+
+# (slot, first hour, hour after the last) in IST; an order belongs to the slot it was opened in
+TIME_SLOTS = (
+    ('breakfast', 6, 11),
+    ('lunch', 11, 16),
+    ('snacks', 16, 19),
+    ('dinner', 19, 24),
+    ('late', 0, 6),
+)
+
+ALL_DAY = 'all'
+
+
+def time_slot(hour):
+    for name, start, end in TIME_SLOTS:
+        if start <= hour < end:
+            return name
+    raise ValueError(f'Invalid hour: {hour}')
+
+
+class QuickKeys:
+    def __init__(self, loader=None, top_n=8, sync_seconds=3600.0):
+        # loader() -> list of (item dict, hour ordered, quantity)
+        self.loader = loader
+        self.top_n = top_n
+        self.sync_seconds = sync_seconds
+        self._items = {}
+        self._counts = {}  # slot -> Counter(item_id -> quantity)
+        self._top = {}  # slot -> precomputed payload
+        self._loaded = False
+        self._sync_thread = None
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, start_sync=False):
+        if not self._loaded:
+            self.rebuild()
+        if start_sync and self.sync_seconds > 0 and self._sync_thread is None:
+            with self._lock:
+                if self._sync_thread is None:
+                    self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+                    self._sync_thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_seconds)
+            try:
+                self.rebuild()
+            except Exception as e:
+                log.warning('Quick keys sync failed', extra={'error': str(e)})
+
+    def rebuild(self):
+        """Recount every slot from the database."""
+        items = {}
+        counts = {name: Counter() for name, _, _ in TIME_SLOTS}
+        counts[ALL_DAY] = Counter()
+        for item, hour, quantity in self.loader():
+            items[item['id']] = item
+            counts[time_slot(hour)][item['id']] += quantity
+            counts[ALL_DAY][item['id']] += quantity
+        with self._lock:
+            self._items = items
+            self._counts = counts
+            self._top = {slot: self._rank(slot) for slot in counts}
+            self._loaded = True
+
+    def add_order(self, hour, lines):
+        """Count a closed order's (item dict, quantity) lines and re-rank its slot."""
+        with self._lock:
+            if not self._loaded:
+                return  # the first load reads this order from the database
+            slot = time_slot(hour)
+            for item, quantity in lines:
+                self._items[item['id']] = item
+                self._counts[slot][item['id']] += quantity
+                self._counts[ALL_DAY][item['id']] += quantity
+            self._top[slot] = self._rank(slot)
+            self._top[ALL_DAY] = self._rank(ALL_DAY)
+
+    def _rank(self, slot):
+        counts = self._counts[slot]
+        ranked = sorted(counts, key=lambda item_id: (-counts[item_id], self._items[item_id]['name']))
+        categories = {}
+        for item_id in ranked:
+            category = self._items[item_id].get('category') or 'General'
+            top = categories.setdefault(category, [])
+            if len(top) < self.top_n:
+                top.append(self._items[item_id])
+        return {
+            'slot': slot,
+            'items': [self._items[item_id] for item_id in ranked[:self.top_n]],
+            'categories': categories,
+        }
+
+    def get(self, slot):
+        """Precomputed quick keys for a slot, falling back to all-day sellers when the slot has no history."""
+        with self._lock:
+            top = self._top.get(slot)
+            if not top or not top['items']:
+                top = self._top.get(ALL_DAY) or {'slot': ALL_DAY, 'items': [], 'categories': {}}
+            return top
@@ -0,0 +1,109 @@
+"""
+Response helpers for large list payloads.
+
+json_response() encodes with orjson when it is installed and falls back to
+the standard library json module otherwise. ResponseCompression negotiates
+br/gzip from Accept-Encoding for responses above COMPRESS_MIN_SIZE bytes.
+"""
+import gzip
+import json
+import os
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'image/svg+xml',
+}
+
+
+def dumps(payload):
+    """Encode a payload to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def gzip_compress(data, level=6):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_compress(data, quality=4):
+    return brotli.compress(data, quality=quality)
+
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts: br if available, else gzip, else None."""
+    br_quality = accept_encodings.quality('br') if brotli is not None else 0
+    gzip_quality = accept_encodings.quality('gzip')
+    if br_quality and br_quality >= gzip_quality:
+        return 'br'
+    if gzip_quality:
+        return 'gzip'
+    return None
+
+
+class ResponseCompression:
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+        self.gzip_level = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+        self.brotli_quality = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+        if os.environ.get('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            app.after_request(self.compress)
+        app.extensions['response_compression'] = self
+
+    def compress(self, response):
+        if (
+            response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli_compress(data, self.brotli_quality)
+        else:
+            compressed = gzip_compress(data, self.gzip_level)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # A compressed body is a different representation of the resource.
+            etag, weak = response.get_etag()
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        return response
@@ -0,0 +1,244 @@
+"""
+Slow-query log.
+
+Times every statement executed through the SQLAlchemy engines and records
+the ones above SLOW_QUERY_THRESHOLD_MS as JSON lines in a rotating log file,
+together with the bound parameters, the calling endpoint and the duration.
+The query plan is captured once per distinct statement with EXPLAIN QUERY
+PLAN on SQLite and plain EXPLAIN on Postgres, so the statement never runs a
+second time. SLOW_QUERY_EXPLAIN_ANALYZE switches Postgres reads to EXPLAIN
+ANALYZE. Only the most recent SLOW_QUERY_MAX_PLANS plans are kept in memory.
+
+Like the application log (see structured_log.py), lines go through a bounded
+queue to a background writer, so a slow request never also waits on the disk.
+"""
+import glob
+import hashlib
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from env_config import env_float, env_int
+from structured_log import NonBlockingQueueHandler
+
+DEFAULT_THRESHOLD_MS = 250
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_MAX_PLANS = 500
+DEFAULT_QUEUE_SIZE = 1000
+
+
+def fingerprint(statement):
+    """Short stable id for a statement, used to link log lines to its plan."""
+    normalized = ' '.join(statement.split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    def __init__(self, app=None, db=None):
+        self.threshold_ms = None
+        self.log_path = None
+        self.logger = None
+        self.listener = None
+        self.explain_analyze = False
+        self.max_plans = DEFAULT_MAX_PLANS
+        self._plans = {}
+        self._plans_lock = threading.Lock()
+        if app is not None and db is not None:
+            self.init_app(app, db)
+
+    @property
+    def enabled(self):
+        return self.threshold_ms is not None
+
+    def init_app(self, app, db):
+        threshold = env_float('SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS)
+        # A negative threshold switches the log off entirely.
+        self.threshold_ms = threshold if threshold >= 0 else None
+        self.log_path = os.environ.get('SLOW_QUERY_LOG_FILE') or os.path.join(
+            app.instance_path, 'slow_queries.log'
+        )
+        self.explain_analyze = os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE', 'false').lower() in ('1', 'true', 'yes')
+        self.max_plans = env_int('SLOW_QUERY_MAX_PLANS', DEFAULT_MAX_PLANS)
+        app.extensions['slow_query_log'] = self
+        if not self.enabled:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        handler = RotatingFileHandler(
+            self.log_path,
+            maxBytes=env_int('SLOW_QUERY_LOG_MAX_BYTES', DEFAULT_MAX_BYTES),
+            backupCount=env_int('SLOW_QUERY_LOG_BACKUPS', DEFAULT_BACKUP_COUNT),
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        log_queue = queue.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+        self.logger = logging.getLogger('khan_sahab.slow_query')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        for existing in list(self.logger.handlers):
+            self.logger.removeHandler(existing)
+            existing.close()
+        self.logger.addHandler(NonBlockingQueueHandler(log_queue))
+
+        self.close()
+        self.listener = QueueListener(log_queue, handler)
+        self.listener.start()
+        # Flush what's queued when the worker exits
+        atexit.register(self.close)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                self.attach(engine)
+
+    def close(self):
+        """Write out the queued lines and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            atexit.unregister(self.close)
+
+    def attach(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        sid = fingerprint(statement)
+        entry = {
+            'ts': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'endpoint': None,
+            'method': None,
+            'path': None,
+            'statement': statement,
+            'parameters': parameters,
+            'executemany': bool(executemany),
+            'statement_id': sid,
+        }
+        if has_request_context():
+            entry['endpoint'] = request.endpoint
+            entry['method'] = request.method
+            entry['path'] = request.path
+
+        with self._plans_lock:
+            first_time = sid not in self._plans
+            if first_time:
+                # Reserve the slot so concurrent requests don't all run EXPLAIN.
+                self._plans[sid] = None
+        if first_time:
+            plan = self._explain(conn, statement, parameters, executemany)
+            with self._plans_lock:
+                self._plans[sid] = plan
+                # Oldest plans go first; a statement seen again after that is explained again
+                while len(self._plans) > self.max_plans:
+                    del self._plans[next(iter(self._plans))]
+            entry['plan'] = plan
+
+        try:
+            self.logger.info(json.dumps(entry, default=str))
+        except Exception:
+            # Never let diagnostics break a request.
+            pass
+
+    def _explain(self, conn, statement, parameters, executemany):
+        """Run the dialect's EXPLAIN for a statement on the same DBAPI connection."""
+        if executemany:
+            # Plans are per statement; explain with the first parameter set.
+            parameters = parameters[0] if parameters else None
+        dialect = conn.dialect.name
+        is_select = statement.lstrip().upper().startswith(('SELECT', 'WITH'))
+        if dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect == 'postgresql' and is_select and self.explain_analyze:
+            # Runs the query again, inside the request that was already slow
+            prefix = 'EXPLAIN ANALYZE '
+        else:
+            # EXPLAIN ANALYZE would execute writes a second time.
+            prefix = 'EXPLAIN '
+
+        use_savepoint = dialect == 'postgresql'
+        cursor = conn.connection.cursor()
+        try:
+            if use_savepoint:
+                # A failing EXPLAIN must not abort the caller's transaction.
+                cursor.execute('SAVEPOINT slow_query_explain')
+            if parameters:
+                cursor.execute(prefix + statement, parameters)
+            else:
+                cursor.execute(prefix + statement)
+            rows = cursor.fetchall()
+            if use_savepoint:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+            return [str(row[-1]) for row in rows]
+        except Exception as e:
+            if use_savepoint:
+                try:
+                    cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                except Exception:
+                    pass
+            return [f'EXPLAIN failed: {e}']
+        finally:
+            cursor.close()
+
+    def query(self, limit=100, endpoint=None, min_duration_ms=None, statement_id=None):
+        """Return the most recent matching log entries plus the plans they reference."""
+        if not self.log_path:
+            return {'entries': [], 'plans': {}}
+
+        paths = [self.log_path] + sorted(
+            glob.glob(self.log_path + '.*'),
+            key=lambda path: int(path.rsplit('.', 1)[-1]) if path.rsplit('.', 1)[-1].isdigit() else 0,
+        )
+        entries = []
+        plans = {}
+        # Rotated files hold older entries; walk newest to oldest.
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as log_file:
+                lines = log_file.readlines()
+            for line in reversed(lines):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 'plan' in entry:
+                    plans.setdefault(entry['statement_id'], entry.pop('plan'))
+                if endpoint and entry.get('endpoint') != endpoint:
+                    continue
+                if min_duration_ms is not None and entry.get('duration_ms', 0) < min_duration_ms:
+                    continue
+                if statement_id and entry.get('statement_id') != statement_id:
+                    continue
+                if len(entries) < limit:
+                    entries.append(entry)
+
+        with self._plans_lock:
+            for sid, plan in self._plans.items():
+                if plan is not None:
+                    plans.setdefault(sid, plan)
+        referenced = {entry['statement_id'] for entry in entries}
+        return {
+            'threshold_ms': self.threshold_ms,
+            'entries': entries,
+            'plans': {sid: plan for sid, plan in plans.items() if sid in referenced},
+        }
@@ -0,0 +1,133 @@
+"""
+Static file serving for the React build.
+
+The build directory is scanned once when the app starts. Every file gets a
+manifest entry with its type, a content hash for the ETag, and any
+precompressed .br/.gz siblings. After that, requests are served from the
+manifest without touching the filesystem to look files up.
+
+Caching depends on the file:
+- Hashed bundles (static/js/main.1a2b3c4d.js) never change under the same
+  name, so they are cached for a year as immutable.
+- index.html and other unhashed files are revalidated on every load with
+  their ETag.
+
+Precompressed variants are sent when the client accepts them. Run this
+module against the build directory after `npm run build` to create them:
+
+    python static_assets.py ../frontend/build
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# CRA puts an 8-character content hash in every bundle name under static/
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+PRECOMPRESS_TYPES = {
+    'application/javascript', 'text/javascript', 'text/css', 'text/html',
+    'application/json', 'image/svg+xml', 'text/plain',
+}
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+class StaticAssets:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.manifest = self.scan()
+
+    def scan(self):
+        """{url path: entry} for every file under the build directory."""
+        manifest = {}
+        if not os.path.isdir(self.root):
+            return manifest
+        for directory, _, files in os.walk(self.root):
+            names = set(files)
+            for name in files:
+                if name.endswith(('.br', '.gz')):
+                    continue
+                path = os.path.join(directory, name)
+                url_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+                manifest[url_path] = {
+                    'path': path,
+                    'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                    'etag': file_hash(path),
+                    'immutable': url_path.startswith('static/') and bool(HASHED_NAME.search(name)),
+                    'variants': {
+                        encoding: path + suffix
+                        for encoding, suffix in ENCODING_SUFFIXES.items() if name + suffix in names
+                    },
+                }
+        return manifest
+
+    def send(self, url_path):
+        """Response for a build file, or None if the build has no such file."""
+        entry = self.manifest.get(url_path)
+        if entry is None:
+            return None
+        path, etag, encoding = entry['path'], entry['etag'], None
+        for candidate in ('br', 'gzip'):
+            if candidate in entry['variants'] and request.accept_encodings.quality(candidate):
+                path, etag, encoding = entry['variants'][candidate], f"{etag}-{candidate}", candidate
+                break
+        response = send_file(
+            path,
+            mimetype=entry['mimetype'],
+            etag=etag,
+            max_age=IMMUTABLE_MAX_AGE if entry['immutable'] else 0,
+            conditional=True,
+        )
+        if entry['immutable']:
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        if entry['variants']:
+            response.vary.add('Accept-Encoding')
+        if encoding and response.status_code != 304:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def precompress(root, min_size=1024):
+    """Write .gz (and .br when Brotli is installed) next to each compressible build file."""
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(('.br', '.gz')) or mimetypes.guess_type(name)[0] not in PRECOMPRESS_TYPES:
+                continue
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            written += 1
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+                written += 1
+    return written
+
+
+if __name__ == '__main__':
+    build_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', 'frontend', 'build')
+    print(f"Wrote {precompress(build_dir)} precompressed files in {os.path.abspath(build_dir)}")
@@ -0,0 +1,31 @@
+# Kitchen Station Printer Configuration
+# Kitchen order tickets (KOTs) are routed to a station by the item's menu category.
+# Change these values to match your kitchen printers.
+
+KOT_STATIONS = {
+    'tandoor': {
+        'host': 'KOT-TANDOOR',  # Station printer's hostname or IP
+        'port': 9100,           # Raw TCP port (usually 9100 for network printers)
+        'categories': ['Indian Breads', 'Veg Starters', 'Non-Veg Starters'],
+    },
+    'chinese': {
+        'host': 'KOT-CHINESE',
+        'port': 9100,
+        'categories': ['Khan Sahab Spl. Chinese', 'Soups'],
+    },
+    'beverages': {
+        'host': 'KOT-BEVERAGES',
+        'port': 9100,
+        'categories': ['Beverages', 'Dessert'],
+    },
+    'main': {
+        'host': 'KOT-MAIN',
+        'port': 9100,
+        'categories': [],
+    },
+}
+
+# Station for categories not listed above
+KOT_DEFAULT_STATION = 'main'
+
+KOT_TIMEOUT_SECONDS = 3  # Connect/send timeout per printer
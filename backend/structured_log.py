@@ -0,0 +1,172 @@
+"""
+Structured application log.
+
+Everything logged under the "khan_sahab" logger is written as one JSON line
+per record. Lines logged inside a request carry that request's correlation
+id, method, path, endpoint and outlet. The id is taken from an incoming
+X-Request-Id header, or generated, and is echoed on the response.
+
+Request threads never wait for the log to be written. A record is put on a
+bounded in-memory queue, and a background thread formats and writes it. If
+the writer falls behind and the queue fills up, new records are dropped and
+counted, and a warning with the count is logged once there is room again.
+
+LOG_SAMPLE_RATE keeps the debug and info lines of only that fraction of
+requests. Warnings and errors are always kept. The decision is made once
+per request, so a sampled request keeps all of its lines.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+from env_config import env_float, env_int
+
+REQUEST_ID_HEADER = 'X-Request-Id'
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+CONTEXT_ATTRIBUTES = ('request_id', 'method', 'path', 'endpoint', 'outlet_id')
+
+
+def get_logger(name):
+    return logging.getLogger(f'khan_sahab.{name}')
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request and applies the per-request sampling decision."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        if record.levelno < logging.WARNING and not g.get('log_sampled', True):
+            return False
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        record.outlet_id = g.get('outlet_id')
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        # Runs under the handler lock, so the counter needs no lock of its own
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.LogRecord(
+                    'khan_sahab.log', logging.WARNING, __file__, 0,
+                    f'Dropped {self.dropped} log records while the log writer was behind', None, None
+                ))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Only merge the message and render any traceback here; JSON encoding happens on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.msg,
+        }
+        for key in CONTEXT_ATTRIBUTES:
+            if getattr(record, key, None) is not None:
+                entry[key] = getattr(record, key)
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in CONTEXT_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredLog:
+    def __init__(self, app=None):
+        self.handler = None
+        self.listener = None
+        self.sample_rate = 1.0
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def dropped(self):
+        return self.handler.dropped if self.handler else 0
+
+    def init_app(self, app):
+        self.sample_rate = min(max(env_float('LOG_SAMPLE_RATE', 1.0), 0.0), 1.0)
+        log_path = os.environ.get('LOG_FILE')
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            writer = RotatingFileHandler(
+                log_path,
+                maxBytes=env_int('LOG_FILE_MAX_BYTES', DEFAULT_MAX_BYTES),
+                backupCount=env_int('LOG_FILE_BACKUPS', DEFAULT_BACKUP_COUNT),
+                encoding='utf-8',
+            )
+        else:
+            writer = logging.StreamHandler(sys.stdout)
+        writer.setFormatter(JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=env_int('LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        self.handler = NonBlockingQueueHandler(log_queue)
+        self.handler.addFilter(RequestContextFilter())
+
+        logger = logging.getLogger('khan_sahab')
+        logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+        logger.propagate = False
+        for existing in list(logger.handlers):
+            logger.removeHandler(existing)
+            existing.close()
+        logger.addHandler(self.handler)
+
+        if self.listener is not None:
+            self.listener.stop()
+        self.listener = QueueListener(log_queue, writer)
+        self.listener.start()
+        # Flush what's queued when the worker exits
+        atexit.register(self.listener.stop)
+
+        app.extensions['structured_log'] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = request_id if VALID_REQUEST_ID.match(request_id) else uuid.uuid4().hex
+        g.log_sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _finish_request(self, response):
+        if 'request_id' in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
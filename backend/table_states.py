@@ -0,0 +1,154 @@
+"""
+Table status transitions.
+
+A table is available, occupied by exactly one open order, or reserved:
+
+    available -> occupied   an order is opened on it
+    available -> reserved   it is held for a booking
+    reserved  -> occupied   the booking arrives and an order is opened
+    reserved  -> available  the booking is cancelled
+    occupied  -> available  its order is paid
+
+Every transition is one compare-and-set UPDATE: the row only changes if it
+is still in a state the transition starts from. Of two terminals opening
+the same table at once, the second UPDATE waits for the first's row lock.
+It then sees the table occupied, changes nothing, and its caller rolls
+back. Only the table's own row is locked, so transitions on different
+tables never wait for each other (on Postgres; SQLite has a single writer
+anyway).
+
+TableBoard keeps each table's number, status and order in memory, as last
+read from the database, so journaled order writes can check a table
+without reaching the database.
+"""
+import threading
+import time
+
+from sqlalchemy import select, update
+
+from structured_log import get_logger
+
+AVAILABLE, OCCUPIED, RESERVED = 'available', 'occupied', 'reserved'
+
+log = get_logger('table_states')
+
+TRANSITIONS = {
+    AVAILABLE: {OCCUPIED, RESERVED},
+    RESERVED: {OCCUPIED, AVAILABLE},
+    OCCUPIED: {AVAILABLE},
+}
+
+
+class TableStateError(Exception):
+    def __init__(self, table_id, status, wanted, current_order_id=None):
+        self.table_id = table_id
+        self.status = status
+        self.current_order_id = current_order_id
+        detail = f' by order {current_order_id}' if status == OCCUPIED and current_order_id else ''
+        super().__init__(f'Table {table_id} is {status}{detail}, so it cannot become {wanted}')
+
+
+def _transition(session, table_model, table_id, status, order_id, *criteria):
+    sources = [source for source, targets in TRANSITIONS.items() if status in targets]
+    changed = session.execute(
+        update(table_model)
+        .where(table_model.id == table_id, table_model.status.in_(sources), *criteria)
+        .values(status=status, current_order_id=order_id)
+    ).rowcount
+    return changed == 1
+
+
+def _current(session, table_model, table_id):
+    return session.execute(
+        select(table_model.status, table_model.current_order_id).where(table_model.id == table_id)
+    ).first()
+
+
+def occupy_table(session, table_model, table_id, order_id):
+    """
+    Seat `order_id` at an available or reserved table in the current
+    transaction. Raises TableStateError if the table is taken; the caller
+    should roll back. Returns False if there is no such table.
+    """
+    if _transition(session, table_model, table_id, OCCUPIED, order_id):
+        return True
+    current = _current(session, table_model, table_id)
+    if current is None:
+        return False
+    raise TableStateError(table_id, current.status, OCCUPIED, current.current_order_id)
+
+
+def release_table(session, table_model, table_id, order_id):
+    """
+    Free the table if `order_id` is still the order occupying it. A table
+    already freed or re-seated with another order is left alone.
+    """
+    return _transition(
+        session, table_model, table_id, AVAILABLE, None, table_model.current_order_id == order_id
+    )
+
+
+def set_table_status(session, table_model, table_id, status):
+    """
+    Reserve a table or cancel its reservation. Occupied tables only change
+    through their orders. Raises TableStateError if the table can't make
+    the move; returns False if there is no such table.
+    """
+    if status not in (AVAILABLE, RESERVED):
+        raise ValueError(f"Tables can only be set to '{AVAILABLE}' or '{RESERVED}' directly")
+    current = _current(session, table_model, table_id)
+    if current is None:
+        return False
+    if current.status == status:
+        return True
+    if current.status != OCCUPIED and _transition(
+        session, table_model, table_id, status, None, table_model.status == current.status
+    ):
+        return True
+    current = _current(session, table_model, table_id)
+    raise TableStateError(table_id, current.status, status, current.current_order_id)
+
+
+class TableBoard:
+    def __init__(self, loader=None, sync_seconds=2.0):
+        # loader() -> list of {'id', 'number', 'status', 'current_order_id'} for every table
+        self.loader = loader
+        self.sync_seconds = sync_seconds
+        self._tables = {}
+        self._loaded = False
+        self._sync_thread = None
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, start_sync=False):
+        if not self._loaded:
+            self.rebuild()
+        if start_sync and self.sync_seconds > 0 and self._sync_thread is None:
+            with self._lock:
+                if self._sync_thread is None:
+                    self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True, name='table-board-sync')
+                    self._sync_thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_seconds)
+            try:
+                self.rebuild()
+            except Exception as e:
+                log.warning('Table board sync failed', extra={'error': str(e)})
+
+    def rebuild(self):
+        """Replace the board with the tables from the database."""
+        tables = {table['id']: table for table in self.loader()}
+        with self._lock:
+            self._tables = tables
+            self._loaded = True
+
+    def update(self, tables):
+        """Record tables just read from the database."""
+        with self._lock:
+            self._tables.update((table['id'], dict(table)) for table in tables)
+
+    def get(self, table_id):
+        """The table as last seen, or None if it isn't known (or the board isn't loaded)."""
+        with self._lock:
+            return self._tables.get(table_id)
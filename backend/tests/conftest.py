@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import time, so point it at a throwaway database first
+_db_dir = tempfile.mkdtemp(prefix='khan_sahab_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+for name in ('ORDER_JOURNAL_PATH', 'OUTLET_DATABASES', 'DATABASE_REPLICA_URL', 'DB_MAINTENANCE_TIME'):
+    os.environ.pop(name, None)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('SLOW_QUERY_LOG_FILE', os.path.join(_db_dir, 'slow_queries.log'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app_module.init_db()
+    return app_module.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_order(client):
+    """A fresh pending order on a new table: (order id, table id)."""
+    table_number = 1000 + len(client.get('/api/tables').get_json())
+    table = client.post('/api/tables', json={'number': table_number}).get_json()
+    menu_item = client.get('/api/menu').get_json()[0]
+    created = client.post('/api/orders', json={
+        'table_id': table['id'],
+        'items': [{'menu_item_id': menu_item['id'], 'quantity': 1}]
+    })
+    assert created.status_code == 201, created.get_json()
+    return created.get_json()['order_id'], table['id']
+
+
+@pytest.fixture
+def order(client):
+    """A fresh pending order on a new table: (order id, table id)."""
+    return create_order(client)
@@ -0,0 +1,34 @@
+import socket
+import threading
+import time
+
+
+class FakePrinter:
+    """A local TCP socket that records every ticket it receives."""
+
+    def __init__(self):
+        self.received = []
+        self._received = threading.Condition()
+        self._server = socket.create_server(('127.0.0.1', 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            conn, _ = self._server.accept()
+            with conn:
+                chunks = []
+                while True:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            with self._received:
+                self.received.append((time.monotonic(), b''.join(chunks)))
+                self._received.notify_all()
+
+    def wait_for(self, count, timeout=5):
+        """Wait until `count` tickets have arrived; returns the tickets received so far."""
+        with self._received:
+            self._received.wait_for(lambda: len(self.received) >= count, timeout)
+            return list(self.received)
@@ -0,0 +1,64 @@
+import threading
+from io import BytesIO
+
+from flask import Flask, jsonify, request, send_file
+
+from admission import AdmissionControl
+
+
+def test_open_kitchen_stream_leaves_reports_and_history_admitted(client):
+    stream = client.get('/api/kitchen/stream', buffered=False)
+    try:
+        assert stream.status_code == 200
+        pools = client.get('/api/admin/admission').get_json()['pools']
+        assert pools['kitchen']['active'] == 1
+
+        assert client.get('/api/bills?from=2020-01-01').status_code == 200
+        assert client.get('/api/kitchen/stream').status_code == 503  # the kitchen's own thread is taken
+    finally:
+        stream.close()
+    assert client.get('/api/admin/admission').get_json()['pools']['kitchen']['active'] == 0
+
+
+def test_rejection_names_the_pool_holding_the_thread():
+    app = Flask(__name__)
+    started, finish = threading.Event(), threading.Event()
+
+    @app.route('/history')
+    def history():
+        started.set()
+        finish.wait(10)
+        return jsonify({})
+
+    @app.route('/report')
+    def report():
+        return jsonify({})
+
+    AdmissionControl(
+        app, lambda: {'history': 'history', 'report': 'reports'}.get(request.endpoint),
+        limits={'reports': 1, 'history': 1, 'kitchen': 1}, threads=3, reserved=1, dedicated=('kitchen',)
+    )
+    holder = threading.Thread(target=lambda: app.test_client().get('/history'))
+    holder.start()
+    try:
+        assert started.wait(10)
+        response = app.test_client().get('/report')
+        assert response.status_code == 503
+        assert 'busy with history requests' in response.get_json()['error']
+    finally:
+        finish.set()
+        holder.join(10)
+
+
+def test_file_download_gives_its_thread_back():
+    app = Flask(__name__)
+
+    @app.route('/reprint')
+    def reprint():
+        return send_file(BytesIO(b'%PDF'), mimetype='application/pdf')
+
+    admission = AdmissionControl(app, lambda: 'reports', limits={'reports': 1}, threads=2, reserved=1)
+    for _ in range(2):
+        with app.test_client().get('/reprint') as response:
+            assert response.status_code == 200
+    assert admission.stats()['heavy_in_use'] == 0
@@ -0,0 +1,38 @@
+def test_batch_returns_each_status(client):
+    response = client.post('/api/batch', json={'requests': [
+        {'method': 'GET', 'path': '/api/tables'},
+        {'method': 'GET', 'path': '/api/orders/999999'},
+        {'method': 'GET', 'path': '/api/kitchen/stream'},
+    ]})
+    assert response.status_code == 200
+    tables, missing, stream = response.get_json()['responses']
+    assert tables['status'] == 200 and isinstance(tables['body'], list)
+    assert missing['status'] == 404
+    assert stream['status'] == 400
+
+
+def test_transaction_rolls_back_on_missing_order(client, order):
+    order_id, table_id = order
+    response = client.post('/api/batch', json={'transaction': True, 'requests': [
+        {'method': 'PUT', 'path': f'/api/orders/{order_id}/status', 'body': {'status': 'paid'}},
+        {'method': 'PUT', 'path': '/api/orders/999999/status', 'body': {'status': 'paid'}},
+        {'method': 'GET', 'path': '/api/tables'},
+    ]})
+    result = response.get_json()
+    assert result['committed'] is False
+    assert [r['status'] for r in result['responses']] == [200, 404, 424]
+    assert client.get(f'/api/orders/{order_id}').get_json()['status'] == 'pending'
+    table = next(t for t in client.get('/api/tables').get_json() if t['id'] == table_id)
+    assert table['status'] == 'occupied'
+
+
+def test_transaction_commits(client, order):
+    order_id, table_id = order
+    result = client.post('/api/batch', json={'transaction': True, 'requests': [
+        {'method': 'PUT', 'path': f'/api/orders/{order_id}/status', 'body': {'status': 'paid'}},
+        {'method': 'POST', 'path': '/api/bills', 'body': {'order_id': order_id, 'payment_method': 'cash'}},
+    ]}).get_json()
+    assert result['committed'] is True
+    assert result['responses'][1]['body']['invoice_number']
+    table = next(t for t in client.get('/api/tables').get_json() if t['id'] == table_id)
+    assert table['status'] == 'available'
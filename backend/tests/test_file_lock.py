@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+from file_lock import open_lock_file, try_lock
+from order_journal import JournalReplayer, OrderJournal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLDER = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from file_lock import open_lock_file, try_lock
+lock_file = open_lock_file(sys.argv[2])
+print('locked' if try_lock(lock_file) else 'busy', flush=True)
+sys.stdin.readline()
+'''
+
+
+def hold_lock(path):
+    """Another process holding the lock until its stdin closes."""
+    holder = subprocess.Popen(
+        [sys.executable, '-c', HOLDER, BACKEND_DIR, path],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    assert holder.stdout.readline().strip() == 'locked'
+    return holder
+
+
+def release(holder):
+    holder.stdin.close()
+    assert holder.wait(timeout=10) == 0
+
+
+def test_only_one_process_holds_the_lock(tmp_path):
+    path = str(tmp_path / 'maintenance.lock')
+    holder = hold_lock(path)
+    try:
+        with open_lock_file(path) as lock_file:
+            assert not try_lock(lock_file)
+    finally:
+        release(holder)
+    with open_lock_file(path) as lock_file:
+        assert try_lock(lock_file)
+
+
+def test_replayer_waits_for_the_other_process_to_let_go(tmp_path):
+    journal = OrderJournal(str(tmp_path / 'orders.journal'))
+    replayer = JournalReplayer(journal, apply=lambda entry: None, is_unavailable=lambda e: False)
+    holder = hold_lock(journal.path + '.lock')
+    try:
+        assert not replayer._holds_lock()
+    finally:
+        release(holder)
+    assert replayer._holds_lock()
+    assert replayer._holds_lock()  # kept for the life of the process
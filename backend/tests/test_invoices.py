@@ -0,0 +1,23 @@
+from conftest import create_order
+
+
+def bill(client, outlet_id=None):
+    order_id, _ = create_order(client)
+    response = client.post('/api/bills', json={'order_id': order_id, 'outlet_id': outlet_id})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['invoice_number']
+
+
+def test_outlets_sharing_a_database_number_their_own_series(client):
+    branch = client.post('/api/outlets', json={'name': 'Branch'}).get_json()['id']
+
+    own = [bill(client), bill(client)]
+    shared = [bill(client, branch), bill(client, branch)]
+
+    own_series, own_numbers = zip(*(number.rsplit('/', 1) for number in own))
+    shared_series, shared_numbers = zip(*(number.rsplit('/', 1) for number in shared))
+    assert len(set(own_series)) == 1 and '/' not in own_series[0]
+    assert shared_series == (f'{branch}/{own_series[0]}',) * 2
+    # Neither outlet's bills leave gaps in the other's series
+    assert int(own_numbers[1]) == int(own_numbers[0]) + 1
+    assert shared_numbers == ('00001', '00002')
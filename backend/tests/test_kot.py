@@ -0,0 +1,76 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+import kot
+from fake_printer import FakePrinter
+from kot import KOTDispatcher, route_lines
+
+STATIONS = {
+    'tandoor': {'categories': ['Indian Breads']},
+    'chinese': {'categories': ['Khan Sahab Spl. Chinese']},
+    'beverages': {'categories': ['Beverages']},
+    'main': {'categories': []},
+}
+
+LINES = [
+    {'name': 'Butter Naan', 'category': 'Indian Breads', 'quantity': 4},
+    {'name': 'Chicken Chilli', 'category': 'Khan Sahab Spl. Chinese', 'quantity': 1},
+    {'name': 'Mint Mojito', 'category': 'beverages', 'quantity': 2},
+    {'name': 'Dal Makhani', 'category': 'Khan Sahab Veg Special', 'quantity': 1},
+    {'name': 'Garlic Naan', 'category': 'Indian Breads', 'quantity': 2},
+]
+
+
+def test_lines_are_routed_by_category_in_order():
+    routed = route_lines(LINES, STATIONS, 'main')
+    assert {station: [line['name'] for line in lines] for station, lines in routed.items()} == {
+        'tandoor': ['Butter Naan', 'Garlic Naan'],
+        'chinese': ['Chicken Chilli'],
+        'beverages': ['Mint Mojito'],
+        'main': ['Dal Makhani'],
+    }
+
+
+@pytest.fixture
+def printers():
+    return {name: FakePrinter() for name in STATIONS}
+
+
+def test_offline_station_does_not_hold_up_or_drop_the_others(printers, monkeypatch):
+    stations = {
+        name: {**config, 'host': '127.0.0.1', 'port': printers[name].port} for name, config in STATIONS.items()
+    }
+    # The tandoor printer hangs until its timeout, then refuses
+    offline_port = stations['tandoor']['port']
+    hung, timed_out = threading.Event(), threading.Event()
+    send_to_printer = kot.send_to_printer
+
+    def send(host, port, data, timeout):
+        if port == offline_port:
+            hung.set()
+            timed_out.wait(10)
+            raise ConnectionRefusedError('printer offline')
+        send_to_printer(host, port, data, timeout)
+
+    monkeypatch.setattr(kot, 'send_to_printer', send)
+    dispatcher = KOTDispatcher(stations, 'main', timeout=1, retries=1)
+
+    first = dispatcher.dispatch(17, 5, LINES, datetime(2025, 1, 1, 20, 30))
+    second = dispatcher.dispatch(17, 5, LINES[1:3], datetime(2025, 1, 1, 20, 35), add_on=True)
+    try:
+        assert hung.wait(10)
+        for name, count in (('chinese', 2), ('beverages', 2), ('main', 1)):
+            tickets = printers[name].wait_for(count)
+            assert len(tickets) == count, name
+        assert b'Dal Makhani' in printers['main'].received[0][1]
+        assert b'** ADD-ON **' in printers['chinese'].received[1][1]
+        assert b'Chicken Chilli' in printers['chinese'].received[0][1]
+        assert not first['tandoor'].done()
+    finally:
+        timed_out.set()
+    assert first['tandoor'].result(10) is False
+    assert all(future.result(10) for name, future in first.items() if name != 'tandoor')
+    assert all(future.result(10) for future in second.values())
+    assert printers['tandoor'].received == []
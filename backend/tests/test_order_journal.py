@@ -0,0 +1,179 @@
+import threading
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+from order_journal import JournalConflict, JournalReplayer, OrderJournal
+
+
+class Unavailable(Exception):
+    pass
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-replay: not caught by the replayer."""
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = OrderJournal(str(tmp_path / 'orders.journal'))
+    journal.seed(1, 100)
+    return journal
+
+
+def test_append_takes_order_ids_from_the_seeded_counter(journal):
+    assert journal.append(1, 'create_order', {'table_id': 5, 'items': []}) == (1, 101)
+    assert journal.append(1, 'update_order', {'items': []}, order_id=101) == (2, 101)
+    assert journal.append(1, 'create_order', {'table_id': 6, 'items': []}) == (3, 102)
+    journal.seed(1, 500)  # the primary moved on; new ids start above it
+    assert journal.append(1, 'create_order', {'table_id': 7, 'items': []})[1] == 501
+    assert journal.last_order_id(1) == 501
+    assert journal.last_order_id(2) is None
+    assert [entry['seq'] for entry in journal.unapplied(1, 101)] == [1, 2]
+
+
+def test_replay_applies_entries_in_order_and_parks_conflicts(journal):
+    for table_id in (1, 2, 3):
+        journal.append(1, 'create_order', {'table_id': table_id, 'items': []})
+    journal.append(1, 'update_order', {'items': []}, order_id=102)
+    applied = []
+
+    def apply(entry):
+        if entry['payload'].get('table_id') == 2:
+            raise JournalConflict('Table 2 is occupied')
+        applied.append(entry['seq'])
+
+    assert JournalReplayer(journal, apply, lambda e: isinstance(e, Unavailable)).replay() == 2
+    assert applied == [1, 3]
+    # The update to the parked order is parked behind it rather than applied out of order
+    assert journal.counts() == {'applied': 2, 'conflict': 2}
+
+
+def test_replay_stops_while_the_primary_is_unavailable(journal):
+    for table_id in (1, 2, 3):
+        journal.append(1, 'create_order', {'table_id': table_id, 'items': []})
+    down = True
+    applied = []
+
+    def apply(entry):
+        if entry['seq'] == 2 and down:
+            raise Unavailable('connection refused')
+        applied.append(entry['seq'])
+
+    replayer = JournalReplayer(journal, apply, lambda e: isinstance(e, Unavailable))
+    assert replayer.replay() == 1
+    head = journal.next_pending()
+    assert (head['seq'], head['attempts'], head['error']) == (2, 1, 'connection refused')
+    down = False
+    assert replayer.replay() == 2
+    assert applied == [1, 2, 3]
+
+
+def test_replay_interrupted_after_a_write_applies_it_once(journal):
+    for table_id in (1, 2):
+        journal.append(1, 'create_order', {'table_id': table_id, 'items': []})
+    written = {}
+    crash = True
+
+    def apply(entry):
+        nonlocal crash
+        if entry['order_id'] in written:
+            return  # already committed, as apply_journal_entry detects
+        written[entry['order_id']] = entry['payload']['table_id']
+        if crash:
+            crash = False
+            raise Crash()
+
+    replayer = JournalReplayer(journal, apply, lambda e: False)
+    with pytest.raises(Crash):
+        replayer.replay()
+    assert journal.next_pending()['seq'] == 1
+    assert replayer.replay() == 2
+    assert written == {101: 1, 102: 2}
+    assert journal.counts() == {'applied': 2}
+
+
+@pytest.fixture
+def journaled_app(app, tmp_path, monkeypatch):
+    """The app with the order journal on; the replayer runs only when a test calls replay()."""
+    journal = OrderJournal(str(tmp_path / 'orders.journal'))
+    replayer = JournalReplayer(
+        journal, apply=app_module.apply_journal_entry, is_unavailable=app_module.database_unavailable
+    )
+    monkeypatch.setattr(replayer, 'start', lambda: None)
+    monkeypatch.setattr(replayer, 'kick', lambda: None)
+    monkeypatch.setattr(app_module, 'order_journal', journal)
+    monkeypatch.setattr(app_module, 'journal_replayer', replayer)
+    monkeypatch.setattr(app_module, '_journal_warming', {app_module.DEFAULT_OUTLET_ID})
+    monkeypatch.setattr(app_module, '_journal_seeded', {app_module.DEFAULT_OUTLET_ID})
+    app_module.warm_journal_outlet(app_module.DEFAULT_OUTLET_ID)
+    dispatched = []
+    monkeypatch.setattr(app_module, 'kot_dispatcher', type('Dispatcher', (), {
+        'dispatch': lambda self, order_id, table_number, lines, printed_at, add_on=False:
+            dispatched.append((order_id, table_number, [(line['name'], line['quantity']) for line in lines], add_on))
+    })())
+    return replayer, dispatched
+
+
+def test_journaled_order_writes_answer_without_the_database(app, client, journaled_app):
+    replayer, dispatched = journaled_app
+    table_number = 2000 + len(client.get('/api/tables').get_json())
+    busy_table, table = (
+        client.post('/api/tables', json={'number': number}).get_json() for number in (table_number, table_number + 1)
+    )
+    menu_item = client.get('/api/menu').get_json()[0]
+    client.post('/api/orders', json={'table_id': busy_table['id'], 'items': []})
+    assert replayer.replay() == 1
+    client.get('/api/tables')  # the POS refreshes its table list, and the board with it
+    dispatched.clear()
+
+    statements = []
+    this_thread = threading.get_ident()
+
+    def record(conn, cursor, statement, *args):
+        if threading.get_ident() == this_thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        created = client.post('/api/orders', json={
+            'table_id': table['id'], 'items': [{'menu_item_id': menu_item['id'], 'quantity': 1}]
+        })
+        order_id = created.get_json()['order_id']
+        updated = client.put(f'/api/orders/{order_id}', json={
+            'items': [{'menu_item_id': menu_item['id'], 'quantity': 3}]
+        })
+        occupied = client.post('/api/orders', json={
+            'table_id': busy_table['id'], 'items': [{'menu_item_id': menu_item['id'], 'quantity': 1}]
+        })
+        missing = client.put(f'/api/orders/{order_id + 1000}', json={'items': []})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert (created.status_code, updated.status_code, occupied.status_code, missing.status_code) == (202, 202, 409, 404)
+    assert statements == []
+    # The kitchen heard about both writes before any replay
+    ticket = app_module.kitchen_queue_for(app_module.DEFAULT_OUTLET_ID).ticket(order_id)
+    assert (ticket['table_number'], [item['quantity'] for item in ticket['items']]) == (table_number + 1, [3])
+    assert dispatched == [
+        (order_id, table_number + 1, [(menu_item['name'], 1)], False),
+        (order_id, table_number + 1, [(menu_item['name'], 2)], True),
+    ]
+
+    assert replayer.replay() == 2
+    assert client.get(f'/api/orders/{order_id}').get_json()['items'][0]['quantity'] == 3
+    assert len(dispatched) == 2  # replay doesn't print the tickets again
+
+
+def test_unavailable_primary_is_retried_not_parked(journal):
+    journal.append(1, 'create_order', {'table_id': 1, 'items': []})
+
+    def apply(entry):
+        raise OperationalError('SELECT 1', {}, Exception('could not connect'))
+
+    assert JournalReplayer(journal, apply, app_module.database_unavailable).replay() == 0
+    assert journal.counts() == {'pending': 1}
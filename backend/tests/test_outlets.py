@@ -0,0 +1,23 @@
+import app as app_module
+
+
+def test_unknown_outlet_ids_are_turned_away_without_creating_state(client):
+    before = (len(app_module.kitchen_queues), len(app_module.menu_search_indexes), len(app_module.quick_keys))
+    for outlet_id in (9001, 9002):
+        assert client.get('/api/kitchen/queue', headers={'X-Outlet-Id': str(outlet_id)}).status_code == 404
+        assert client.get(f'/api/menu/search?q=naan&outlet_id={outlet_id}').status_code == 404
+        assert client.get('/api/menu/quick-keys', headers={'X-Outlet-Id': str(outlet_id)}).status_code == 404
+    assert (len(app_module.kitchen_queues), len(app_module.menu_search_indexes), len(app_module.quick_keys)) == before
+    assert client.get('/api/tables', headers={'X-Outlet-Id': 'abc'}).status_code == 400
+
+
+def test_outlets_sharing_the_default_database_share_its_state(client):
+    branch = client.post('/api/outlets', json={'name': 'Shared Branch'}).get_json()['id']
+    assert client.get('/api/kitchen/queue', headers={'X-Outlet-Id': str(branch)}).status_code == 200
+    assert client.get(f'/api/menu/search?q=naan&outlet_id={branch}').status_code == 200
+
+    default = app_module.DEFAULT_OUTLET_ID
+    assert app_module.kitchen_queue_for(branch) is app_module.kitchen_queue_for(default)
+    assert app_module.menu_search_for(branch) is app_module.menu_search_for(default)
+    assert app_module.quick_keys_for(branch) is app_module.quick_keys_for(default)
+    assert branch not in app_module.kitchen_queues and branch not in app_module.menu_search_indexes
@@ -0,0 +1,19 @@
+import app as app_module
+
+
+def test_orders_serve_stored_totals(app, client, order):
+    order_id, _ = order
+    client.put(f'/api/orders/{order_id}/pricing', json={'tax_rate': 5})
+    with app.app_context():
+        stored = app_module.db.session.get(app_module.Order, order_id)
+        expected_tax, expected_total = stored.tax_amount_paise, stored.final_total_paise
+        assert expected_total % 1000 == 0  # rounded to the nearest ten rupees
+        # Mark the stored figures so the test can tell them from recomputed ones
+        stored.tax_amount_paise, stored.final_total_paise = expected_tax + 1, expected_total + 1000
+        app_module.db.session.commit()
+
+    single = client.get(f'/api/orders/{order_id}').get_json()
+    listed = next(o for o in client.get('/api/orders?fields=id,tax_amount,total').get_json() if o['id'] == order_id)
+    for payload in (single, listed):
+        assert payload['tax_amount'] == (expected_tax + 1) / 100
+        assert payload['total'] == (expected_total + 1000) / 100
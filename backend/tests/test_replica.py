@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+import sqlalchemy as sa
+
+import app as app_module
+from conftest import create_order
+from outlet_routing import READ_YOUR_WRITES_HEADER, REPLICA_BIND
+
+FRESH = {READ_YOUR_WRITES_HEADER: '1'}
+
+
+def add_bill(client):
+    order_id, _ = create_order(client)
+    response = client.post('/api/bills', json={'order_id': order_id})
+    assert response.status_code == 200, response.get_json()
+    return order_id, response.get_json()['bill_id']
+
+
+def use_replica(app, monkeypatch, path):
+    """Point the replica bind at its own SQLite file, as DATABASE_REPLICA_URL would."""
+    monkeypatch.setattr(app_module.replica_reads, '_down_until', 0.0)
+    with app.app_context():
+        monkeypatch.setitem(app_module.db.engines, REPLICA_BIND, sa.create_engine(f'sqlite:///{path}'))
+
+
+def copy_primary(app, path):
+    with app.app_context():
+        primary = sqlite3.connect(app_module.db.engine.url.database)
+    with primary, sqlite3.connect(path) as replica:
+        primary.backup(replica)
+    primary.close()
+
+
+def order_ids(client, headers=None):
+    return {order['id'] for order in client.get('/api/orders', headers=headers).get_json()}
+
+
+def thermal_pdf_status(client, bill_id, headers=None):
+    with client.get(f'/api/bills/thermal-pdf?ids={bill_id}', headers=headers) as response:
+        return response.status_code
+
+
+def billed_total(client, headers=None):
+    return client.get('/api/reports/outlets', headers=headers).get_json()['combined']['total']
+
+
+def test_reads_come_from_the_replica_unless_the_client_needs_its_writes(app, client, monkeypatch, tmp_path):
+    add_bill(client)
+    replica_path = tmp_path / 'replica.db'
+    copy_primary(app, replica_path)
+    use_replica(app, monkeypatch, replica_path)
+
+    # Committed on the primary after the replica was copied
+    order_id, bill_id = add_bill(client)
+    assert order_id not in order_ids(client)
+    assert order_id in order_ids(client, FRESH)
+    assert billed_total(client) < billed_total(client, FRESH)
+    assert thermal_pdf_status(client, bill_id) == 404
+    assert thermal_pdf_status(client, bill_id, FRESH) == 200
+
+
+@pytest.mark.parametrize('read', ['orders', 'report', 'thermal-pdf'])
+def test_missing_replica_falls_back_to_the_primary(app, client, monkeypatch, tmp_path, read):
+    use_replica(app, monkeypatch, tmp_path / 'missing' / 'replica.db')
+    order_id, bill_id = add_bill(client)
+
+    if read == 'orders':
+        assert order_id in order_ids(client)
+    elif read == 'report':
+        report = client.get('/api/reports/outlets').get_json()
+        assert all('error' not in outlet for outlet in report['outlets'])
+        assert report['combined']['total'] == billed_total(client, FRESH)
+    else:
+        assert thermal_pdf_status(client, bill_id) == 200
+    # The replica is left alone for a while after failing
+    assert app_module.replica_reads._down_until > 0
@@ -0,0 +1,25 @@
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from slow_query_log import SlowQueryLog
+
+
+def test_plans_are_capped_and_lines_written_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setenv('SLOW_QUERY_THRESHOLD_MS', '0')
+    monkeypatch.setenv('SLOW_QUERY_MAX_PLANS', '2')
+    monkeypatch.setenv('SLOW_QUERY_LOG_FILE', str(tmp_path / 'slow_queries.log'))
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'slow.db'}"
+    db = SQLAlchemy(app)
+    slow_query_log = SlowQueryLog(app, db)
+
+    with app.app_context():
+        for value in range(3):
+            db.session.execute(text(f'SELECT {value}'))
+    assert [plan is not None for plan in slow_query_log._plans.values()] == [True, True]
+
+    slow_query_log.close()  # waits for the writer to catch up
+    result = slow_query_log.query()
+    assert [entry['statement'] for entry in result['entries']] == ['SELECT 2', 'SELECT 1', 'SELECT 0']
+    assert set(result['plans']) == {entry['statement_id'] for entry in result['entries']}
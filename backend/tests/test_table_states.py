@@ -0,0 +1,56 @@
+import threading
+
+import app as app_module
+
+
+def new_tables(client, count):
+    first = 1000 + len(client.get('/api/tables').get_json())
+    return [client.post('/api/tables', json={'number': first + i}).get_json()['id'] for i in range(count)]
+
+
+def open_concurrently(app, client, table_ids):
+    """POST /api/orders for each table id from its own terminal at the same moment."""
+    menu_item = client.get('/api/menu').get_json()[0]
+    start = threading.Barrier(len(table_ids))
+    responses = []
+
+    def open_table(table_id):
+        terminal = app.test_client()
+        start.wait()
+        response = terminal.post('/api/orders', json={
+            'table_id': table_id,
+            'items': [{'menu_item_id': menu_item['id'], 'quantity': 1}]
+        })
+        responses.append((table_id, response.status_code, response.get_json()))
+
+    terminals = [threading.Thread(target=open_table, args=(table_id,)) for table_id in table_ids]
+    for terminal in terminals:
+        terminal.start()
+    for terminal in terminals:
+        terminal.join(timeout=30)
+    return responses
+
+
+def test_concurrent_orders_on_one_table_one_wins(app, client):
+    table_id, = new_tables(client, 1)
+    responses = open_concurrently(app, client, [table_id, table_id])
+
+    assert sorted(status for _, status, _ in responses) == [201, 409], responses
+    winner = next(body for _, status, body in responses if status == 201)
+    loser = next(body for _, status, body in responses if status == 409)
+    assert loser['current_order_id'] == winner['order_id']
+    with app.app_context():
+        table = app_module.db.session.get(app_module.Table, table_id)
+        assert (table.status, table.current_order_id) == ('occupied', winner['order_id'])
+        assert app_module.Order.query.filter_by(table_id=table_id).count() == 1
+
+
+def test_concurrent_orders_on_different_tables_both_open(app, client):
+    table_ids = new_tables(client, 2)
+    responses = open_concurrently(app, client, table_ids)
+
+    assert [status for _, status, _ in responses] == [201, 201], responses
+    with app.app_context():
+        for table_id, _, body in responses:
+            table = app_module.db.session.get(app_module.Table, table_id)
+            assert (table.status, table.current_order_id) == ('occupied', body['order_id'])
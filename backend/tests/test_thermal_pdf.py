@@ -0,0 +1,58 @@
+import base64
+import re
+import zlib
+
+from thermal_pdf import BatchRenderer
+
+
+def bill(number):
+    return {
+        'invoice_number': f'2026-27/{number:05d}',
+        'date': '19/10/2026',
+        'time': '09:30 pm',
+        'table_number': number,
+        'items': [{'name': 'Chicken Biryani', 'qty': 2, 'price': 280.0}, {'name': 'Rumali Roti', 'qty': 4, 'price': 25.0}],
+        'subtotal': 660.0,
+        'tax_rate': 0.05,
+        'tax_amount': 33.0,
+        'total': 690,
+    }
+
+
+def content_streams(pdf):
+    """Decoded page content streams (ReportLab writes them ASCII85 + Flate encoded)."""
+    streams = []
+    for header, data in re.findall(rb'<<(.*?)>>\s*stream\r?\n(.*?)endstream', pdf, re.S):
+        if b'/Subtype /Image' in header:
+            continue
+        data = data.strip()
+        if b'ASCII85Decode' in header:
+            data = base64.a85decode(data[:-2] if data.endswith(b'~>') else data)
+        if b'FlateDecode' in header:
+            data = zlib.decompress(data)
+        streams.append(data.decode('latin-1'))
+    return streams
+
+
+def font_names(pdf):
+    return {name.decode(): base.decode() for base, name in re.findall(rb'/BaseFont /(\S+) .*?/Name /(\S+)', pdf)}
+
+
+def font_before(stream, string):
+    """The font resource selected when `string` is drawn."""
+    return re.findall(r'/(\S+) [\d.]+ Tf', stream[:stream.index(f'({string}) Tj')])[-1]
+
+
+def test_stitched_pages_keep_their_text_and_fonts():
+    bills = [(bill(number), None) for number in range(1, 6)]
+    # Pages are drawn in separate worker processes, then stitched into one document
+    pdf = BatchRenderer(max_workers=2, chunk_size=2, min_pool_bills=1).render(bills)
+
+    assert len(re.findall(rb'/Type /Page\b(?!s)', pdf)) == len(bills)
+    streams = [stream for stream in content_streams(pdf) if ' Tj' in stream]
+    assert len(streams) == len(bills)
+    fonts = font_names(pdf)
+    for number, stream in enumerate(streams, start=1):
+        assert f'(Invoice: 2026-27/{number:05d}) Tj' in stream
+        assert fonts[font_before(stream, 'TAX INVOICE')] == 'Helvetica-Bold'
+        assert fonts[font_before(stream, 'Cash Sale')] == 'Helvetica'
@@ -0,0 +1,133 @@
+"""
+Printer-ready raster of the restaurant logo.
+
+The colour JPEG is converted once into a 1-bit, Floyd-Steinberg dithered
+image as wide as the thermal paper's print area (72 mm, 576 dots at
+203 dpi). The logo is scaled to fit LOGO_MAX_HEIGHT_DOTS and centred. The
+result is cached as a small PNG in backend/instance, keyed by the source
+file and the settings, and kept in memory. Each bill then reuses:
+
+- logo_data_uri(): a data: URI for the <img> in HTML bills
+- logo_raster_command(): an ESC/POS "GS v 0" raster command for network printers
+
+Both return None when Pillow is missing or the logo can't be read. Bills
+then fall back to the text header.
+
+    python thermal_logo.py                        # build the cache
+    python thermal_logo.py --print 192.168.1.50   # test print on a network printer
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency (installed with reportlab)
+    Image = None
+
+from structured_log import get_logger
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+LOGO_PATH = os.path.join(BASE_DIR, 'khan_sahab_logo.jpg')
+CACHE_DIR = os.path.join(BASE_DIR, 'instance')
+
+PAPER_WIDTH_DOTS = 576  # 72 mm print width at 203 dpi
+LOGO_MAX_HEIGHT_DOTS = 240
+
+_cache = {}
+_lock = threading.Lock()
+
+log = get_logger('thermal_logo')
+
+
+def cache_path(source=LOGO_PATH):
+    stat = os.stat(source)
+    key = f'{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}:{PAPER_WIDTH_DOTS}:{LOGO_MAX_HEIGHT_DOTS}'
+    return os.path.join(CACHE_DIR, f'thermal_logo_{hashlib.sha1(key.encode()).hexdigest()[:12]}.png')
+
+
+def rasterize(source=LOGO_PATH):
+    """Paper-width 1-bit image of the logo (white background, black ink)."""
+    with Image.open(source) as image:
+        grey = ImageOps.autocontrast(ImageOps.grayscale(image))
+    grey.thumbnail((PAPER_WIDTH_DOTS, LOGO_MAX_HEIGHT_DOTS), Image.LANCZOS)
+    canvas = Image.new('L', (PAPER_WIDTH_DOTS, grey.height), 255)
+    canvas.paste(grey, ((PAPER_WIDTH_DOTS - grey.width) // 2, 0))
+    return canvas.convert('1', dither=Image.FLOYDSTEINBERG)
+
+
+def load_logo(source=LOGO_PATH):
+    """The cached 1-bit logo as PNG bytes, building it on first use. None if unavailable."""
+    if Image is None:
+        return None
+    with _lock:
+        if source in _cache:
+            return _cache[source]
+        try:
+            path = cache_path(source)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    png = f.read()
+            else:
+                buffer = io.BytesIO()
+                rasterize(source).save(buffer, format='PNG', optimize=True)
+                png = buffer.getvalue()
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(png)
+        except OSError as e:
+            log.warning('Thermal logo unavailable', extra={'error': str(e)})
+            png = None
+        _cache[source] = png
+        return png
+
+
+def logo_data_uri(source=LOGO_PATH):
+    png = load_logo(source)
+    if png is None:
+        return None
+    key = ('uri', source)
+    if key not in _cache:
+        _cache[key] = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+    return _cache[key]
+
+
+def logo_raster_command(source=LOGO_PATH):
+    """ESC/POS bytes that print the logo (GS v 0, normal density)."""
+    png = load_logo(source)
+    if png is None:
+        return None
+    key = ('escpos', source)
+    if key not in _cache:
+        with Image.open(io.BytesIO(png)) as image:
+            width, height = image.size
+            # PIL packs 1-bit rows MSB first with 1 = white; ESC/POS wants 1 = black
+            data = bytes(byte ^ 0xFF for byte in image.convert('1').tobytes())
+        width_bytes = width // 8
+        _cache[key] = (
+            b'\x1dv0\x00'
+            + bytes([width_bytes & 0xFF, width_bytes >> 8, height & 0xFF, height >> 8])
+            + data
+        )
+    return _cache[key]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build the thermal logo cache, optionally test-printing it.')
+    parser.add_argument('--print', dest='host', help='Network printer to send a test print to')
+    parser.add_argument('--port', type=int, default=9100)
+    args = parser.parse_args()
+
+    png = load_logo()
+    if png is None:
+        raise SystemExit('Could not build the thermal logo (is Pillow installed?)')
+    print(f'{cache_path()}: {len(png)} bytes PNG, {len(logo_data_uri())} byte data URI, '
+          f'{len(logo_raster_command())} byte ESC/POS raster')
+    if args.host:
+        from kot import ESC_INIT, GS_FEED_AND_CUT, send_to_printer
+        send_to_printer(args.host, args.port, ESC_INIT + logo_raster_command() + b'\n' + GS_FEED_AND_CUT, timeout=5)
+        print(f'Sent test print to {args.host}:{args.port}')
@@ -0,0 +1,265 @@
+"""
+Batch reprints of thermal bills as one PDF.
+
+Every bill becomes one page of a single PDF, 72 mm wide and as tall as the
+bill. Pages carry the same header, line items and totals as the HTML
+thermal bill, both built from RestaurantBillGenerator.bill_summary().
+
+Pages are drawn in a process pool. Each worker sets up its fonts and a
+scratch canvas once, in init_worker(), and reuses them for every bill it
+draws. A worker returns each page as its finished PDF content stream, built
+with ReportLab's text objects (PDFTextObject.getCode()) and plain path
+operators for the rules. The parent only stitches the streams into one
+document with Canvas.addLiteral() and places the logo. Stitching works
+because the bills use the standard Helvetica fonts, and new_canvas() maps
+them in the same order in every document, so they get the same resource
+names. Embedded TrueType subsets differ per document, so they can't be used
+this way. tests/test_thermal_pdf.py checks the stitched output. Small
+batches skip the pool and are drawn in-process.
+
+Helvetica has no rupee sign, so amounts are printed as "Rs.".
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from printer import RestaurantBillGenerator
+from thermal_logo import load_logo
+
+PAGE_WIDTH = 72 * mm
+MARGIN = 3 * mm
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+FONT, BOLD_FONT = 'Helvetica', 'Helvetica-Bold'
+
+# Item table columns as fractions of the content width, like the HTML bill's table
+ITEM_WIDTH, QTY_CENTRE, RATE_RIGHT = 0.40, 0.46, 0.76
+
+_scratch = None
+_scratch_lock = threading.Lock()  # in-process renders share the scratch canvas across request threads
+
+
+def new_canvas(buffer):
+    """A canvas with both bill fonts mapped in a fixed order, so their resource names match across documents."""
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_WIDTH), pageCompression=1)
+    pdf.setFont(BOLD_FONT, 8)
+    pdf.setFont(FONT, 8)
+    return pdf
+
+
+def init_worker():
+    """Load the font metrics and the scratch canvas once per process (pool initializer)."""
+    global _scratch
+    if _scratch is None:
+        for font in (FONT, BOLD_FONT):
+            pdfmetrics.getFont(font)
+        _scratch = new_canvas(io.BytesIO())
+
+
+def rupees(amount):
+    return f'Rs.{amount:.2f}'
+
+
+class PageLayout:
+    """Collects the drawing operations for one bill, top to bottom."""
+
+    def __init__(self):
+        self.ops = []
+        self.y = MARGIN  # distance from the top of the page
+
+    def text(self, string, size=8, bold=False, align='left', x=None):
+        font = BOLD_FONT if bold else FONT
+        if x is None:
+            x = {'left': MARGIN, 'centre': PAGE_WIDTH / 2, 'right': PAGE_WIDTH - MARGIN}[align]
+        self.ops.append(('text', font, size, x, self.y + size, str(string), align))
+
+    def line(self, string, size=8, bold=False, align='left'):
+        self.text(string, size, bold, align)
+        self.advance(size)
+
+    def wrapped(self, string, size=8, bold=False, align='centre'):
+        for part in simpleSplit(str(string), BOLD_FONT if bold else FONT, size, CONTENT_WIDTH) or ['']:
+            self.line(part, size, bold, align)
+
+    def row(self, left, right, size=8, bold=False):
+        self.text(left, size, bold)
+        self.text(right, size, bold, align='right')
+        self.advance(size)
+
+    def rule(self, double=False):
+        self.y += 2
+        self.ops.append(('rule', self.y))
+        if double:
+            self.y += 1.5
+            self.ops.append(('rule', self.y))
+        self.y += 3
+
+    def advance(self, size):
+        self.y += size * 1.3
+
+
+def layout_bill(bill_data, outlet=None, with_logo=False):
+    """(page height, drawing operations) for one bill."""
+    summary = RestaurantBillGenerator.bill_summary(bill_data, outlet)
+    page = PageLayout()
+
+    if with_logo:
+        page.ops.append(('logo', page.y))
+        page.y += CONTENT_WIDTH * logo_aspect() + 2
+    else:
+        page.line('KHAN SAHAB', 14, bold=True, align='centre')
+    page.line('HALAL', 7, align='centre')
+    page.line('UNIT OF TUAHA FOOD', 7, align='centre')
+    page.wrapped(summary['restaurant_name'], 10, bold=True)
+    page.wrapped(summary['address'], 7)
+    page.line(f"Ph: {summary['phone']}", 7, align='centre')
+    page.line(f"GSTIN: {summary['gstin']}", 7, align='centre')
+    page.line(f"FSSAI: {summary['fssai']}", 7, align='centre')
+    page.rule()
+
+    page.line('TAX INVOICE', 9, bold=True, align='centre')
+    page.row('Cash Sale', f"Date: {summary['date']}")
+    page.row(f"Invoice: {summary['invoice_number']}", f"Time: {summary['time']}")
+    page.row(f"Table No: {summary['table_number']}", '')
+    page.rule()
+
+    qty_x = MARGIN + CONTENT_WIDTH * QTY_CENTRE
+    rate_x = MARGIN + CONTENT_WIDTH * RATE_RIGHT
+    page.text('ITEM', 7, bold=True)
+    page.text('QTY', 7, bold=True, align='centre', x=qty_x)
+    page.text('RATE', 7, bold=True, align='right', x=rate_x)
+    page.text('AMT', 7, bold=True, align='right')
+    page.advance(7)
+    page.rule()
+    for name, qty, price, amount in summary['items']:
+        parts = simpleSplit(str(name), BOLD_FONT, 7.5, CONTENT_WIDTH * ITEM_WIDTH) or ['']
+        page.text(parts[0], 7.5, bold=True)
+        page.text(qty, 7.5, align='centre', x=qty_x)
+        page.text(rupees(price), 7.5, align='right', x=rate_x)
+        page.text(rupees(amount), 7.5, align='right')
+        page.advance(7.5)
+        for part in parts[1:]:
+            page.line(part, 7.5, bold=True)
+    page.rule()
+
+    page.row('SUBTOTAL', rupees(summary['subtotal']))
+    if summary['tax_rate'] > 0:
+        page.row(f"Tax @{int(summary['tax_rate'] * 100)}%", rupees(summary['tax_amount']))
+    page.rule(double=True)
+    page.row('TOTAL', f"Rs.{summary['total']}", 10, bold=True)
+    page.rule(double=True)
+
+    page.line('THANK YOU FOR YOUR VISIT!', 7.5, bold=True, align='centre')
+    page.line('PLEASE COME AGAIN', 7.5, bold=True, align='centre')
+    return page.y + MARGIN, page.ops
+
+
+def page_stream(pdf, height, ops):
+    """The PDF content stream for one page's drawing operations.
+
+    Each page sets its own fonts and line width, so a stream doesn't depend
+    on the one before it.
+    """
+    text = pdf.beginText()
+    rules = []
+    current_font = None
+    for op in ops:
+        if op[0] == 'text':
+            _, font, size, x, top, string, align = op
+            if (font, size) != current_font:
+                text.setFont(font, size)
+                current_font = (font, size)
+            if align != 'left':
+                width = pdfmetrics.stringWidth(string, font, size)
+                x -= width / 2 if align == 'centre' else width
+            text.setTextOrigin(x, height - top)
+            text.textOut(string)
+        elif op[0] == 'rule':
+            y = height - op[1]
+            rules.append(f'{MARGIN:.2f} {y:.2f} m {PAGE_WIDTH - MARGIN:.2f} {y:.2f} l S')
+    return '\n'.join([text.getCode(), '0.5 w', *rules])
+
+
+def render_chunk(bills, with_logo=False):
+    """(page height, content stream, logo top or None) for each (bill_data, outlet) pair.
+
+    The unit of work sent to a pool worker.
+    """
+    init_worker()
+    pages = []
+    with _scratch_lock:
+        for bill_data, outlet in bills:
+            height, ops = layout_bill(bill_data, outlet, with_logo)
+            logo_top = next((op[1] for op in ops if op[0] == 'logo'), None)
+            pages.append((height, page_stream(_scratch, height, ops), logo_top))
+    return pages
+
+
+_logo_aspect = None
+
+
+def logo_aspect():
+    """Height / width of the cached thermal logo."""
+    global _logo_aspect
+    if _logo_aspect is None:
+        width, height = ImageReader(io.BytesIO(load_logo())).getSize()
+        _logo_aspect = height / width
+    return _logo_aspect
+
+
+def stitch_pages(pages, logo=None):
+    """One PDF from render_chunk() pages, in order."""
+    buffer = io.BytesIO()
+    pdf = new_canvas(buffer)
+    logo_image = ImageReader(io.BytesIO(logo)) if logo else None
+    for height, stream, logo_top in pages:
+        pdf.setPageSize((PAGE_WIDTH, height))
+        pdf.addLiteral(stream)
+        if logo_top is not None and logo_image:
+            # Same image object on every page, so the PDF embeds it once
+            logo_height = CONTENT_WIDTH * logo_aspect()
+            pdf.drawImage(logo_image, MARGIN, height - logo_top - logo_height, CONTENT_WIDTH, logo_height)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+class BatchRenderer:
+    def __init__(self, max_workers=None, chunk_size=50, min_pool_bills=100):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_pool_bills = min_pool_bills
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def pool(self):
+        # Created on first use; spawned workers don't inherit the app's threads or DB connections
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_worker
+                )
+            return self._pool
+
+    def render(self, bills):
+        """PDF bytes for a list of (bill_data, outlet) pairs, one page each, in order."""
+        logo = load_logo()
+        with_logo = logo is not None
+        chunks = [bills[start:start + self.chunk_size] for start in range(0, len(bills), self.chunk_size)]
+        if len(bills) < self.min_pool_bills or self.max_workers < 2:
+            pages = [page for chunk in chunks for page in render_chunk(chunk, with_logo)]
+        else:
+            pages = list(chain.from_iterable(
+                self.pool().map(render_chunk, chunks, [with_logo] * len(chunks))
+            ))
+        return stitch_pages(pages, logo)
@@ -4,6 +4,7 @@ import MainPage from './components/MainPage';
 import POSPage from './components/POSPage';
 import PaymentPage from './components/PaymentPage';
 import OrdersPage from './components/OrdersPage';
+import KitchenPage from './components/KitchenPage';
 import './App.css';
 
 function App() {
@@ -15,6 +16,7 @@ function App() {
           <Route path="/pos/:tableId" element={<POSPage />} />
           <Route path="/payment/:orderId" element={<PaymentPage />} />
           <Route path="/orders" element={<OrdersPage />} />
+          <Route path="/kitchen" element={<KitchenPage />} />
         </Routes>
       </div>
     </Router>
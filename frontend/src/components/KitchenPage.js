@@ -0,0 +1,77 @@
+import React, { useState, useEffect } from 'react';
+import { useNavigate } from 'react-router-dom';
+import { OUTLET_ID } from '../config';
+
+function KitchenPage() {
+  const navigate = useNavigate();
+  const [orders, setOrders] = useState([]);
+  const [connected, setConnected] = useState(false);
+
+  const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:5001/api';
+
+  // The server pushes the whole open queue whenever it changes
+  useEffect(() => {
+    // EventSource can't send the outlet header, so pass it in the query string
+    const query = OUTLET_ID ? `?outlet_id=${OUTLET_ID}` : '';
+    let source;
+    let retryTimer;
+    const connect = () => {
+      source = new EventSource(`${API_BASE}/kitchen/stream${query}`);
+      source.addEventListener('queue', (event) => {
+        setOrders(JSON.parse(event.data).orders);
+        setConnected(true);
+      });
+      source.onerror = () => {
+        setConnected(false);
+        // EventSource gives up on an error status such as a busy server's 503; try again shortly
+        if (source.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, 5000);
+        }
+      };
+    };
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      source.close();
+    };
+  }, [API_BASE]);
+
+  const minutesWaiting = (createdAt) => {
+    return Math.max(0, Math.floor((Date.now() - new Date(createdAt).getTime()) / 60000));
+  };
+
+  return (
+    <div className="container">
+      <div className="orders-header">
+        <button className="button secondary" onClick={() => navigate('/')}>
+          ← Back to Tables
+        </button>
+        <h1>Kitchen</h1>
+        {!connected && <span className="loading">Connecting</span>}
+      </div>
+
+      {orders.length === 0 ? (
+        <div className="card">No open orders</div>
+      ) : (
+        <div className="orders-grid">
+          {orders.map(order => (
+            <div key={order.order_id} className="card">
+              <h3>Table {order.table_number ?? order.table_id} · #{order.order_id}</h3>
+              <p>
+                <span className={`order-status-${order.status}`}>{order.status}</span>
+                {' '}{minutesWaiting(order.created_at)} min
+              </p>
+              {order.items.map((item, index) => (
+                <div key={index}>
+                  {item.quantity} × {item.name}
+                </div>
+              ))}
+            </div>
+          ))}
+        </div>
+      )}
+    </div>
+  );
+}
+
+export default KitchenPage;
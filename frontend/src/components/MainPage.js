@@ -1,6 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { READ_YOUR_WRITES } from '../config';
 
 function MainPage() {
   const [activeTab, setActiveTab] = useState('tables');
@@ -42,22 +43,64 @@ function MainPage() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Bills are filtered by date on the server, so refetch when the window changes
+  const billsWindowMounted = useRef(false);
+  useEffect(() => {
+    if (!billsWindowMounted.current) {
+      billsWindowMounted.current = true;
+      return;
+    }
+    fetchBills();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [timeFilter]);
+
+  const BILL_DASHBOARD_FIELDS = 'id,order_id,invoice_number,subtotal,tax_rate,tax_amount,total,payment_method,bill_date';
+
+  const billParams = () => ({
+    fields: BILL_DASHBOARD_FIELDS,
+    from: getTimeFilterDate().toISOString()
+  });
+
+  const fetchBills = async () => {
+    try {
+      const billsRes = await axios.get(`${API_BASE}/bills`, { params: billParams() });
+      setBills(billsRes.data);
+    } catch (err) {
+      console.error('Error fetching bills:', err);
+    }
+  };
+
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [menuRes, tablesRes, ordersRes, categoriesRes, billsRes] = await Promise.all([
-        axios.get(`${API_BASE}/menu/all`),
-        axios.get(`${API_BASE}/tables`),
-        axios.get(`${API_BASE}/orders`),
-        axios.get(`${API_BASE}/menu/categories`),
-        axios.get(`${API_BASE}/bills`)
-      ]);
+      // All five dashboard reads in one round trip
+      const batchRes = await axios.post(`${API_BASE}/batch`, {
+        requests: [
+          { method: 'GET', path: '/api/menu/all' },
+          { method: 'GET', path: '/api/tables' },
+          { method: 'GET', path: '/api/orders', headers: READ_YOUR_WRITES.headers },
+          { method: 'GET', path: '/api/menu/categories' },
+          // Only the bill fields and date window the dashboard uses
+          { method: 'GET', path: `/api/bills?${new URLSearchParams(billParams())}` }
+        ]
+      });
+      const responses = batchRes.data.responses;
+      const [menuRes, tablesRes, ordersRes, categoriesRes, billsRes] = responses;
+      // A long bill history can be turned away (503) while the server is busy; keep the bills already shown
+      const billsBusy = billsRes.status === 503;
+      if (responses.some(res => res.status >= 400 && !(res === billsRes && billsBusy))) {
+        throw new Error(`Dashboard batch failed: ${responses.map(res => res.status).join(', ')}`);
+      }
       
-      setMenu(menuRes.data);
-      setTables(tablesRes.data);
-      setOrders(ordersRes.data);
-      setMenuCategories(categoriesRes.data);
-      setBills(billsRes.data);
+      setMenu(menuRes.body);
+      setTables(tablesRes.body);
+      setOrders(ordersRes.body);
+      setMenuCategories(categoriesRes.body);
+      if (billsBusy) {
+        console.warn(`Bill history is busy, retry in ${billsRes.body.retry_after} seconds`);
+      } else {
+        setBills(billsRes.body);
+      }
       setError(null);
     } catch (err) {
       setError('Failed to fetch data. Please check if the backend server is running.');
@@ -383,7 +426,38 @@ function MainPage() {
       window.URL.revokeObjectURL(url);
     } catch (error) {
       console.error('Error generating PDF:', error);
-      alert('Failed to generate PDF. Please try again.');
+      alert(busyMessage(error) || 'Failed to generate PDF. Please try again.');
+    }
+  };
+
+  // Report routes answer 503 with Retry-After while other reports are running
+  const busyMessage = (error) => {
+    if (error.response && error.response.status === 503) {
+      return `The server is busy with other reports. Please try again in ${error.response.headers['retry-after'] || 10} seconds.`;
+    }
+    return null;
+  };
+
+  const reprintBillsPDF = async () => {
+    try {
+      // Every bill in the selected period as one thermal-width PDF
+      const response = await axios.get(`${API_BASE}/bills/thermal-pdf`, {
+        params: { from: getTimeFilterDate().toISOString() },
+        responseType: 'blob'
+      });
+
+      const blob = new Blob([response.data], { type: 'application/pdf' });
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `khan_sahab_bills_${new Date().toISOString().slice(0, 19).replace(/:/g, '-')}.pdf`;
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error generating bills PDF:', error);
+      alert(busyMessage(error) || 'Failed to generate bills PDF. Please try again.');
     }
   };
 
@@ -436,6 +510,12 @@ function MainPage() {
           >
             Bills
           </button>
+          <button 
+            className="nav-button"
+            onClick={() => navigate('/kitchen')}
+          >
+            Kitchen
+          </button>
         </div>
       </div>
 
@@ -962,6 +1042,12 @@ function MainPage() {
               >
                 📈 Generate Statistics PDF
               </button>
+              <button 
+                className="button"
+                onClick={() => reprintBillsPDF()}
+              >
+                🧾 Reprint Bills PDF
+              </button>
             </div>
           </div>
 
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
 import { useParams, useNavigate } from 'react-router-dom';
+import { READ_YOUR_WRITES } from '../config';
 
 function POSPage() {
   const { tableId } = useParams();
@@ -13,6 +14,8 @@ function POSPage() {
   const [isUpdating, setIsUpdating] = useState(false);
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  const [quickKeys, setQuickKeys] = useState(null);
 
   const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:5001/api';
   const availableCategories = Array.from(
@@ -25,7 +28,7 @@ function POSPage() {
       const [menuRes, tablesRes, ordersRes] = await Promise.all([
         axios.get(`${API_BASE}/menu`),
         axios.get(`${API_BASE}/tables`),
-        axios.get(`${API_BASE}/orders`)
+        axios.get(`${API_BASE}/orders`, READ_YOUR_WRITES)
       ]);
       
       setMenu(menuRes.data);
@@ -69,6 +72,30 @@ function POSPage() {
     fetchData();
   }, [fetchData]);
 
+  // Best sellers for this time of day, precomputed on the server
+  useEffect(() => {
+    axios.get(`${API_BASE}/menu/quick-keys`)
+      .then(res => setQuickKeys(res.data))
+      .catch(err => console.error('Error fetching quick keys:', err));
+  }, [API_BASE]);
+
+  const quickKeyItems = quickKeys
+    ? (selectedCategory === 'all' ? quickKeys.items : quickKeys.categories[selectedCategory] || [])
+    : [];
+
+  // Server-side search tolerates typos and abbreviations ("btr naan")
+  useEffect(() => {
+    if (!searchTerm.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    let cancelled = false;
+    axios.get(`${API_BASE}/menu/search`, { params: { q: searchTerm, limit: 50 } })
+      .then(res => { if (!cancelled) setSearchResults(res.data); })
+      .catch(err => console.error('Error searching menu:', err));
+    return () => { cancelled = true; };
+  }, [searchTerm, API_BASE]);
+
   const addToCart = (item) => {
     const existingItem = cart.find(cartItem => cartItem.id === item.id);
     if (existingItem) {
@@ -127,6 +154,11 @@ function POSPage() {
       
     } catch (err) {
       console.error('Error placing order:', err);
+      if (err.response && err.response.status === 409) {
+        // Another terminal opened this table first; load its order instead
+        alert(err.response.data.error);
+        fetchData();
+      }
     }
   };
 
@@ -290,19 +322,19 @@ function POSPage() {
             </div>
           </div>
 
+          {!searchTerm && quickKeyItems.length > 0 && (
+            <div className="menu-categories">
+              {quickKeyItems.map(item => (
+                <button key={item.id} className="category-btn" onClick={() => addToCart(item)}>
+                  {item.name}
+                </button>
+              ))}
+            </div>
+          )}
+
           <div className="menu-grid">
-            {menu
-              .filter(item => {
-                // Filter by search term
-                const searchMatch = searchTerm === '' || 
-                  item.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                  item.description.toLowerCase().includes(searchTerm.toLowerCase());
-                
-                // Filter by category
-                const categoryMatch = selectedCategory === 'all' || item.category === selectedCategory;
-                
-                return searchMatch && categoryMatch;
-              })
+            {(searchResults || menu)
+              .filter(item => selectedCategory === 'all' || item.category === selectedCategory)
               .map(item => (
                 <div 
                   key={item.id} 
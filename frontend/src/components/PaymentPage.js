@@ -2,6 +2,25 @@ import React, { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
 import { useParams, useNavigate } from 'react-router-dom';
 
+// Header details used until the server returns the outlet profile
+const FALLBACK_OUTLET = {
+  name: 'KHAN SAHAB RESTAURANT',
+  address: '4, BANSAL NAGAR FATEHABAD ROAD AGRA',
+  phone: '9319209322',
+  gstin: '09AHDPA1039P2ZB',
+  fssai: '12722001001504',
+  place_of_supply: 'Uttar Pradesh'
+};
+
+const outletHeader = (outlet) => ({
+  restaurant_name: outlet.name,
+  address: outlet.address,
+  phone: outlet.phone,
+  gstin: outlet.gstin,
+  fssai: outlet.fssai,
+  place_of_supply: outlet.place_of_supply
+});
+
 function PaymentPage() {
   const { orderId } = useParams();
   const navigate = useNavigate();
@@ -10,6 +29,8 @@ function PaymentPage() {
   const [taxRate, setTaxRate] = useState(0); // 0%, 5%, 10%
   const [paymentMethod, setPaymentMethod] = useState('cash');
   const [showBill, setShowBill] = useState(false);
+  const [invoiceNumber, setInvoiceNumber] = useState('');
+  const [outlet, setOutlet] = useState(FALLBACK_OUTLET);
 
   const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:5001/api';
 
@@ -18,6 +39,7 @@ function PaymentPage() {
       setLoading(true);
       const response = await axios.get(`${API_BASE}/orders/${orderId}`);
       setOrder(response.data);
+      setTaxRate(Math.round((response.data.tax_rate || 0) * 100));
     } catch (err) {
       console.error('Error fetching order:', err);
       alert('Failed to load order');
@@ -36,14 +58,21 @@ function PaymentPage() {
 
   const formatRoundedAmount = (amount) => roundBillTotal(amount).toString();
 
+  // Totals are priced by the backend and returned with every order payload
   const calculateTotals = () => {
     if (!order) return { subtotal: 0, tax: 0, total: 0 };
 
-    const subtotal = order.total_amount;
-    const tax = subtotal * (taxRate / 100);
-    const total = roundBillTotal(subtotal + tax);
+    return { subtotal: order.subtotal, tax: order.tax_amount, total: order.total };
+  };
 
-    return { subtotal, tax, total };
+  const applyTaxRate = async (rate) => {
+    setTaxRate(rate);
+    try {
+      const response = await axios.put(`${API_BASE}/orders/${orderId}/pricing`, { tax_rate: rate / 100 });
+      setOrder(response.data);
+    } catch (err) {
+      console.error('Error updating tax rate:', err);
+    }
   };
 
   const generateBillHTML = (billData, subtotal, taxAmount, total) => {
@@ -202,24 +231,41 @@ function PaymentPage() {
     try {
       const { subtotal, tax, total } = calculateTotals();
 
-      // Update order status to paid
-      await axios.put(`${API_BASE}/orders/${orderId}/status`, {
-        status: 'paid',
-        tax_rate: taxRate,
-        tax_amount: tax,
-        final_total: total,
+      // Save bill to database; the server assigns the invoice number and outlet
+      const billSaveData = {
+        order_id: parseInt(orderId),
+        tax_rate: taxRate / 100,
         payment_method: paymentMethod
+      };
+
+      // Mark the order paid and save its bill in one transaction: both happen or neither does
+      const batchRes = await axios.post(`${API_BASE}/batch`, {
+        transaction: true,
+        requests: [
+          {
+            method: 'PUT',
+            path: `/api/orders/${orderId}/status`,
+            body: { status: 'paid', tax_rate: taxRate / 100, payment_method: paymentMethod }
+          },
+          { method: 'POST', path: '/api/bills', body: billSaveData }
+        ]
       });
+      if (!batchRes.data.committed) {
+        const failed = batchRes.data.responses.find(res => res.status >= 400);
+        throw new Error((failed && failed.body && failed.body.error) || batchRes.data.error || 'Payment was not saved');
+      }
+      const billRes = batchRes.data.responses[1].body;
+      const savedInvoiceNumber = billRes.invoice_number;
+      const savedOutlet = billRes.outlet || outlet;
+      setInvoiceNumber(savedInvoiceNumber);
+      setOutlet(savedOutlet);
 
       const currentDate = new Date();
 
       const billData = {
-        restaurant_name: 'KHAN SAHAB RESTAURANT',
-        address: '4, BANSAL NAGAR FATEHABAD ROAD AGRA',
-        phone: '9319209322',
-        gstin: '09AHDPA1039P2ZB',
-        fssai: '12722001001504',
-        invoice_number: orderId.toString(),
+        ...billSaveData,
+        ...outletHeader(savedOutlet),
+        invoice_number: savedInvoiceNumber,
         table_id: order.table_id,
         table_number: order.table_number ?? order.table_id,
         date: currentDate.toLocaleDateString('en-IN'),
@@ -234,32 +280,8 @@ function PaymentPage() {
           qty: item.quantity,
           price: item.price
         })),
-        tax_rate: taxRate / 100,
-        payment_method: paymentMethod,
-      };
-
-      // Save bill to database
-      const billSaveData = {
-        order_id: parseInt(orderId),
-        invoice_number: orderId.toString(),
-        restaurant_name: billData.restaurant_name,
-        address: billData.address,
-        phone: billData.phone,
-        gstin: billData.gstin,
-        fssai: billData.fssai,
-        subtotal: subtotal,
-        tax_rate: taxRate / 100,
-        tax_amount: tax,
-        total: total,
-        payment_method: paymentMethod
       };
 
-      try {
-        await axios.post(`${API_BASE}/bills`, billSaveData);
-      } catch (billError) {
-        console.error('Failed to save bill:', billError);
-      }
-
       // Open bill in a new popup window for printing
       openPrintWindow(billData, subtotal, tax, total);
 
@@ -275,13 +297,8 @@ function PaymentPage() {
     const { subtotal, tax, total } = calculateTotals();
     const currentDate = new Date();
     const billData = {
-      restaurant_name: 'KHAN SAHAB RESTAURANT',
-      address: '4, BANSAL NAGAR FATEHABAD ROAD AGRA',
-      phone: '9319209322',
-      gstin: '09AHDPA1039P2ZB',
-      fssai: '12722001001504',
-      place_of_supply: 'Uttar Pradesh',
-      invoice_number: orderId.toString(),
+      ...outletHeader(outlet),
+      invoice_number: invoiceNumber,
       table_id: order.table_id,
       table_number: order.table_number ?? order.table_id,
       date: currentDate.toLocaleDateString('en-IN'),
@@ -329,11 +346,11 @@ function PaymentPage() {
             <div className="bill-logo">
               <img src="/khan_sahab_logo.jpg" alt="Khan Sahab Logo" className="logo-image" />
             </div>
-            <h1>KHAN SAHAB RESTAURANT</h1>
-            <p>4, BANSAL NAGAR FATEHABAD ROAD AGRA</p>
-            <p>Phone: 9319209322</p>
-            <p>GSTIN: 09AHDPA1039P2ZB</p>
-            <p>FSSAI: 12722001001504</p>
+            <h1>{outlet.name}</h1>
+            <p>{outlet.address}</p>
+            <p>Phone: {outlet.phone}</p>
+            <p>GSTIN: {outlet.gstin}</p>
+            <p>FSSAI: {outlet.fssai}</p>
             <div className="bill-divider">------------------------------------------------</div>
           </div>
 
@@ -354,7 +371,7 @@ function PaymentPage() {
                   second: '2-digit',
                   hour12: false
                 })}</p>
-                <p>Invoice no: {orderId}</p>
+                <p>Invoice no: {invoiceNumber}</p>
               </div>
             </div>
             <div className="bill-divider">------------------------------------------------</div>
@@ -485,7 +502,7 @@ function PaymentPage() {
                     name="tax"
                     value="0"
                     checked={taxRate === 0}
-                    onChange={(e) => setTaxRate(parseInt(e.target.value))}
+                    onChange={(e) => applyTaxRate(parseInt(e.target.value))}
                   />
                   <span>No Tax (0%)</span>
                 </label>
@@ -495,7 +512,7 @@ function PaymentPage() {
                     name="tax"
                     value="5"
                     checked={taxRate === 5}
-                    onChange={(e) => setTaxRate(parseInt(e.target.value))}
+                    onChange={(e) => applyTaxRate(parseInt(e.target.value))}
                   />
                   <span>5% Tax</span>
                 </label>
@@ -505,7 +522,7 @@ function PaymentPage() {
                     name="tax"
                     value="10"
                     checked={taxRate === 10}
-                    onChange={(e) => setTaxRate(parseInt(e.target.value))}
+                    onChange={(e) => applyTaxRate(parseInt(e.target.value))}
                   />
                   <span>10% Tax</span>
                 </label>
@@ -3,6 +3,12 @@
 // In development, use localhost
 export const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5001/api';
 
+// Outlet (branch) this terminal belongs to; empty uses the server's default outlet
+export const OUTLET_ID = process.env.REACT_APP_OUTLET_ID || '';
+
+// Request options for reads that must see this terminal's own writes (skips the read replica)
+export const READ_YOUR_WRITES = { headers: { 'X-Read-Your-Writes': '1' } };
+
 // Printer Configuration
 // Change these values to match your printer settings
 export const PRINTER_CONFIG = {
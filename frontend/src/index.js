@@ -1,7 +1,14 @@
 import React from 'react';
 import ReactDOM from 'react-dom/client';
 import './index.css';
+import axios from 'axios';
 import App from './App';
+import { OUTLET_ID } from './config';
+
+// Every API call is routed to this terminal's outlet
+if (OUTLET_ID) {
+  axios.defaults.headers.common['X-Outlet-Id'] = OUTLET_ID;
+}
 
 const root = ReactDOM.createRoot(document.getElementById('root'));
 root.render(